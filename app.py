@@ -7,7 +7,8 @@ from flask import send_from_directory # Import for the download_file utility
 # Local imports
 from config import Config
 from models import db, AppUser
-from routes import auth_bp, dashboard_bp, staff_mgmt_bp, inventory_bp, maintenance_bp, amcs_bp, settings_bp
+from routes import auth_bp, dashboard_bp, staff_mgmt_bp, inventory_bp, maintenance_bp, amcs_bp, settings_bp, jobs_bp
+from commands import register_commands
 
 # Utility functions (kept here for global access)
 @dashboard_bp.route('/uploads/<path:filename>')
@@ -43,6 +44,10 @@ def create_app():
     app.register_blueprint(maintenance_bp)
     app.register_blueprint(amcs_bp)
     app.register_blueprint(settings_bp)
+    app.register_blueprint(jobs_bp)
+
+    # CLI maintenance commands (flask rebuild-search-index, ...)
+    register_commands(app)
 
     # Global Index Route
     @app.route('/')
@@ -0,0 +1,320 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import click
+from flask import Flask
+from config import Config
+from models import db
+
+
+def register_commands(app):
+    """Registers the maintenance commands available through `flask <command>`."""
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Creates (if needed) and fully rebuilds the employee search index."""
+        from services.search import rebuild_search_index
+        backend = rebuild_search_index()
+        click.echo(f"Employee search index rebuilt using the '{backend}' backend.")
+
+    @app.cli.command('migrate-beds')
+    def migrate_beds_command():
+        """Creates the Room/Bed tables and converts 'Vacant' placeholder employee rows into beds."""
+        from services.beds import migrate_placeholder_beds
+        db.create_all()
+        rooms, beds, placeholders = migrate_placeholder_beds()
+        db.session.commit()
+        click.echo(f"{placeholders} placeholder row(s) converted; {beds} bed(s) in {rooms} room(s).")
+
+    @app.cli.command('upgrade-db')
+    def upgrade_db_command():
+        """Creates missing tables, then adds the columns and indexes that newer models define to
+        existing tables (db.create_all() leaves existing tables alone)."""
+        db.create_all()
+        added = _add_missing_schema()
+        for name in added:
+            click.echo(f"  added {name}")
+        if 'inventory_item.received_total' in added or 'inventory_item.distributed_total' in added:
+            from services.inventory import rebuild_ledger_totals
+            rebuild_ledger_totals()
+            click.echo("  inventory received/distributed totals filled in from the ledger")
+        from models import InventoryConsumption
+        from services.inventory import seed_location_stock, rebuild_consumption, backfill_transaction_dates
+        undated = backfill_transaction_dates()
+        if undated:
+            click.echo(f"  {undated} undated inventory transaction(s) given an empty date")
+        if InventoryConsumption.query.first() is None:
+            rows = rebuild_consumption()
+            if rows:
+                click.echo(f"  consumption rollup built from the ledger ({rows} row(s))")
+        seeded = seed_location_stock()
+        if seeded:
+            click.echo(f"  stock of {seeded} item(s) placed in the default store")
+        db.session.commit()
+        click.echo(f"Database schema is up to date ({len(added)} change(s)).")
+
+    @app.cli.command('rebuild-inventory-totals')
+    def rebuild_inventory_totals_command():
+        """Recomputes every item's running received/distributed totals from the transaction ledger."""
+        from services.inventory import rebuild_ledger_totals
+        changed = rebuild_ledger_totals()
+        db.session.commit()
+        click.echo(f"Inventory totals rebuilt from the ledger; {changed} item(s) corrected.")
+
+    @app.cli.command('rebuild-inventory-consumption')
+    def rebuild_inventory_consumption_command():
+        """Recomputes the daily consumption rollup behind the usage report and reorder forecast."""
+        from services.inventory import rebuild_consumption
+        rows = rebuild_consumption()
+        db.session.commit()
+        click.echo(f"Inventory consumption rollup rebuilt from the ledger ({rows} row(s)).")
+
+    @app.cli.command('reconcile-inventory')
+    @click.option('--fix', is_flag=True, help='Set drifting items to their ledger balance.')
+    def reconcile_inventory_command(fix):
+        """Checks every item's stock and totals against the transaction ledger (exit code 1 on
+        unfixed drift, for nightly runs)."""
+        from services.inventory import ledger_drift, fix_ledger_drift
+        started = time.perf_counter()
+        report = ledger_drift()
+        for row in report:
+            click.echo(f"  {row['name']}: stock {row['quantity']}, ledger {row['expected']} (drift {row['drift']:+d}), "
+                       f"locations {row['location_stock']}; "
+                       f"totals {row['received_total']}/{row['distributed_total']}, "
+                       f"ledger {row['received']}/{row['distributed']}")
+        if fix and report:
+            fixed = fix_ledger_drift(report)
+            db.session.commit()
+            click.echo(f"{fixed} of {len(report)} drifting item(s) corrected.")
+            if fixed < len(report):
+                raise SystemExit(1)
+        else:
+            click.echo(f"{len(report)} item(s) drift from the ledger "
+                       f"(checked in {time.perf_counter() - started:.2f}s).")
+            if report:
+                raise SystemExit(1)
+
+    @app.cli.command('bench-staff-import')
+    @click.option('--rows', default=5000, show_default=True, help='Spreadsheet rows to generate.')
+    @click.option('--batch-size', default=None, type=int, help='Override IMPORT_BATCH_SIZE.')
+    def bench_staff_import_command(rows, batch_size):
+        """Times the staff importer (per-row baseline vs bulk) on a throwaway in-memory database."""
+        _bench_staff_import(rows, batch_size)
+
+    @app.cli.command('stress-stock')
+    @click.option('--threads', default=16, show_default=True, help='Concurrent workers.')
+    @click.option('--operations', default=200, show_default=True, help='Stock movements per worker.')
+    @click.option('--stock', default=500, show_default=True, help='Opening quantity of the test item.')
+    @click.option('--database', default=None, help='Database URL to run against (default: a temporary SQLite file).')
+    def stress_stock_command(threads, operations, stock, database):
+        """Hammers one item with concurrent receipts, issues, transfers, edits and deletes, then
+        checks that no stock was lost or oversold, in total or at any location."""
+        if not _stress_stock(threads, operations, stock, database):
+            raise SystemExit(1)
+
+
+# --- Schema upgrades ---
+def _add_missing_schema():
+    """ALTER TABLE ... ADD COLUMN / CREATE INDEX for whatever the models define that the
+    database lacks. Returns the names ('table.column' or index name) that were added."""
+    from sqlalchemy import inspect, text
+    from sqlalchemy.schema import CreateIndex
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in columns:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(db.engine.dialect)}"
+            if column.server_default is not None:
+                default = column.server_default.arg
+                default = default.text if hasattr(default, 'text') else "'" + str(default).replace("'", "''") + "'"
+                ddl += f" DEFAULT {default}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            db.session.execute(text(ddl))
+            added.append(f"{table.name}.{column.name}")
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                db.session.execute(CreateIndex(index))
+                added.append(index.name)
+    return added
+
+
+# --- Benchmarks ---
+def _bench_staff_frame(rows):
+    import pandas as pd
+    records = []
+    for i in range(rows):
+        vacant = i % 10 == 0
+        records.append({
+            'ACCOMMODATION_NAME': f'Camp {i // 100}', 'ROOM': f'{i // 4}', 'LOCATION': f'Location {i // 1000}',
+            'EMP_ID': 'N/A' if vacant else f'EMP{i:06d}', 'STATUS': 'Vacant' if vacant else 'Active',
+            'NAME': '-' if vacant else f'Employee {i}', 'DESIGNATION': 'Helper', 'NATIONALITY': 'India',
+            'MOBILE_NUMBER': '0500000000', 'FOOD_VARIETY': 'Veg Rice', 'MEAL_TIME': 'Lunch', 'REMARKS': '',
+        })
+    return pd.DataFrame(records)
+
+
+def _bench_per_row_baseline(df):
+    """The importer as it was before bulk loading: a Camp lookup and an ORM add for every row."""
+    from models import Employee, Camp
+    vacant_counters = {}
+    for _, row in df.iterrows():
+        accommodation_name = row['ACCOMMODATION_NAME'].strip()
+        room_number = str(row['ROOM'])
+        if not Camp.query.filter_by(name=accommodation_name).first():
+            db.session.add(Camp(name=accommodation_name, location=row['LOCATION']))
+        emp_id = row['EMP_ID']
+        if row['STATUS'].lower() == 'vacant':
+            vacant_counters[room_number] = vacant_counters.get(room_number, 0) + 1
+            emp_id = f"{room_number}-Vacant-{vacant_counters[room_number]}"
+        db.session.add(Employee(
+            accommodation_name=accommodation_name, room=room_number, status=row['STATUS'], emp_id=emp_id,
+            name=row['NAME'], designation=row['DESIGNATION'], nationality=row['NATIONALITY'],
+            mobile_number=row['MOBILE_NUMBER'], food_variety=row['FOOD_VARIETY'], meal_time=row['MEAL_TIME'],
+            location=row['LOCATION'], remarks=row['REMARKS']
+        ))
+    db.session.commit()
+
+
+def _bench_staff_import(rows, batch_size):
+    from services.staff_import import replace_staff, sync_staff
+
+    bench_app = Flask(__name__)
+    bench_app.config.from_object(Config)
+    bench_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    if batch_size:
+        bench_app.config['IMPORT_BATCH_SIZE'] = batch_size
+    db.init_app(bench_app)
+
+    df = _bench_staff_frame(rows)
+    accommodations = df['ACCOMMODATION_NAME'].unique().tolist()
+    cases = [
+        ('per-row baseline (fresh load)', True, _bench_per_row_baseline),
+        ('bulk replace (fresh load)', True, lambda frame: replace_staff([frame], accommodations)),
+        ('incremental sync (fresh load)', True, lambda frame: sync_staff([frame])),
+        ('incremental sync (no changes)', False, lambda frame: sync_staff([frame])),
+    ]
+    click.echo(f"Staff import benchmark: {rows} rows, batch size {bench_app.config['IMPORT_BATCH_SIZE']}")
+    with bench_app.app_context():
+        for label, fresh, importer in cases:
+            if fresh:
+                db.drop_all()
+                db.create_all()
+            started = time.perf_counter()
+            importer(df.copy())
+            elapsed = time.perf_counter() - started
+            click.echo(f"  {label:<32} {elapsed:8.3f}s  {rows / elapsed:10.0f} rows/sec")
+
+
+def _stress_stock(threads, operations, stock, database):
+    from sqlalchemy import func
+    from models import InventoryItem, InventoryStock, InventoryConsumption, InventoryTransaction
+    from services.inventory import (StockError, record_incoming, record_outgoing, record_transfer,
+                                    change_outgoing, remove_outgoing)
+
+    workdir = None
+    if not database:
+        workdir = tempfile.mkdtemp(prefix='stress-stock-')
+        database = 'sqlite:///' + os.path.join(workdir, 'stress.db')
+    stress_app = Flask(__name__)
+    stress_app.config.from_object(Config)
+    stress_app.config['SQLALCHEMY_DATABASE_URI'] = database
+    if database.startswith('sqlite'):
+        # Writers queue on SQLite's database lock instead of failing straight away.
+        stress_app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 60}}
+    db.init_app(stress_app)
+
+    with stress_app.app_context():
+        db.drop_all()
+        db.create_all()
+        item = InventoryItem(name='Stress Test Item', quantity=0)
+        db.session.add(item)
+        db.session.flush()
+        record_incoming(item, stock, supplier_name='Opening stock')
+        db.session.commit()
+        item_id = item.id
+
+    refused, errors = [0], []
+    counter_lock = threading.Lock()
+
+    locations = [Config.INVENTORY_DEFAULT_LOCATION, 'Stress Store B']
+
+    def worker(seed):
+        rng = random.Random(seed)
+        with stress_app.app_context():
+            for _ in range(operations):
+                try:
+                    item = db.session.get(InventoryItem, item_id)
+                    roll = rng.random()
+                    if roll < 0.25:
+                        record_incoming(item, rng.randint(1, 5), location=rng.choice(locations))
+                    elif roll < 0.7:
+                        record_outgoing(item, rng.randint(1, 10), emp_id=f'EMP{seed}', location=rng.choice(locations))
+                    elif roll < 0.8:
+                        source, destination = rng.sample(locations, 2)
+                        record_transfer(item, rng.randint(1, 10), source, destination)
+                    else:
+                        transaction = InventoryTransaction.query.filter_by(
+                            item_id=item_id, type='Outgoing').order_by(func.random()).first()
+                        if transaction is None:
+                            continue
+                        if roll < 0.9:
+                            change_outgoing(transaction, rng.randint(1, 10), transaction.date)
+                        else:
+                            remove_outgoing(transaction)
+                    db.session.commit()
+                except StockError:
+                    db.session.rollback()
+                    with counter_lock:
+                        refused[0] += 1
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(repr(e))
+            db.session.remove()
+
+    click.echo(f"Stock stress test: {threads} threads x {operations} operations on {database}")
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with stress_app.app_context():
+        item = db.session.get(InventoryItem, item_id)
+        on_hand, totals = item.quantity, (item.received_total, item.distributed_total)
+        balances = dict(db.session.query(InventoryStock.location, InventoryStock.quantity).filter_by(item_id=item_id))
+        received = db.session.query(func.coalesce(func.sum(InventoryTransaction.quantity), 0)).filter_by(
+            item_id=item_id, type='Incoming').scalar()
+        issued = db.session.query(func.coalesce(func.sum(InventoryTransaction.quantity), 0)).filter_by(
+            item_id=item_id, type='Outgoing').scalar()
+        consumed = db.session.query(func.coalesce(func.sum(InventoryConsumption.quantity), 0)).filter_by(
+            item_id=item_id).scalar()
+        db.session.remove()
+        db.engine.dispose()
+    if workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    expected = received - issued
+    click.echo(f"  {elapsed:.2f}s; {refused[0]} movement(s) refused for lack of stock or a conflicting edit; "
+               f"{len(errors)} error(s)")
+    click.echo(f"  received {received}, issued {issued}: expected {expected} on hand, found {on_hand}")
+    click.echo(f"  running totals: received {totals[0]}, distributed {totals[1]}; consumption rollup {consumed}")
+    click.echo(f"  location balances: {', '.join(f'{name} {quantity}' for name, quantity in sorted(balances.items()))}")
+    for error in errors[:5]:
+        click.echo(f"  error: {error}")
+    ok = (on_hand == expected and on_hand >= 0 and totals == (received, issued) and consumed == issued and not errors
+          and sum(balances.values()) == on_hand and min(balances.values()) >= 0)
+    click.echo('  OK: no stock lost or oversold.' if ok else '  FAILED: stock does not match the ledger.')
+    return ok
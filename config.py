@@ -6,6 +6,46 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     UPLOAD_FOLDER = 'uploads'
     
+    # Seconds each worker may reuse the dashboard occupancy snapshot (0 = always query).
+    # The snapshot is dropped as soon as any Employee row is written.
+    OCCUPANCY_CACHE_TTL = int(os.environ.get('OCCUPANCY_CACHE_TTL', 0))
+    
+    # Rows per page on the dashboard employee table (override per request with ?per_page=)
+    DASHBOARD_PAGE_SIZE = int(os.environ.get('DASHBOARD_PAGE_SIZE', 100))
+    
+    # Employee search: 'auto' picks FTS5 on SQLite, pg_trgm on PostgreSQL, else in-process index
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+    SEARCH_INDEX_TTL = 300 # Seconds the in-process fallback index may serve writes from other workers
+    SEARCH_TYPEAHEAD_LIMIT = 10
+    
+    # Vacant beds per page of the bed finder used by the assignment forms (?per_page= up to 200)
+    VACANT_BED_PAGE_SIZE = int(os.environ.get('VACANT_BED_PAGE_SIZE', 50))
+    
+    # Rows per page of the inventory transaction history (override per request with ?per_page=)
+    INVENTORY_HISTORY_PAGE_SIZE = int(os.environ.get('INVENTORY_HISTORY_PAGE_SIZE', 100))
+    
+    # Store that holds inventory recorded without a location (and all stock from before locations)
+    INVENTORY_DEFAULT_LOCATION = os.environ.get('INVENTORY_DEFAULT_LOCATION', 'Main Store')
+    
+    # Days of issues the daily consumption rate (and so the projected stock-out date) is averaged over
+    INVENTORY_USAGE_WINDOW_DAYS = int(os.environ.get('INVENTORY_USAGE_WINDOW_DAYS', 30))
+    
+    # Reorder point = daily consumption x (supplier lead time + safety stock), both in days
+    INVENTORY_REORDER_LEAD_DAYS = int(os.environ.get('INVENTORY_REORDER_LEAD_DAYS', 7))
+    INVENTORY_SAFETY_STOCK_DAYS = int(os.environ.get('INVENTORY_SAFETY_STOCK_DAYS', 7))
+    
+    # Rows per executemany batch when spreadsheet imports insert into the database
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+    
+    # Rows read into memory at a time when an uploaded spreadsheet is streamed
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 5000))
+    
+    # Processes that parse the sheets of a multi-sheet staff workbook (0 = one per CPU)
+    IMPORT_PARSE_WORKERS = int(os.environ.get('IMPORT_PARSE_WORKERS', 0))
+    
+    # Background threads per worker process that run spreadsheet upload jobs
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    
     # NEW: User Roles
     USER_ROLES = [
         'Admin', 
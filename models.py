@@ -71,6 +71,36 @@ class Employee(db.Model):
     check_out_date = db.Column(db.String(50))
     shift_out_date = db.Column(db.String(50))
 
+class Room(db.Model):
+    """A room of an accommodation; its bed spaces are Bed rows."""
+    id = db.Column(db.Integer, primary_key=True)
+    accommodation_name = db.Column(db.String(100), nullable=False)
+    number = db.Column(db.String(50), nullable=False)
+    location = db.Column(db.String(100))
+    beds = db.relationship('Bed', back_populates='room', order_by='Bed.slot')
+    __table_args__ = (
+        db.UniqueConstraint('accommodation_name', 'number', name='uq_room_accommodation_number'),
+        db.Index('ix_room_location', 'location', 'accommodation_name', 'number'),
+    )
+
+class Bed(db.Model):
+    """One bed space in a Room; vacant while it has no occupant (see services/beds.py)."""
+    id = db.Column(db.Integer, primary_key=True)
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
+    slot = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='Vacant') # Vacant, Occupied
+    occupant_id = db.Column(db.Integer, db.ForeignKey('employee.id', ondelete='SET NULL'), unique=True)
+    room = db.relationship('Room', back_populates='beds')
+    occupant = db.relationship('Employee', backref=db.backref('bed', uselist=False))
+    __table_args__ = (
+        db.UniqueConstraint('room_id', 'slot', name='uq_bed_room_slot'),
+        db.Index('ix_bed_status_room', 'status', 'room_id'),
+    )
+
+    @property
+    def label(self):
+        return f"{self.room.number}-Bed-{self.slot}"
+
 class Camp(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
@@ -80,6 +110,35 @@ class InventoryItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
     quantity = db.Column(db.Integer, default=0)
+    # Running totals of the ledger, kept in step by services/inventory.py on every transaction write
+    received_total = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    distributed_total = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+class InventoryStock(db.Model):
+    """Stock of one item held at one location; the item's quantity is the sum over its locations."""
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('inventory_item.id'), nullable=False)
+    location = db.Column(db.String(100), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    item = db.relationship('InventoryItem')
+    __table_args__ = (
+        db.UniqueConstraint('item_id', 'location', name='uq_inventory_stock_item_location'),
+        db.Index('ix_inventory_stock_location', 'location', 'item_id'),
+    )
+
+class InventoryConsumption(db.Model):
+    """Daily rollup of stock issued: units of one item taken from one location for one room
+    ('' when the issue named no room) on one day, kept in step with the 'Outgoing' transactions."""
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('inventory_item.id'), nullable=False)
+    location = db.Column(db.String(100), nullable=False)
+    room_number = db.Column(db.String(50), nullable=False, default='')
+    day = db.Column(db.String(10), nullable=False) # 'YYYY-MM-DD'
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (
+        db.UniqueConstraint('item_id', 'day', 'location', 'room_number', name='uq_inventory_consumption_key'),
+        db.Index('ix_inventory_consumption_day', 'day', 'item_id', 'quantity'),
+    )
 
 class InventoryTransaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -87,13 +146,21 @@ class InventoryTransaction(db.Model):
     item_name = db.Column(db.String(100))
     type = db.Column(db.String(20))
     quantity = db.Column(db.Integer)
-    date = db.Column(db.String(50))
+    date = db.Column(db.String(50), nullable=False, default='', server_default='') # 'YYYY-MM-DD'; '' for undated legacy rows
     emp_id = db.Column(db.String(50))
     room_number = db.Column(db.String(50))
     lpo_number = db.Column(db.String(50))
     supplier_name = db.Column(db.String(100))
     file_path = db.Column(db.String(255))
+    location = db.Column(db.String(100)) # Store the stock moved in or out of (the source of a Transfer)
+    to_location = db.Column(db.String(100)) # Destination of a Transfer
     item = db.relationship('InventoryItem')
+    __table_args__ = (
+        # Covers the per-item ledger sums of the reconciliation (services/inventory.py)
+        db.Index('ix_inventory_transaction_item_type', 'item_id', 'type', 'quantity'),
+        # Serves the date-ordered, date-filtered history pages
+        db.Index('ix_inventory_transaction_type_date', 'type', 'date'),
+    )
 
 class MaintenanceReport(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -125,4 +192,26 @@ class AMCsService(db.Model):
 class AMCsSupplier(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
-    contact = db.Column(db.String(100))
\ No newline at end of file
+    contact = db.Column(db.String(100))
+class ImportJob(db.Model):
+    """A spreadsheet upload processed in the background (see services/jobs.py)."""
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50))
+    filename = db.Column(db.String(255))
+    status = db.Column(db.String(20), default='Queued') # Queued, Parsing, Validating, Committing, Completed, Failed
+    rows_total = db.Column(db.Integer, default=0)
+    rows_processed = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
+    result = db.Column(db.Text) # JSON summary (or validation report) written when the job finishes
+    created_by = db.Column(db.Integer, db.ForeignKey('app_user.id'))
+    created_at = db.Column(db.String(50))
+    finished_at = db.Column(db.String(50))
+
+    def to_dict(self):
+        import json
+        return {
+            'id': self.id, 'kind': self.kind, 'filename': self.filename, 'status': self.status,
+            'rows_total': self.rows_total or 0, 'rows_processed': self.rows_processed or 0,
+            'error': self.error, 'result': json.loads(self.result) if self.result else None,
+            'created_at': self.created_at, 'finished_at': self.finished_at,
+        }
@@ -8,6 +8,7 @@ inventory_bp = Blueprint('inventory', __name__, url_prefix='/inventory')
 maintenance_bp = Blueprint('maintenance', __name__, url_prefix='/maintenance')
 amcs_bp = Blueprint('amcs', __name__, url_prefix='/amcs')
 settings_bp = Blueprint('settings', __name__, url_prefix='/settings')
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
 
 # Import the routes to link them to the Blueprints
-from . import auth, dashboard, staff_mgmt, inventory, maintenance, amcs, settings
\ No newline at end of file
+from . import auth, dashboard, staff_mgmt, inventory, maintenance, amcs, settings, jobs
\ No newline at end of file
@@ -1,11 +1,13 @@
 import os
-import io
-import pandas as pd
 from datetime import datetime
-from flask import render_template, request, redirect, url_for, flash, send_file, current_app
+from flask import render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
 from routes import amcs_bp
 from models import db, AMCsService, AMCsSupplier # Assuming AMCsSupplier is now imported from models
+from services.export import export_response
+from services.jobs import submit_job, job_accepted
+from services.spreadsheet import is_spreadsheet
+from services.amcs_import import import_amcs_file
 
 # --- Helper Functions ---
 def get_amcs_suppliers():
@@ -25,42 +27,9 @@ def amcs_dashboard():
         # --- File Upload Logic ---
         if 'file' in request.files and request.files['file'].filename != '':
             file = request.files['file']
-            if file and file.filename.endswith(('.xlsx', '.xls', '.csv')):
-                try:
-                    read_method = pd.read_excel if file.filename.endswith(('.xlsx', '.xls')) else pd.read_csv
-                    df = read_method(file, dtype=str).fillna('N/A')
-                    for _, row in df.iterrows():
-                        # Use new date field names
-                        inspection_date = pd.to_datetime(row.get('Inspection Date', row.get('Start Date'))).strftime('%Y-%m-%d')
-                        expiry_date = pd.to_datetime(row.get('Expiry Date', row.get('End Date'))).strftime('%Y-%m-%d')
-                        
-                        start_dt = datetime.strptime(inspection_date, '%Y-%m-%d')
-                        end_dt = datetime.strptime(expiry_date, '%Y-%m-%d')
-                        duration = (end_dt - start_dt).days
-
-                        new_amc = AMCsService(
-                            # service_id removed
-                            date=row.get('Date', datetime.now().strftime('%Y-%m-%d')),
-                            type=row.get('Type', 'N/A'),
-                            supplier_name=row.get('Supplier Name', 'N/A'),
-                            inspection_date=inspection_date, # New field
-                            expiry_date=expiry_date,         # New field
-                            remarks=row.get('Remarks', 'N/A'),
-                            duration=duration
-                        )
-                        db.session.add(new_amc)
-                        
-                        # Auto-add supplier if not found
-                        supplier_name = row.get('Supplier Name', 'N/A')
-                        if supplier_name != 'N/A' and not AMCsSupplier.query.filter_by(name=supplier_name).first():
-                             db.session.add(AMCsSupplier(name=supplier_name, contact='N/A'))
-
-
-                    db.session.commit()
-                    flash('AMCs services uploaded successfully!', 'success')
-                except Exception as e:
-                    db.session.rollback()
-                    flash(f'File upload failed: {e}', 'danger')
+            if file and is_spreadsheet(file.filename):
+                job = submit_job('amcs', file, import_amcs_file, dry_run=bool(request.form.get('dry_run')))
+                return job_accepted(job)
             else:
                 flash('Invalid file format. Please upload an Excel or CSV file.', 'danger')
         return redirect(url_for('amcs.amcs_dashboard'))
@@ -82,29 +51,17 @@ def amcs_dashboard():
 @amcs_bp.route('/download_amcs_report')
 @login_required
 def download_amcs_report():
-    amcs = AMCsService.query.order_by(AMCsService.date.desc()).all()
-    data = [{
-        # service_id removed
-        'Date': a.date,
-        'Type': a.type,
-        'Supplier Name': a.supplier_name,
-        'Inspection Date': a.inspection_date, # New field
-        'Expiry Date': a.expiry_date,         # New field
-        'Duration (Days)': a.duration,
-        'Remaining Days': a.remaining_days,
-        'Remarks': a.remarks
-    } for a in amcs]
-    df = pd.DataFrame(data)
-
-    buffer = io.BytesIO()
-    df.to_excel(buffer, index=False, sheet_name='AMCs Services')
-    buffer.seek(0)
-
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name='amcs_services_report.xlsx',
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return export_response(
+        AMCsService.query.order_by(AMCsService.date.desc()),
+        [('Date', AMCsService.date),
+         ('Type', AMCsService.type),
+         ('Supplier Name', AMCsService.supplier_name),
+         ('Inspection Date', AMCsService.inspection_date),
+         ('Expiry Date', AMCsService.expiry_date),
+         ('Duration (Days)', AMCsService.duration),
+         ('Remaining Days', AMCsService.remaining_days),
+         ('Remarks', AMCsService.remarks)],
+        filename='amcs_services_report.xlsx', sheet_name='AMCs Services'
     )
 
 @amcs_bp.route('/add', methods=['GET', 'POST'])
@@ -1,13 +1,28 @@
-import pandas as pd
-import io
-import pandas as pd
-import io
-from flask import render_template, request, redirect, url_for, flash, send_file
+from flask import render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required
-from sqlalchemy import or_, not_
+from sqlalchemy import or_, not_, case, func
 from routes import dashboard_bp
-from models import db, Employee
-from sqlalchemy import func
+from models import Employee
+from services.occupancy import get_occupancy_summary
+from services.pagination import keyset_paginate, get_page_size
+from services.search import employee_search_filter
+from services.export import export_response
+from services.beds import find_vacant_beds, bed_dict
+
+# Display order of the employee table: occupants first, leavers last (vacant beds are Bed rows).
+STATUS_SORT_ORDER = { 
+    'Active': 0, 'On Leave': 1, 'Vacation': 2, 'Check-in': 3,
+    'Resigned': 4, 'Terminated': 5, 'Shifted-out': 98, 'Ex-Employee': 99 
+}
+
+def employee_sort_keys():
+    """SQL sort keys for the employee table: (status rank, room, name, id)."""
+    return [
+        case(STATUS_SORT_ORDER, value=Employee.status, else_=100),
+        func.coalesce(Employee.room, ''),
+        func.coalesce(Employee.name, ''),
+        Employee.id,
+    ]
 
 @dashboard_bp.route('/dashboard')
 @login_required
@@ -16,28 +31,17 @@ def dashboard():
     location_filter = request.args.get('location')
     query = request.args.get('query', '').strip()
     
-    occupying_statuses = ['Active', 'Vacation', 'On Leave']
-    
-    # 1. Summary Calculations
-    total_employees = Employee.query.filter(
-        Employee.status.in_(occupying_statuses), 
-        Employee.room.isnot(None)
-    ).count()
-    
-    total_vacant_beds = Employee.query.filter_by(status='Vacant').count()
-    total_on_vacation = Employee.query.filter_by(status='Vacation').count()
-    total_resigned_terminated = Employee.query.filter(or_(Employee.status == 'Resigned', Employee.status == 'Terminated')).count()
-    
-    employees_without_room = Employee.query.filter(
-        Employee.status == 'Check-in', 
-        Employee.room.is_(None)
-    ).count()
-    
-    location_summary = db.session.query(Employee.location, func.count(Employee.id)).filter(
-        Employee.status.in_(occupying_statuses),
-        Employee.room.isnot(None)
-    ).group_by(Employee.location).all()
+    # 1. Summary Calculations (single aggregate query, optionally cached)
+    summary = get_occupancy_summary()
     
+    page_size = get_page_size(current_app.config['DASHBOARD_PAGE_SIZE'])
+    if status_filter == 'Vacant':
+        # Vacant beds are Bed rows; listed room by room, shaped like employee rows for the table
+        page = find_vacant_beds(page_size, location=location_filter,
+                                after=request.args.get('after'), before=request.args.get('before'))
+        page.items = [bed_dict(bed) for bed in page.items]
+        return _render_dashboard(summary, page, query)
+
     # 2. Employee Table Query (Base)
     employees_query = Employee.query
     
@@ -47,8 +51,9 @@ def dashboard():
 
     # 3. Filtering and Searching
     if query:
-        search_filter = or_(Employee.emp_id.contains(query), Employee.name.contains(query))
-        employees_query = employees_query.filter(search_filter)
+        search_filter = employee_search_filter(query)
+        if search_filter is not None:
+            employees_query = employees_query.filter(search_filter)
     
     if status_filter:
         if status_filter == 'Resigned_Or_Terminated':
@@ -61,25 +66,35 @@ def dashboard():
     if location_filter:
         employees_query = employees_query.filter_by(location=location_filter)
         
-    # 4. Sorting Logic
-    sort_order = { 
-        'Vacant': -1, 'Active': 0, 'On Leave': 1, 'Vacation': 2, 'Check-in': 3,
-        'Resigned': 4, 'Terminated': 5, 'Shifted-out': 98, 'Ex-Employee': 99 
-    }
-    employees = sorted(
-        employees_query.all(),
-        key=lambda item: (sort_order.get(item.status, 100), item.room or '', item.name or '')
+    # 4. Sorting + Pagination (ordering done in SQL, one page loaded at a time)
+    page = keyset_paginate(
+        employees_query, employee_sort_keys(),
+        page_size=page_size,
+        after=request.args.get('after'), before=request.args.get('before')
     )
 
+    # The unfiltered view lists the vacant beds first, as it did when they were Employee rows;
+    # they page on their own (?beds_after=/?beds_before=).
+    bed_page = None
+    if not status_filter and not query:
+        bed_page = find_vacant_beds(page_size, location=location_filter, cursor_prefix='beds_',
+                                    after=request.args.get('beds_after'), before=request.args.get('beds_before'))
+        bed_page.items = [bed_dict(bed) for bed in bed_page.items]
+    return _render_dashboard(summary, page, query, bed_page)
+
+
+def _render_dashboard(summary, page, query, bed_page=None):
     return render_template('dashboard.html', 
-                           total_employees=total_employees, 
-                           total_vacant_beds=total_vacant_beds, 
-                           total_on_vacation=total_on_vacation, 
-                           total_resigned_terminated=total_resigned_terminated,
-                           employees_without_room=employees_without_room,
-                           employees=employees, 
+                           total_employees=summary['total_employees'], 
+                           total_vacant_beds=summary['total_vacant_beds'], 
+                           total_on_vacation=summary['total_on_vacation'], 
+                           total_resigned_terminated=summary['total_resigned_terminated'],
+                           employees_without_room=summary['employees_without_room'],
+                           employees=page.items, 
+                           page=page,
+                           bed_page=bed_page,
                            query=query, 
-                           location_summary=location_summary)
+                           location_summary=summary['location_summary'])
 
 
 @dashboard_bp.route('/download/employees_without_room')
@@ -87,29 +102,31 @@ def dashboard():
 def download_employees_without_room():
     """Download a list of employees currently waiting for a room (Status: Check-in, Room: None)."""
     
-    employees_query = Employee.query.filter_by(status='Check-in', room=None)
-    
-    employees_df = pd.read_sql(employees_query.statement, db.engine, columns=[
-        'emp_id', 'name', 'designation', 'nationality', 'mobile_number', 'food_variety', 'meal_time', 'remarks'
-    ])
-    
-    buffer = io.BytesIO()
-    employees_df.to_excel(buffer, index=False, sheet_name='Employees Awaiting Check-in')
-    buffer.seek(0)
-    
-    return send_file(buffer, as_attachment=True, download_name='employees_awaiting_checkin.xlsx', mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    return export_response(
+        Employee.query.filter_by(status='Check-in', room=None).order_by(Employee.id),
+        [(column, getattr(Employee, column)) for column in [
+            'emp_id', 'name', 'designation', 'nationality', 'mobile_number', 'food_variety', 'meal_time', 'remarks'
+        ]],
+        filename='employees_awaiting_checkin.xlsx', sheet_name='Employees Awaiting Check-in'
+    )
 
 
 @dashboard_bp.route('/view/employees_without_room')
 @login_required
 def view_employees_without_room():
     """Displays only employees who are waiting for a room assignment."""
-    employees = Employee.query.filter_by(status='Check-in', room=None).all()
+    employees_query = Employee.query.filter_by(status='Check-in', room=None)
+    page = keyset_paginate(
+        employees_query, employee_sort_keys(),
+        page_size=get_page_size(current_app.config['DASHBOARD_PAGE_SIZE']),
+        after=request.args.get('after'), before=request.args.get('before')
+    )
     
     return render_template('dashboard.html', 
-                           employees=employees,
+                           employees=page.items,
+                           page=page,
                            query='',
                            total_employees=0, total_vacant_beds=0, 
                            total_on_vacation=0, total_resigned_terminated=0,
-                           employees_without_room=len(employees),
+                           employees_without_room=employees_query.count(),
                            location_summary=[])
\ No newline at end of file
@@ -1,26 +1,44 @@
 import os
-import io
-import pandas as pd
+import uuid
 from datetime import datetime
-from flask import render_template, request, redirect, url_for, flash, jsonify, send_file, current_app
+from flask import render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_required, current_user
+from werkzeug.utils import secure_filename
 from sqlalchemy import func
 from routes import inventory_bp
-from models import db, InventoryItem, InventoryTransaction, Employee 
+from models import db, InventoryItem, InventoryStock, InventoryTransaction, Employee, Room
+from services.export import export_response
+from services.pagination import keyset_paginate, get_page_size
+from services.jobs import submit_job, job_accepted
+from services.spreadsheet import is_spreadsheet
+from services.inventory_import import import_receipts_file
+from services.inventory_analytics import CONSUMPTION_PERIODS, CONSUMPTION_BREAKDOWNS, consumption_report, reorder_report
+from services.inventory import (StockError, RECIPIENT_STATUSES, MAX_BATCH_RECIPIENTS, record_incoming, record_outgoing,
+                                change_outgoing, remove_outgoing, ledger_drift, fix_ledger_drift, batch_recipients,
+                                record_outgoing_batch, record_transfer, stock_locations, default_location,
+                                transaction_history_query)
+from services.bulk_staff import BulkRequestError, parse_bulk_text, read_bulk_file
 
 # --- Inventory Routes ---
 @inventory_bp.route('/')
 @login_required
 def inventory_dashboard():
     items = InventoryItem.query.order_by(InventoryItem.name).all()
-    total_received_qty = db.session.query(func.sum(InventoryTransaction.quantity)).filter_by(type='Incoming').scalar() or 0
-    total_distributed_qty = db.session.query(func.sum(InventoryTransaction.quantity)).filter_by(type='Outgoing').scalar() or 0
-    current_stock = db.session.query(func.sum(InventoryItem.quantity)).scalar() or 0
+    # Per-item running totals (see services/inventory.py) instead of summing the whole ledger
+    total_received_qty = sum(item.received_total or 0 for item in items)
+    total_distributed_qty = sum(item.distributed_total or 0 for item in items)
+    current_stock = sum(item.quantity or 0 for item in items)
+    # Consumption rate, reorder point and projected stock-out date per item (services/inventory_analytics.py)
+    forecast = reorder_report()
+    reorder_count = sum(1 for row in forecast.values() if row['status'] != 'OK')
     return render_template('inventory_dashboard.html', 
                            items=items, 
                            total_received_qty=total_received_qty, 
                            total_distributed_qty=total_distributed_qty, 
-                           current_stock=current_stock)
+                           current_stock=current_stock,
+                           forecast=forecast,
+                           reorder_count=reorder_count,
+                           usage_window=current_app.config['INVENTORY_USAGE_WINDOW_DAYS'])
 
 @inventory_bp.route('/add', methods=['GET', 'POST'])
 @login_required
@@ -62,27 +80,47 @@ def incoming_inventory():
             
         item = db.session.get(InventoryItem, int(item_id))
         if item:
-            item.quantity += quantity
             file = request.files.get('attached_file')
-            filename = None
-            if file and file.filename:
-                filename = file.filename
+            filename = file.filename if file and file.filename else None
+            try:
+                record_incoming(item, quantity,
+                                supplier_name=request.form.get('supplier_name'),
+                                lpo_number=request.form.get('lpo_number'),
+                                file_path=filename,
+                                location=request.form.get('location'))
+            except StockError as e:
+                db.session.rollback()
+                flash(str(e), "danger")
+                return redirect(url_for('inventory.incoming_inventory'))
+            if filename:
                 file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], filename)) 
-            new_transaction = InventoryTransaction(
-                item_id=item.id, item_name=item.name, type='Incoming', quantity=quantity,
-                date=datetime.now().strftime('%Y-%m-%d'),
-                supplier_name=request.form.get('supplier_name'),
-                lpo_number=request.form.get('lpo_number'),
-                file_path=filename
-            )
-            db.session.add(new_transaction)
             db.session.commit()
             flash(f"{quantity} {item.name}(s) received successfully!", "success")
             return redirect(url_for('inventory.inventory_dashboard'))
         else:
             flash("Item not found.", "danger")
     items = InventoryItem.query.order_by(InventoryItem.name).all()
-    return render_template('incoming_inventory.html', items=items, today=datetime.now().strftime('%Y-%m-%d'))
+    return render_template('incoming_inventory.html', items=items, today=datetime.now().strftime('%Y-%m-%d'),
+                           locations=stock_locations())
+
+@inventory_bp.route('/incoming/upload', methods=['POST'])
+@login_required
+def upload_incoming_inventory():
+    """Records a whole delivery note (Item Name, Quantity, Supplier Name, LPO Number, Date) from a spreadsheet."""
+    # ENFORCEMENT: Requires INV_EDIT permission
+    if not current_user.can_access_feature('INV_EDIT'):
+        flash("Permission denied: You cannot record incoming stock.", 'danger')
+        return redirect(url_for('inventory.inventory_dashboard'))
+
+    file = request.files.get('file')
+    if file and is_spreadsheet(file.filename):
+        job = submit_job('inventory_receipts', file, import_receipts_file,
+                         dry_run=bool(request.form.get('dry_run')),
+                         create_items=bool(request.form.get('create_items')),
+                         location=request.form.get('location'))
+        return job_accepted(job)
+    flash('Invalid file format. Please upload an Excel or CSV file.', 'danger')
+    return redirect(url_for('inventory.incoming_inventory'))
 
 @inventory_bp.route('/outgoing', methods=['GET', 'POST'])
 @login_required
@@ -105,27 +143,133 @@ def outgoing_inventory():
         item = db.session.get(InventoryItem, int(item_id))
         if not employee:
             flash("Employee not found.", "danger")
-        elif not item or item.quantity < quantity:
+        elif not item:
             flash("Not enough stock for this item.", "danger")
         else:
-            item.quantity -= quantity
             file = request.files.get('attached_file')
-            filename = None
-            if file and file.filename:
-                filename = file.filename
+            filename = file.filename if file and file.filename else None
+            try:
+                # Checked and taken in one conditional UPDATE, so concurrent issues cannot oversell.
+                record_outgoing(item, quantity, emp_id=emp_id, room_number=employee.room, file_path=filename,
+                                location=request.form.get('location'))
+            except StockError as e:
+                db.session.rollback()
+                flash(str(e), "danger")
+                return redirect(url_for('inventory.outgoing_inventory'))
+            if filename:
                 file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], filename)) 
-            new_transaction = InventoryTransaction(
-                item_id=item.id, item_name=item.name, type='Outgoing', 
-                quantity=quantity, date=datetime.now().strftime('%Y-%m-%d'),
-                emp_id=emp_id, room_number=employee.room, file_path=filename
-            )
-            db.session.add(new_transaction)
             db.session.commit()
             flash(f"{quantity} {item.name}(s) distributed to {employee.name} successfully!", "success")
             return redirect(url_for('inventory.inventory_dashboard'))
-    active_employees = Employee.query.filter(Employee.status.in_(['Active', 'Vacation'])).all()
+    # Recipients are looked up as the user types (staff_mgmt.search_employees_json), not listed here
+    items = InventoryItem.query.filter(InventoryItem.quantity > 0).order_by(InventoryItem.name).all()
+    return render_template('outgoing_inventory.html', today=datetime.now().strftime('%Y-%m-%d'), items=items,
+                           recipient_statuses=RECIPIENT_STATUSES, locations=stock_locations())
+
+@inventory_bp.route('/outgoing/batch', methods=['GET', 'POST'])
+@login_required
+def batch_outgoing_inventory():
+    """Issues the same quantity of one item to everyone in a room, an accommodation or a list of EMP IDs."""
+    # ENFORCEMENT: Requires INV_EDIT permission
+    if not current_user.can_access_feature('INV_EDIT'):
+        flash("Permission denied: You cannot record outgoing stock.", 'danger')
+        return redirect(url_for('inventory.inventory_dashboard'))
+
+    wants_json = request.accept_mimetypes.best == 'application/json'
+    results = None
+    target = request.form.get('target', 'room')
+    if request.method == 'POST':
+        try:
+            try:
+                item = db.session.get(InventoryItem, int(request.form.get('item_id') or 0))
+            except (ValueError, TypeError):
+                item = None
+            if not item:
+                raise StockError('Item not found.')
+            try:
+                quantity = int(request.form.get('quantity'))
+            except (ValueError, TypeError):
+                raise StockError('Invalid quantity entered.')
+
+            emp_ids = None
+            if target == 'list':
+                file = request.files.get('file')
+                if file and file.filename:
+                    if not is_spreadsheet(file.filename):
+                        raise StockError('Invalid file format. Please upload an Excel or CSV file.')
+                    os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+                    path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"batch_{uuid.uuid4().hex}_{secure_filename(file.filename)}")
+                    file.save(path)
+                    try:
+                        emp_ids = [row['emp_id'] for row in read_bulk_file(path, 'checkout')]
+                    finally:
+                        os.remove(path)
+                else:
+                    emp_ids = [row['emp_id'] for row in parse_bulk_text(request.form.get('emp_ids', ''), 'checkout')]
+            room = request.form.get('room', '').strip() if target == 'room' else None
+            if target == 'room' and not room:
+                raise StockError('Enter a room number.')
+
+            employees, skipped = batch_recipients(accommodation=request.form.get('accommodation', '').strip(),
+                                                  room=room, emp_ids=emp_ids)
+            done = record_outgoing_batch(item, quantity, employees, location=request.form.get('location'))
+            db.session.commit()
+            results = done + skipped
+            if wants_json:
+                return jsonify({'item': item.name, 'issued': len(done), 'quantity': quantity * len(done),
+                                'skipped': len(skipped), 'results': results})
+            flash(f"{quantity * len(done)} {item.name}(s) issued to {len(done)} employee(s)"
+                  + (f"; {len(skipped)} skipped." if skipped else "."), 'success')
+        except (StockError, BulkRequestError) as e:
+            db.session.rollback()
+            if wants_json:
+                return jsonify({'error': str(e)}), 400
+            flash(str(e), 'danger')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error recording the distribution: {e}', 'danger')
+
+    items = InventoryItem.query.filter(InventoryItem.quantity > 0).order_by(InventoryItem.name).all()
+    accommodations = [name for (name,) in db.session.query(Room.accommodation_name).distinct().order_by(Room.accommodation_name)]
+    return render_template('batch_outgoing_inventory.html', items=items, accommodations=accommodations,
+                           target=target, results=results, max_recipients=MAX_BATCH_RECIPIENTS,
+                           locations=stock_locations())
+
+@inventory_bp.route('/transfer', methods=['GET', 'POST'])
+@login_required
+def transfer_inventory():
+    """Moves stock of an item from one location's store to another's."""
+    # ENFORCEMENT: Requires INV_EDIT permission
+    if not current_user.can_access_feature('INV_EDIT'):
+        flash("Permission denied: You cannot transfer stock.", 'danger')
+        return redirect(url_for('inventory.inventory_dashboard'))
+
+    if request.method == 'POST':
+        try:
+            item = db.session.get(InventoryItem, int(request.form.get('item_id') or 0))
+        except (ValueError, TypeError):
+            item = None
+        try:
+            quantity = int(request.form.get('quantity'))
+        except (ValueError, TypeError):
+            flash("Invalid quantity entered.", "danger")
+            return redirect(url_for('inventory.transfer_inventory'))
+        from_location = request.form.get('from_location', '').strip()
+        to_location = request.form.get('to_location', '').strip()
+        if not item:
+            flash("Item not found.", "danger")
+        else:
+            try:
+                record_transfer(item, quantity, from_location, to_location)
+                db.session.commit()
+                flash(f"{quantity} {item.name}(s) transferred from {from_location} to {to_location}.", "success")
+                return redirect(url_for('inventory.view_location_stock', location=to_location))
+            except StockError as e:
+                db.session.rollback()
+                flash(str(e), "danger")
+
     items = InventoryItem.query.filter(InventoryItem.quantity > 0).order_by(InventoryItem.name).all()
-    return render_template('outgoing_inventory.html', today=datetime.now().strftime('%Y-%m-%d'), employees=active_employees, items=items)
+    return render_template('transfer_inventory.html', items=items, locations=stock_locations())
 
 @inventory_bp.route('/transaction/edit/<int:transaction_id>', methods=['GET', 'POST'])
 @login_required
@@ -140,25 +284,17 @@ def edit_transaction(transaction_id):
         flash('Transaction not found or is not an outgoing type.', 'danger')
         return redirect(url_for('inventory.inventory_dashboard'))
 
-    original_quantity = transaction.quantity
-
     if request.method == 'POST':
         try:
             new_quantity = int(request.form.get('quantity'))
-            if new_quantity <= 0:
-                flash('Quantity must be a positive number.', 'danger')
-            else:
-                # Adjust stock
-                difference = new_quantity - original_quantity
-                transaction.item.quantity -= difference
-                
-                # Update transaction details
-                transaction.quantity = new_quantity
-                transaction.date = request.form.get('date')
-                
-                db.session.commit()
-                flash('Transaction updated successfully.', 'success')
-                return redirect(url_for('inventory.inventory_transactions', transaction_type='Outgoing'))
+            # Moves only the difference in stock, and only if that much is still on hand
+            change_outgoing(transaction, new_quantity, request.form.get('date'))
+            db.session.commit()
+            flash('Transaction updated successfully.', 'success')
+            return redirect(url_for('inventory.inventory_transactions', transaction_type='Outgoing'))
+        except StockError as e:
+            db.session.rollback()
+            flash(str(e), 'danger')
         except Exception as e:
             db.session.rollback()
             flash(f'Error updating transaction: {e}', 'danger')
@@ -180,17 +316,76 @@ def delete_transaction(transaction_id):
     
     try:
         # Restore the stock quantity
-        transaction.item.quantity += transaction.quantity
-        
-        db.session.delete(transaction)
+        remove_outgoing(transaction)
         db.session.commit()
         flash('Transaction deleted and stock restored successfully.', 'success')
+    except StockError as e:
+        db.session.rollback()
+        flash(str(e), 'danger')
     except Exception as e:
         db.session.rollback()
         flash(f'Error deleting transaction: {e}', 'danger')
     
     return redirect(url_for('inventory.inventory_transactions', transaction_type='Outgoing'))
 
+@inventory_bp.route('/reconcile', methods=['GET', 'POST'])
+@login_required
+def reconcile_inventory():
+    """Stock and running totals checked against the transaction ledger; POST corrects the drift."""
+    wants_json = request.accept_mimetypes.best == 'application/json'
+    if not current_user.is_admin():
+        if wants_json:
+            return jsonify({'error': 'Permission denied.'}), 403
+        flash("Permission denied: Only admins can reconcile inventory.", 'danger')
+        return redirect(url_for('inventory.inventory_dashboard'))
+
+    report = ledger_drift()
+    fixed = None
+    if request.method == 'POST' and report:
+        fixed = fix_ledger_drift(report)
+        db.session.commit()
+        report = ledger_drift()
+        if not wants_json:
+            flash(f"{fixed} item(s) set to their ledger balance.", 'success')
+            return redirect(url_for('inventory.reconcile_inventory'))
+    if wants_json:
+        return jsonify({'drift': report, 'fixed': fixed})
+    return render_template('inventory_reconcile.html', report=report)
+
+
+@inventory_bp.route('/consumption')
+@login_required
+def inventory_consumption():
+    """Units issued per item and day/week/month, optionally per location and room
+    (?period=&by=location&by=room&item_id=&location=&room=&date_from=&date_to=)."""
+    wants_json = request.accept_mimetypes.best == 'application/json'
+    if not current_user.can_access_feature('INV_VIEW'):
+        if wants_json:
+            return jsonify({'error': 'Permission denied.'}), 403
+        flash("Permission denied: You cannot view inventory consumption.", 'danger')
+        return redirect(url_for('inventory.inventory_dashboard'))
+
+    period = request.args.get('period', 'month')
+    if period not in CONSUMPTION_PERIODS:
+        period = 'month'
+    breakdown = [name for name in request.args.getlist('by') if name in CONSUMPTION_BREAKDOWNS]
+    filters = {name: request.args.get(name, '').strip() or None
+               for name in ('location', 'room', 'date_from', 'date_to')}
+    item_id = request.args.get('item_id', '')
+    filters['item_id'] = int(item_id) if item_id.isdigit() else None
+    rows = consumption_report(period, breakdown, **filters)
+    if wants_json:
+        return jsonify({'period': period, 'by': breakdown, 'consumption': rows})
+    return render_template('inventory_consumption.html',
+                           rows=rows,
+                           period=period,
+                           periods=list(CONSUMPTION_PERIODS),
+                           breakdown=breakdown,
+                           breakdowns=list(CONSUMPTION_BREAKDOWNS),
+                           filters=filters,
+                           items=InventoryItem.query.order_by(InventoryItem.name).all(),
+                           locations=stock_locations())
+
 
 # --- NEW DEDICATED VIEW ROUTES ---
 
@@ -205,6 +400,24 @@ def view_total_stock():
     items = InventoryItem.query.order_by(InventoryItem.name).all()
     return render_template('inventory_total_stock.html', items=items, title="Current Stock List")
 
+@inventory_bp.route('/view/locations')
+@login_required
+def view_location_stock():
+    """Stock held at one location (?location=, the default store otherwise), read from the
+    per-location balances rather than the ledger."""
+    # ENFORCEMENT: Requires INV_VIEW or INV_EDIT permission
+    if not current_user.can_access_feature('INV_VIEW'):
+        flash("Permission denied: You cannot view total stock records.", 'danger')
+        return redirect(url_for('inventory.inventory_dashboard'))
+
+    location = request.args.get('location', '').strip() or default_location()
+    balances = db.session.query(InventoryItem.name, InventoryStock.quantity).join(InventoryStock.item).filter(
+        InventoryStock.location == location, InventoryStock.quantity != 0).order_by(InventoryItem.name).all()
+    totals = dict(db.session.query(InventoryStock.location, func.sum(InventoryStock.quantity))
+                  .group_by(InventoryStock.location).all())
+    return render_template('inventory_location_stock.html', location=location, balances=balances,
+                           locations=stock_locations(), totals=totals)
+
 @inventory_bp.route('/view/received')
 @login_required
 def view_received():
@@ -212,13 +425,7 @@ def view_received():
     if not current_user.can_access_feature('INV_VIEW'):
         flash("Permission denied: You cannot view received stock records.", 'danger')
         return redirect(url_for('inventory.inventory_dashboard'))
-    
-    transactions = InventoryTransaction.query.filter_by(type='Incoming').order_by(InventoryTransaction.date.desc()).all()
-    return render_template('inventory_transactions.html', 
-                           transactions=transactions, 
-                           transaction_type="Incoming", 
-                           title="Total Received Stock History",
-                           can_download=current_user.can_access_feature('INV_VIEW'))
+    return _render_history('Incoming', title="Total Received Stock History")
 
 @inventory_bp.route('/view/distributed')
 @login_required
@@ -227,12 +434,39 @@ def view_distributed():
     if not current_user.can_access_feature('INV_VIEW'):
         flash("Permission denied: You cannot view distributed stock records.", 'danger')
         return redirect(url_for('inventory.inventory_dashboard'))
-        
-    transactions = InventoryTransaction.query.filter_by(type='Outgoing').order_by(InventoryTransaction.date.desc()).all()
-    return render_template('inventory_transactions.html', 
-                           transactions=transactions, 
-                           transaction_type="Outgoing", 
-                           title="Total Distributed Stock History",
+    return _render_history('Outgoing', title="Total Distributed Stock History")
+
+
+def _history_filters():
+    """The history filters given in the query string (?date_from=&date_to=&item_id=&supplier=&emp_id=&location=)."""
+    filters = {name: request.args.get(name, '').strip() or None
+               for name in ('date_from', 'date_to', 'supplier', 'emp_id', 'location')}
+    item_id = request.args.get('item_id', '')
+    filters['item_id'] = int(item_id) if item_id.isdigit() else None
+    return filters
+
+
+def _render_history(transaction_type, title=None):
+    """One page of a transaction history, newest first, filtered and keyset-paginated in SQL."""
+    filters = _history_filters()
+    page = keyset_paginate(
+        transaction_history_query(transaction_type, **filters),
+        # Served by ix_inventory_transaction_type_date (id rides along as the rowid); dates are never
+        # NULL (flask upgrade-db backfills old rows), so the row-value seek sees every row.
+        [InventoryTransaction.date, InventoryTransaction.id],
+        page_size=get_page_size(current_app.config['INVENTORY_HISTORY_PAGE_SIZE']),
+        after=request.args.get('after'), before=request.args.get('before'), descending=True
+    )
+    return render_template('inventory_transactions.html',
+                           transactions=page.items,
+                           page=page,
+                           transaction_type=transaction_type,
+                           title=title,
+                           filters=filters,
+                           filter_args={name: value for name, value in request.args.items()
+                                        if name in filters and value.strip()},
+                           items=InventoryItem.query.order_by(InventoryItem.name).all(),
+                           locations=stock_locations(),
                            can_download=current_user.can_access_feature('INV_VIEW'))
 
 
@@ -246,22 +480,10 @@ def download_total_stock():
         flash("Permission denied: You cannot download inventory reports.", 'danger')
         return redirect(url_for('inventory.inventory_dashboard'))
 
-    items = InventoryItem.query.order_by(InventoryItem.name).all()
-    data = [{
-        'Item Name': item.name,
-        'Quantity in Stock': item.quantity
-    } for item in items]
-    
-    df = pd.DataFrame(data)
-    buffer = io.BytesIO()
-    df.to_excel(buffer, index=False, sheet_name='Current Stock List')
-    buffer.seek(0)
-    
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name='current_stock_list.xlsx',
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return export_response(
+        InventoryItem.query.order_by(InventoryItem.name),
+        [('Item Name', InventoryItem.name), ('Quantity in Stock', InventoryItem.quantity)],
+        filename='current_stock_list.xlsx', sheet_name='Current Stock List'
     )
 
 
@@ -273,22 +495,12 @@ def download_incoming_history():
         flash("Permission denied: You cannot download incoming reports.", 'danger')
         return redirect(url_for('inventory.inventory_dashboard'))
 
-    transactions = InventoryTransaction.query.filter_by(type='Incoming').order_by(InventoryTransaction.date.desc()).all()
-    data = [{
-        'Date': tx.date, 'Item Name': tx.item_name, 'Quantity': tx.quantity,
-        'Supplier': tx.supplier_name, 'LPO Number': tx.lpo_number
-    } for tx in transactions]
-    
-    df = pd.DataFrame(data)
-    buffer = io.BytesIO()
-    df.to_excel(buffer, index=False, sheet_name='Incoming Stock History')
-    buffer.seek(0)
-    
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name='incoming_stock_history.xlsx',
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return export_response(
+        transaction_history_query('Incoming', **_history_filters()).order_by(InventoryTransaction.date.desc(), InventoryTransaction.id.desc()),
+        [('Date', InventoryTransaction.date), ('Item Name', InventoryTransaction.item_name),
+         ('Quantity', InventoryTransaction.quantity), ('Supplier', InventoryTransaction.supplier_name),
+         ('LPO Number', InventoryTransaction.lpo_number), ('Location', InventoryTransaction.location)],
+        filename='incoming_stock_history.xlsx', sheet_name='Incoming Stock History'
     )
 
 @inventory_bp.route('/download/outgoing')
@@ -299,32 +511,15 @@ def download_outgoing_history():
         flash("Permission denied: You cannot download distribution reports.", 'danger')
         return redirect(url_for('inventory.inventory_dashboard'))
 
-    transactions = InventoryTransaction.query.filter_by(type='Outgoing').order_by(InventoryTransaction.date.desc()).all()
-    data = [{
-        'Date': tx.date, 'Item Name': tx.item_name, 'Quantity': tx.quantity,
-        'Employee ID': tx.emp_id, 'Room Number': tx.room_number
-    } for tx in transactions]
-    
-    df = pd.DataFrame(data)
-    buffer = io.BytesIO()
-    df.to_excel(buffer, index=False, sheet_name='Outgoing Stock History')
-    buffer.seek(0)
-    
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name='outgoing_stock_history.xlsx',
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return export_response(
+        transaction_history_query('Outgoing', **_history_filters()).order_by(InventoryTransaction.date.desc(), InventoryTransaction.id.desc()),
+        [('Date', InventoryTransaction.date), ('Item Name', InventoryTransaction.item_name),
+         ('Quantity', InventoryTransaction.quantity), ('Employee ID', InventoryTransaction.emp_id),
+         ('Room Number', InventoryTransaction.room_number), ('Location', InventoryTransaction.location)],
+        filename='outgoing_stock_history.xlsx', sheet_name='Outgoing Stock History'
     )
 
 @inventory_bp.route('/transactions/<string:transaction_type>')
 @login_required
 def inventory_transactions(transaction_type):
-    transactions = InventoryTransaction.query.filter_by(type=transaction_type.title()).order_by(InventoryTransaction.date.desc()).all()
-    
-    can_download = current_user.can_access_feature('INV_VIEW')
-    
-    return render_template('inventory_transactions.html', 
-                           transactions=transactions, 
-                           transaction_type=transaction_type.title(),
-                           can_download=can_download)
\ No newline at end of file
+    return _render_history(transaction_type.title())
\ No newline at end of file
@@ -0,0 +1,40 @@
+from flask import render_template, redirect, url_for, flash, jsonify
+from flask_login import login_required, current_user
+from routes import jobs_bp
+from models import db, ImportJob
+from services.jobs import job_status
+
+# Where the status page sends the user once a job of each kind has finished
+JOB_RETURN_ENDPOINTS = {
+    'staff': ('dashboard_bp.dashboard', 'Dashboard'),
+    'maintenance': ('maintenance.maintenance_report', 'Maintenance Report'),
+    'amcs': ('amcs.amcs_dashboard', 'AMCs Services'),
+    'inventory_receipts': ('inventory.inventory_dashboard', 'Inventory Dashboard'),
+}
+
+def get_visible_job(job_id):
+    """Returns the job if the current user started it (or is an admin), else None."""
+    job = db.session.get(ImportJob, job_id)
+    if job and (job.created_by == current_user.id or current_user.is_admin()):
+        return job
+    return None
+
+@jobs_bp.route('/<string:job_id>')
+@login_required
+def job_detail(job_id):
+    """JSON progress of an upload job: status, row counts, errors and the final summary."""
+    job = get_visible_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_status(job))
+
+@jobs_bp.route('/<string:job_id>/view')
+@login_required
+def job_page(job_id):
+    job = get_visible_job(job_id)
+    if not job:
+        flash('Upload job not found.', 'danger')
+        return redirect(url_for('dashboard_bp.dashboard'))
+    return_endpoint, return_label = JOB_RETURN_ENDPOINTS.get(job.kind, ('dashboard_bp.dashboard', 'Dashboard'))
+    return render_template('job_status.html', job=job_status(job),
+                           return_url=url_for(return_endpoint), return_label=return_label)
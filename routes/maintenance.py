@@ -1,11 +1,26 @@
 import os
-import io
-import pandas as pd
 from datetime import datetime
-from flask import render_template, request, redirect, url_for, flash, send_file, current_app
+from flask import render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
 from routes import maintenance_bp
 from models import db, MaintenanceReport
+from services.export import export_response
+from services.jobs import submit_job, job_accepted
+from services.spreadsheet import is_spreadsheet
+from services.maintenance_import import import_maintenance_file
+
+# Columns of the maintenance Excel/CSV downloads
+MAINTENANCE_EXPORT_COLUMNS = [
+    ('Block', MaintenanceReport.block),
+    ('Section', MaintenanceReport.section),
+    ('Report Date', MaintenanceReport.report_date),
+    ('Closed Date', MaintenanceReport.closed_date),
+    ('Details', MaintenanceReport.details),
+    ('Status', MaintenanceReport.status),
+    ('Concern', MaintenanceReport.concern),
+    ('Risk Level', MaintenanceReport.risk),
+    ('Remarks', MaintenanceReport.remarks),
+]
 
 # --- Maintenance Routes ---
 @maintenance_bp.route('/', methods=['GET', 'POST'])
@@ -20,27 +35,9 @@ def maintenance_report():
         # --- File Upload Logic from the bottom form in maintenance_report.html ---
         if 'file' in request.files and request.files['file'].filename != '':
             file = request.files['file']
-            if file and file.filename.endswith(('.xlsx', '.xls', '.csv')):
-                try:
-                    read_method = pd.read_excel if file.filename.endswith(('.xlsx', '.xls')) else pd.read_csv
-                    df = read_method(file, dtype=str).fillna('N/A')
-                    for _, row in df.iterrows():
-                        new_report = MaintenanceReport(
-                            block=row.get('Block', 'N/A'),
-                            section=row.get('Section', 'N/A'),
-                            report_date=row.get('Report Date', datetime.now().strftime('%Y-%m-%d')),
-                            details=row.get('Details', 'N/A'),
-                            status=row.get('Status', 'Open'),
-                            concern=row.get('Concern', 'N/A'),
-                            risk=row.get('Risk', 'Low'),
-                            remarks=row.get('Remarks', 'N/A')
-                        )
-                        db.session.add(new_report)
-                    db.session.commit()
-                    flash('Maintenance reports uploaded successfully!', 'success')
-                except Exception as e:
-                    db.session.rollback()
-                    flash(f'File upload failed: {e}', 'danger')
+            if file and is_spreadsheet(file.filename):
+                job = submit_job('maintenance', file, import_maintenance_file, dry_run=bool(request.form.get('dry_run')))
+                return job_accepted(job)
             else:
                 flash('Invalid file format. Please upload an Excel or CSV file.', 'danger')
         return redirect(url_for('maintenance.maintenance_report'))
@@ -101,30 +98,10 @@ def download_filtered_report(status_filter):
     else:
         filename = 'all_maintenance_reports.xlsx'
     
-    reports = reports_query.order_by(MaintenanceReport.report_date.desc()).all()
-    
-    data = [{
-        'Block': r.block,
-        'Section': r.section,
-        'Report Date': r.report_date,
-        'Closed Date': r.closed_date, 
-        'Details': r.details,
-        'Status': r.status,
-        'Concern': r.concern,
-        'Risk Level': r.risk,
-        'Remarks': r.remarks
-    } for r in reports]
-    df = pd.DataFrame(data)
-    
-    buffer = io.BytesIO()
-    df.to_excel(buffer, index=False, sheet_name=status_filter.title() + ' Reports')
-    buffer.seek(0)
-    
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name=filename,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return export_response(
+        reports_query.order_by(MaintenanceReport.report_date.desc()),
+        MAINTENANCE_EXPORT_COLUMNS,
+        filename=filename, sheet_name=status_filter.title() + ' Reports'
     )
 
 
@@ -132,29 +109,10 @@ def download_filtered_report(status_filter):
 @login_required
 def download_maintenance_report():
     # This route downloads ALL reports (reused for convenience)
-    reports = MaintenanceReport.query.order_by(MaintenanceReport.report_date.desc()).all()
-    data = [{
-        'Block': r.block,
-        'Section': r.section,
-        'Report Date': r.report_date,
-        'Closed Date': r.closed_date, 
-        'Details': r.details,
-        'Status': r.status,
-        'Concern': r.concern,
-        'Risk Level': r.risk,
-        'Remarks': r.remarks
-    } for r in reports]
-    df = pd.DataFrame(data)
-    
-    buffer = io.BytesIO()
-    df.to_excel(buffer, index=False, sheet_name='Maintenance Reports')
-    buffer.seek(0)
-    
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name='maintenance_report.xlsx',
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return export_response(
+        MaintenanceReport.query.order_by(MaintenanceReport.report_date.desc()),
+        MAINTENANCE_EXPORT_COLUMNS,
+        filename='maintenance_report.xlsx', sheet_name='Maintenance Reports'
     )
 
 @maintenance_bp.route('/add', methods=['GET', 'POST'])
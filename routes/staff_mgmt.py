@@ -1,35 +1,35 @@
 import os
-import io
-import pandas as pd
+import uuid
 from datetime import datetime
-from flask import render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import render_template, request, redirect, url_for, flash, jsonify, current_app
+from werkzeug.utils import secure_filename
 from flask_login import login_required, current_user
 from sqlalchemy import func, or_
 from routes import staff_mgmt_bp
-from models import db, Employee, Camp, AppUser 
+from models import db, Employee, Camp, AppUser, Room, Bed
 from config import Config
-
-# Define required column names
-REQUIRED_COLUMNS = ['ACCOMMODATION_NAME', 'ROOM', 'EMP_ID', 'STATUS', 'NAME', 'LOCATION']
+from services.search import search_employees
+from services.export import export_response
+from services.staff_import import import_staff_file, SYNC_MODES
+from services.jobs import submit_job, job_accepted
+from services.spreadsheet import is_spreadsheet
+from services.bulk_staff import (run_bulk_action, parse_bulk_text, read_bulk_file, BulkRequestError,
+                                 BULK_ACTIONS, MAX_BULK_EMPLOYEES)
+from services.assignment import plan_assignments, commit_assignments
+from services.occupancy import get_accommodation_rollup, EMPTY_ROLLUP
+from services.beds import (add_vacant_beds, remove_vacant_beds, parse_room_spec, find_vacant_beds, bed_dict,
+                           get_vacant_bed, assign_bed, release_bed, vacant_beds_export, MAX_BEDS_PER_ROOM)
 
 # --- Helper Functions ---
-def get_vacant_beds_list():
-    """Fetches list of vacant beds for assignment dropdowns."""
-    vacant_beds_query = Employee.query.filter_by(status='Vacant').order_by(Employee.accommodation_name, Employee.room).all()
-    return [{'id': bed.id, 'accommodation_name': bed.accommodation_name, 'room': bed.room, 'emp_id': bed.emp_id} for bed in vacant_beds_query]
-
 def get_locations_list():
     """Fetches list of general Location names from the Camp table (where location is defined)."""
     locations_query = db.session.query(Camp.location).filter(Camp.location.isnot(None)).distinct().order_by(Camp.location).all()
     return [loc[0] for loc in locations_query if loc[0]]
 
 def get_accommodations_list():
-    """FIX: Fetches unique Accommodation names from the Camp table (master list heuristic)."""
-    # Use the heuristic that an Accommodation master record is any Camp record whose name 
-    # exists in the Employee table, ensuring flexibility from Excel uploads.
-    accommodation_names = db.session.query(Employee.accommodation_name).distinct().all()
-    names = [name[0] for name in accommodation_names if name[0] is not None]
-    return names
+    """Fetches the names of the accommodations that have rooms (read from the Room key index)."""
+    accommodation_names = db.session.query(Room.accommodation_name).distinct().order_by(Room.accommodation_name).all()
+    return [name[0] for name in accommodation_names]
 
 
 # --- Staff Management Routes (omitted for brevity) ---
@@ -40,80 +40,12 @@ def add_staff():
         # --- 1. Excel Upload Logic ---
         if 'file' in request.files and request.files['file'].filename != '':
             file = request.files['file']
-            if file and file.filename.endswith(('.xlsx', '.xls', '.csv')):
-                try:
-                    read_method = pd.read_excel if file.filename.endswith(('.xlsx', '.xls')) else pd.read_csv
-                    df = read_method(file, dtype=str) 
-                    
-                    df.columns = [str(col).strip().upper().replace(' ', '_').replace('#', 'NUMBER') for col in df.columns]
-                    df.fillna('N/A', inplace=True)
-                    
-                    missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
-                    if missing_cols:
-                        raise KeyError(f"Missing required columns: {', '.join(missing_cols)}")
-                    
-                    accommodations_in_file = df['ACCOMMODATION_NAME'].unique().tolist()
-                    if accommodations_in_file:
-                        Employee.query.filter(Employee.accommodation_name.in_(accommodations_in_file)).delete(synchronize_session=False)
-                    
-                    processed_emp_ids = set()
-                    duplicates_found = []
-                    vacant_counters = {}
-
-                    for _, row in df.iterrows():
-                        status = row.get('STATUS', 'N/A')
-                        emp_id = str(row.get('EMP_ID', 'N/A'))
-                        accommodation_name_raw = row.get('ACCOMMODATION_NAME', 'N/A')
-                        room_number = str(row.get('ROOM', 'N/A'))
-                        
-                        accommodation_name = accommodation_name_raw.strip() if accommodation_name_raw else 'N/A'
-
-                        if accommodation_name == 'N/A' or room_number == 'N/A': continue
-                        if accommodation_name not in accommodations_in_file: continue
-                        
-                        if status.lower() != 'vacant' and emp_id != 'N/A' and emp_id:
-                            if emp_id in processed_emp_ids:
-                                duplicates_found.append(emp_id)
-                                continue 
-                            processed_emp_ids.add(emp_id)
-                        
-                        # CRITICAL FIX 1: Ensure Camp record is created/updated for the Accommodation Name
-                        # This must be done to allow management, regardless of the Location field
-                        existing_camp = Camp.query.filter_by(name=accommodation_name).first()
-                        if not existing_camp:
-                            # If Location column exists in Excel, use it for the Camp record location
-                            location_from_excel = row.get('LOCATION', None) if row.get('LOCATION', 'N/A') != 'N/A' else None 
-                            new_camp = Camp(name=accommodation_name, location=location_from_excel) 
-                            db.session.add(new_camp)
-                        
-                        if status.lower() == 'vacant':
-                            vacant_counters.setdefault(room_number, 0)
-                            vacant_counters[room_number] += 1
-                            emp_id = f"{room_number}-Vacant-{vacant_counters[room_number]}"
-                            
-                        bed = Employee(
-                            accommodation_name=accommodation_name, room=room_number,
-                            status=status, emp_id=emp_id, name=row.get('NAME', '-'),
-                            designation=row.get('DESIGNATION', '-'), nationality=row.get('NATIONALITY', '-'),
-                            mobile_number=str(row.get('MOBILE_NUMBER', '-')), food_variety=row.get('FOOD_VARIETY', '-'),
-                            meal_time=row.get('MEAL_TIME', '-'), location=row.get('LOCATION', 'N/A'),
-                            remarks=row.get('REMARKS', '')
-                        )
-                        db.session.add(bed)
-
-                    db.session.commit()
-                    
-                    if duplicates_found:
-                        flash(f"File uploaded, but skipped duplicate EMP IDs: {', '.join(set(duplicates_found))}", "warning")
-                    else:
-                        flash('File uploaded and data synchronized successfully!', 'success')
-
-                except KeyError as e:
-                    db.session.rollback()
-                    flash(f"Upload failed. A required column is missing from your file: {e}. Please check the Excel template.", "danger")
-                except Exception as e:
-                    db.session.rollback()
-                    flash(f'File upload failed due to a processing error: {e}', 'danger')
+            if file and is_spreadsheet(file.filename):
+                # Parsing and committing run on the background job pool; the user is sent
+                # to the job status page (or API clients get the job ID straight away).
+                job = submit_job('staff', file, import_staff_file, sync_mode=request.form.get('sync_mode', 'incremental'),
+                                 dry_run=bool(request.form.get('dry_run')))
+                return job_accepted(job)
             else:
                 flash('Invalid file format. Please upload an Excel or CSV file.', 'danger')
         
@@ -136,22 +68,24 @@ def add_staff():
                     flash('Staff data entered successfully and employee is awaiting room assignment!', 'success')
                 
                 else:
-                    vacant_bed = db.session.get(Employee, int(vacant_bed_id))
+                    vacant_bed = get_vacant_bed(vacant_bed_id)
                     
-                    if not vacant_bed or vacant_bed.status != 'Vacant':
+                    if not vacant_bed:
                         flash('Selected bed is not available or not vacant.', 'danger')
                         return redirect(url_for('staff_mgmt.add_staff'))
 
-                    vacant_bed.emp_id = emp_id_to_assign
-                    vacant_bed.name = request.form.get('name')
-                    vacant_bed.designation = request.form.get('designation')
-                    vacant_bed.nationality = request.form.get('nationality')
-                    vacant_bed.mobile_number = request.form.get('mobile_number')
-                    vacant_bed.status = 'Active'
-                    vacant_bed.location = request.form.get('location')
-                    vacant_bed.food_variety = request.form.get('food_variety')
-                    vacant_bed.meal_time = request.form.get('meal_time')
-                    vacant_bed.remarks = request.form.get('remarks')
+                    new_employee = Employee(
+                        emp_id=emp_id_to_assign, name=request.form.get('name'),
+                        designation=request.form.get('designation'), nationality=request.form.get('nationality'),
+                        mobile_number=request.form.get('mobile_number'), food_variety=request.form.get('food_variety'),
+                        meal_time=request.form.get('meal_time'), location=request.form.get('location'),
+                        remarks=request.form.get('remarks'), status='Active'
+                    )
+                    db.session.add(new_employee)
+                    if not assign_bed(new_employee, vacant_bed):
+                        db.session.rollback()
+                        flash('That bed was just taken by someone else; please choose another.', 'danger')
+                        return redirect(url_for('staff_mgmt.add_staff'))
                     
                     flash('Employee assigned to bed successfully!', 'success')
                 
@@ -164,11 +98,11 @@ def add_staff():
     # --- GET Request Logic ---
     return render_template('add_staff.html', 
                            accommodations=get_accommodations_list(), 
-                           vacant_beds=get_vacant_beds_list(),
                            locations=get_locations_list(),
                            nationalities=Config.NATIONALITIES,
                            food_varieties=Config.FOOD_VARIETIES, 
-                           meal_times=Config.MEAL_TIMES)
+                           meal_times=Config.MEAL_TIMES,
+                           sync_modes=SYNC_MODES)
 
 
 @staff_mgmt_bp.route('/edit_employee/<string:emp_id>', methods=['GET', 'POST'])
@@ -187,11 +121,7 @@ def edit_employee(emp_id):
         try:
             # ... (All POST logic for Checkout, Shift-out, Bed Shift, EMP ID Update, and Regular Update remains correctly structured) ...
             if 'checkout_btn' in request.form or 'shiftout_btn' in request.form:
-                original_room = employee.room
-                original_acc = employee.accommodation_name
-                original_loc = employee.location
-                
-                is_vacating_room = original_room is not None
+                is_vacating_room = employee.room is not None
 
                 if 'checkout_btn' in request.form:
                     employee.status = 'Ex-Employee'
@@ -203,20 +133,10 @@ def edit_employee(emp_id):
                     msg = 'Employee successfully Shifted Out and placed in Awaiting Room status.'
                 
                 if is_vacating_room:
+                    release_bed(employee)
                     employee.room = None
                     employee.accommodation_name = None
                     employee.location = None
-                    
-                    vacant_count = Employee.query.filter(Employee.room == original_room, Employee.status == 'Vacant').count()
-                    new_vacant_id = f"{original_room}-Vacant-{vacant_count + 1}"
-                    
-                    vacant_bed = Employee(
-                        emp_id=new_vacant_id, status='Vacant', name='-',
-                        accommodation_name=original_acc, room=original_room,
-                        location=original_loc, designation='-', nationality='-',
-                        mobile_number='-', food_variety='-', meal_time='-', remarks='Bedspace'
-                    )
-                    db.session.add(vacant_bed)
                 
                 db.session.commit()
                 flash(msg, 'success')
@@ -229,23 +149,14 @@ def edit_employee(emp_id):
                     flash('Please select a new vacant bed for the shift.', 'danger')
                     return redirect(url_for('staff_mgmt.edit_employee', emp_id=emp_id))
 
-                new_bed = db.session.get(Employee, int(new_vacant_bed_id))
-                if new_bed and new_bed.status == 'Vacant':
-                    
-                    old_vacant_id = f"{employee.room}-Vacant-{Employee.query.filter_by(room=employee.room, status='Vacant').count() + 1}"
-                    old_bed_as_vacant = Employee(
-                        emp_id=old_vacant_id, status='Vacant', name='-',
-                        accommodation_name=employee.accommodation_name, room=employee.room,
-                        location=employee.location, designation='-', nationality='-',
-                        mobile_number='-', food_variety='-', meal_time='-', remarks='Bedspace'
-                    )
-                    db.session.add(old_bed_as_vacant)
-                    
-                    employee.accommodation_name = new_bed.accommodation_name
-                    employee.room = new_bed.room
-                    employee.location = new_bed.location
-                    
-                    db.session.delete(new_bed) 
+                new_bed = get_vacant_bed(new_vacant_bed_id)
+                if new_bed:
+                    release_bed(employee)
+                    if not assign_bed(employee, new_bed):
+                        db.session.rollback()
+                        flash('That bed was just taken by someone else; please choose another.', 'danger')
+                        return redirect(url_for('staff_mgmt.edit_employee', emp_id=emp_id))
+                    employee.location = new_bed.room.location or employee.location
                     
                     db.session.commit()
                     flash('Employee successfully shifted to the new bed!', 'success')
@@ -257,22 +168,13 @@ def edit_employee(emp_id):
             elif 'checkin_btn' in request.form:
                 new_vacant_bed_id = request.form.get('vacant_bed_id')
                 if new_vacant_bed_id:
-                    new_bed = db.session.get(Employee, int(new_vacant_bed_id))
-                    if new_bed and new_bed.status == 'Vacant':
-                        
-                        db.session.delete(employee)
-                        db.session.flush() 
-                        
-                        new_bed.emp_id = employee.emp_id
-                        new_bed.name = employee.name
-                        new_bed.designation = employee.designation
-                        new_bed.nationality = employee.nationality
-                        new_bed.mobile_number = employee.mobile_number
-                        new_bed.status = 'Active' 
-                        new_bed.location = employee.location
-                        new_bed.food_variety = employee.food_variety
-                        new_bed.meal_time = employee.meal_time
-                        new_bed.remarks = employee.remarks
+                    new_bed = get_vacant_bed(new_vacant_bed_id)
+                    if new_bed:
+                        if not assign_bed(employee, new_bed):
+                            db.session.rollback()
+                            flash('That bed was just taken by someone else; please choose another.', 'danger')
+                            return redirect(url_for('staff_mgmt.edit_employee', emp_id=emp_id))
+                        employee.status = 'Active'
                         
                         db.session.commit()
                         flash('Employee successfully Checked-in and assigned to a bed!', 'success')
@@ -320,13 +222,82 @@ def edit_employee(emp_id):
 
     # --- GET Request Logic ---
     return render_template('edit_employee.html', 
-        employee=employee, is_vacant_record=employee.status == 'Vacant', is_awaiting_checkin=employee.status == 'Check-in' and employee.room is None,
+        employee=employee, is_awaiting_checkin=employee.status == 'Check-in' and employee.room is None,
         nationalities=Config.NATIONALITIES, food_varieties=Config.FOOD_VARIETIES,
         meal_times=Config.MEAL_TIMES, statuses=Config.EMPLOYEE_STATUSES,
         accommodations=get_accommodations_list(), 
-        vacant_beds=get_vacant_beds_list(),
         locations=get_locations_list())
 
+@staff_mgmt_bp.route('/staff/bulk', methods=['GET', 'POST'])
+@login_required
+def bulk_staff_action():
+    """Check-out, shift-out or re-assignment of many employees at once, from a typed or uploaded list."""
+    results = None
+    action = request.form.get('action', 'checkout')
+    if request.method == 'POST':
+        try:
+            file = request.files.get('file')
+            if file and file.filename:
+                if not is_spreadsheet(file.filename):
+                    raise BulkRequestError('Invalid file format. Please upload an Excel or CSV file.')
+                os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+                path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"bulk_{uuid.uuid4().hex}_{secure_filename(file.filename)}")
+                file.save(path)
+                try:
+                    requests = read_bulk_file(path, action)
+                finally:
+                    os.remove(path)
+            else:
+                requests = parse_bulk_text(request.form.get('emp_ids', ''), action)
+            results = run_bulk_action(action, requests, can_edit=current_user.can_edit_location)
+        except BulkRequestError as e:
+            if request.accept_mimetypes.best == 'application/json':
+                return jsonify({'error': str(e)}), 400
+            flash(str(e), 'danger')
+        except Exception as e:
+            flash(f'Error processing bulk action: {e}', 'danger')
+
+        if results is not None:
+            done = sum(result['outcome'] == 'Done' for result in results)
+            if request.accept_mimetypes.best == 'application/json':
+                return jsonify({'action': action, 'done': done, 'skipped': len(results) - done, 'results': results})
+            flash(f"{BULK_ACTIONS[action]}: {done} done, {len(results) - done} skipped.", 'success' if done else 'warning')
+
+    return render_template('bulk_staff.html', actions=BULK_ACTIONS, action=action, results=results,
+                           max_employees=MAX_BULK_EMPLOYEES)
+
+
+@staff_mgmt_bp.route('/check_in_queue/assign', methods=['GET', 'POST'])
+@login_required
+def assign_check_in_queue():
+    """Automatic room assignment for the check-in queue: GET previews a plan, POST commits it."""
+    if request.method == 'POST':
+        pairs = []
+        for value in request.form.getlist('assignment'):
+            employee_id, _, bed_id = value.partition(':')
+            if employee_id.isdigit() and bed_id.isdigit():
+                pairs.append((int(employee_id), int(bed_id)))
+        try:
+            assigned, skipped = commit_assignments(pairs, can_edit=current_user.can_edit_location)
+        except Exception as e:
+            flash(f'Error assigning rooms: {e}', 'danger')
+            return redirect(url_for('staff_mgmt.assign_check_in_queue'))
+        message = f'{assigned} employee(s) checked in and assigned to beds.'
+        if skipped:
+            message += f' {skipped} skipped because the employee or bed changed since the preview or is outside your locations.'
+        flash(message, 'success' if assigned else 'warning')
+        return redirect(url_for('dashboard_bp.view_employees_without_room'))
+
+    location = request.args.get('location', '').strip() or None
+    try:
+        limit = int(request.args.get('limit') or 0) or None
+    except ValueError:
+        limit = None
+    assignments, unassigned = plan_assignments(location=location, limit=limit, can_edit=current_user.can_edit_location)
+    return render_template('assign_queue.html', assignments=assignments, unassigned=unassigned,
+                           locations=get_locations_list(), location=location, limit=limit)
+
+
 @staff_mgmt_bp.route('/get_employee_details/<string:emp_id>')
 @login_required
 def get_employee_details(emp_id):
@@ -349,6 +320,43 @@ def get_employee_details(emp_id):
         })
     return jsonify({'error': 'Employee not found'}), 404
 
+@staff_mgmt_bp.route('/employees/search')
+@login_required
+def search_employees_json():
+    """Typeahead lookup: top N (1-50) employees whose EMP ID or name contains ?q=."""
+    text = request.args.get('q', '').strip()
+    try:
+        limit = max(1, min(int(request.args.get('limit', Config.SEARCH_TYPEAHEAD_LIMIT)), 50))
+    except (TypeError, ValueError):
+        limit = Config.SEARCH_TYPEAHEAD_LIMIT
+    statuses = request.args.getlist('status')
+
+    matches = search_employees(text, limit=limit, statuses=statuses) if text else []
+    return jsonify({'results': [{
+        'emp_id': emp.emp_id, 'name': emp.name, 'room': emp.room,
+        'accommodation_name': emp.accommodation_name, 'status': emp.status
+    } for emp in matches]})
+
+
+@staff_mgmt_bp.route('/beds/vacant')
+@login_required
+def vacant_beds_json():
+    """Bed finder for the assignment forms: one page of vacant beds, filtered by
+    ?location=, ?accommodation= and ?room= (room number prefix). Pass the returned
+    `next` cursor back as ?after= for the following page."""
+    try:
+        page_size = min(int(request.args.get('per_page', Config.VACANT_BED_PAGE_SIZE)), 200)
+    except ValueError:
+        page_size = Config.VACANT_BED_PAGE_SIZE
+    page = find_vacant_beds(
+        max(page_size, 1),
+        location=request.args.get('location', '').strip(),
+        accommodation=request.args.get('accommodation', '').strip(),
+        room=request.args.get('room', '').strip(),
+        after=request.args.get('after'),
+    )
+    return jsonify({'results': [bed_dict(bed) for bed in page.items], 'next': page.next_cursor})
+
 
 # --- Location Management Routes ---
 @staff_mgmt_bp.route('/locations', methods=['GET', 'POST'])
@@ -398,17 +406,18 @@ def locations():
     # Display all Accommodations (where Camp.location is None)
     all_accommodations_raw = Camp.query.filter(Camp.location.is_(None)).order_by(Camp.name).all()
     
-    # CRITICAL FIX: Calculate counts in Python for template rendering
+    # Bed counts for every accommodation come from one grouped (cached) query
+    rollup = get_accommodation_rollup()
     all_accommodations = []
     for camp in all_accommodations_raw:
-        total_beds = Employee.query.filter_by(accommodation_name=camp.name).count()
-        vacant_beds = Employee.query.filter_by(accommodation_name=camp.name, status='Vacant').count()
-        
+        counts = rollup.get(camp.name, EMPTY_ROLLUP)
         all_accommodations.append({
             'id': camp.id,
             'name': camp.name,
-            'total_beds': total_beds,
-            'vacant_beds': vacant_beds
+            'total_beds': counts['total_beds'],
+            'vacant_beds': counts['vacant'],
+            'occupied_beds': counts['occupied'],
+            'awaiting': counts['awaiting'],
         })
     
     return render_template('manage_accommodations.html', 
@@ -427,10 +436,31 @@ def manage_rooms(camp_id):
         flash("Accommodation not found.", "danger")
         return redirect(url_for('staff_mgmt.locations'))
         
-    rooms = Employee.query.filter_by(accommodation_name=camp.name).order_by(Employee.room).all()
-    
     if request.method == 'POST':
         action = request.form.get('action')
+
+        if action == 'add_floor':
+            # Provision several rooms at once: a room list/range x beds per room
+            try:
+                beds_per_room = int(request.form.get('beds_per_room'))
+            except (ValueError, TypeError):
+                flash("Invalid number of beds.", "danger")
+                return redirect(url_for('staff_mgmt.manage_rooms', camp_id=camp_id))
+            try:
+                room_numbers = parse_room_spec(request.form.get('room_spec', ''))
+            except ValueError as e:
+                flash(str(e), "danger")
+                return redirect(url_for('staff_mgmt.manage_rooms', camp_id=camp_id))
+
+            if not room_numbers or not 0 < beds_per_room <= MAX_BEDS_PER_ROOM:
+                flash("Invalid rooms or bed count.", "danger")
+                return redirect(url_for('staff_mgmt.manage_rooms', camp_id=camp_id))
+
+            added = add_vacant_beds(camp.name, dict.fromkeys(room_numbers, beds_per_room), location=camp.location)
+            db.session.commit()
+            flash(f"{added} vacant slot(s) added across {len(room_numbers)} room(s) in {camp.name}.", "success")
+            return redirect(url_for('staff_mgmt.manage_rooms', camp_id=camp_id))
+
         room_number = request.form.get('room_number').strip()
         
         try:
@@ -444,45 +474,14 @@ def manage_rooms(camp_id):
             return redirect(url_for('staff_mgmt.manage_rooms', camp_id=camp_id))
 
         if action == 'add':
-            for i in range(1, num_beds + 1):
-                # FIX: Find the highest existing vacant slot number for this room
-                last_vacant_result = db.session.execute(
-                    db.select(func.max(func.cast(func.substr(Employee.emp_id, func.instr(Employee.emp_id, '-Vacant-') + 8), db.Integer)))
-                    .where(Employee.room == room_number)
-                    .where(Employee.accommodation_name == camp.name)
-                    .where(Employee.status == 'Vacant')
-                ).scalar()
-                
-                next_slot_number = (last_vacant_result or 0) + 1
-                
-                emp_id_placeholder = f"{room_number}-Vacant-{next_slot_number}"
-                
-                new_bed = Employee(
-                    accommodation_name=camp.name, room=room_number,
-                    emp_id=emp_id_placeholder, status='Vacant', name='-',
-                    location=camp.location, designation='-', nationality='-',
-                    mobile_number='-', food_variety='-', meal_time='-', remarks='Bedspace'
-                )
-                db.session.add(new_bed)
+            # Slot numbers are allocated with one query and the beds inserted in one batch
+            add_vacant_beds(camp.name, {room_number: num_beds}, location=camp.location)
             db.session.commit()
             flash(f"{num_beds} vacant slot(s) added to Room {room_number} in {camp.name}.", "success")
         
         elif action == 'remove':
-            # FIX: Two-step deletion to overcome SQLAlchemy ORM limitations on LIMIT + DELETE
-            
-            # 1. Select the IDs of the records to delete
-            ids_to_delete = db.session.query(Employee.id).filter_by(
-                accommodation_name=camp.name, room=room_number, status='Vacant'
-            ).order_by(Employee.id.desc()).limit(num_beds).all()
-            
-            ids_list = [id_[0] for id_ in ids_to_delete]
-            
-            deleted_count = 0
-            if ids_list:
-                # 2. Execute the delete using the collected IDs
-                db.session.query(Employee).filter(Employee.id.in_(ids_list)).delete(synchronize_session=False)
-                deleted_count = len(ids_list)
-            
+            # Highest slots go first, so the remaining beds keep their labels
+            deleted_count = remove_vacant_beds(camp.name, room_number, num_beds)
             db.session.commit()
             if deleted_count > 0:
                  flash(f"{deleted_count} vacant slot(s) removed from Room {room_number} in {camp.name}.", "warning")
@@ -492,22 +491,23 @@ def manage_rooms(camp_id):
 
         return redirect(url_for('staff_mgmt.manage_rooms', camp_id=camp_id))
 
-    occupied_count = Employee.query.filter_by(accommodation_name=camp.name, status='Active').count()
-    vacant_count = Employee.query.filter_by(accommodation_name=camp.name, status='Vacant').count()
+    counts = get_accommodation_rollup().get(camp.name, EMPTY_ROLLUP)
+    occupied_count = counts['occupied']
+    vacant_count = counts['vacant']
     
     room_summary = db.session.query(
-        Employee.room,
-        func.count(Employee.id).label('total_slots'),
-        func.sum(db.case((Employee.status == 'Active', 1), else_=0)).label('occupied_slots'),
-        func.sum(db.case((Employee.status == 'Vacant', 1), else_=0)).label('vacant_slots')
-    ).filter(Employee.accommodation_name == camp.name).group_by(Employee.room).order_by(Employee.room).all()
+        Room.number.label('room'),
+        func.count(Bed.id).label('total_slots'),
+        func.sum(db.case((Bed.status == 'Occupied', 1), else_=0)).label('occupied_slots'),
+        func.sum(db.case((Bed.status == 'Vacant', 1), else_=0)).label('vacant_slots')
+    ).join(Bed.room).filter(Room.accommodation_name == camp.name).group_by(Room.number).order_by(Room.number).all()
 
     return render_template('manage_rooms.html', 
                            camp=camp, 
-                           rooms=rooms,
                            occupied_count=occupied_count,
                            vacant_count=vacant_count,
-                           room_summary=room_summary)
+                           room_summary=room_summary,
+                           max_beds_per_room=MAX_BEDS_PER_ROOM)
 
 @staff_mgmt_bp.route('/locations/edit/<int:camp_id>', methods=['GET', 'POST'])
 @login_required
@@ -533,7 +533,10 @@ def edit_location(camp_id):
         if existing and existing.id != camp_id:
             flash(f'Location "{new_location}" already exists.', 'warning')
         else:
-            Employee.query.filter_by(location=old_location).update({'location': new_location})
+            if old_location:
+                # Rooms carry the location too (bed finder, vacant view, assignment engine).
+                Employee.query.filter_by(location=old_location).update({'location': new_location})
+                Room.query.filter_by(location=old_location).update({'location': new_location})
             camp_to_edit.location = new_location
             db.session.commit()
             flash('Location updated successfully.', 'success')
@@ -555,7 +558,8 @@ def delete_location(camp_id):
 
     employees_at_location = Employee.query.filter_by(location=camp_to_delete.location).count()
     is_accommodation = camp_to_delete.location is None
-    employees_at_accommodation = Employee.query.filter_by(accommodation_name=camp_to_delete.name).count()
+    employees_at_accommodation = Employee.query.filter_by(accommodation_name=camp_to_delete.name).count() + \
+        Bed.query.join(Bed.room).filter(Room.accommodation_name == camp_to_delete.name, Bed.status == 'Vacant').count()
     
     if is_accommodation and employees_at_accommodation > 0:
          flash(f'Cannot delete Accommodation "{camp_to_delete.name}" because it has {employees_at_accommodation} bed(s) assigned.', 'danger')
@@ -576,22 +580,29 @@ def data_management():
         download_type = request.form.get('download_type')
         filter_value = request.form.get('filter_value')
         employees_query = Employee.query
+        # Vacant beds are Bed rows; they are exported after the employees, shaped like them
+        bed_criteria = []
         
         if download_type and filter_value and filter_value != 'all':
             if download_type == 'location':
                 employees_query = employees_query.filter(Employee.location == filter_value)
+                bed_criteria.append(Room.location == filter_value)
             elif download_type == 'status':
                 employees_query = employees_query.filter(Employee.status == filter_value)
+                bed_criteria = None if filter_value != 'Vacant' else bed_criteria
             elif download_type == 'accommodation':
                 employees_query = employees_query.filter(Employee.accommodation_name == filter_value)
+                bed_criteria.append(Room.accommodation_name == filter_value)
             elif download_type == 'nationality':
                 employees_query = employees_query.filter(Employee.nationality == filter_value)
+                bed_criteria = None
         
-        employees_df = pd.read_sql(employees_query.statement, db.engine)
-        buffer = io.BytesIO()
-        employees_df.to_excel(buffer, index=False)
-        buffer.seek(0)
-        return send_file(buffer, as_attachment=True, download_name='employee_data.xlsx', mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        columns = [(column.name, column) for column in Employee.__table__.columns]
+        return export_response(
+            employees_query.order_by(Employee.id), columns,
+            filename='employee_data.xlsx',
+            extra_rows=vacant_beds_export([name for name, _ in columns], *bed_criteria) if bed_criteria is not None else None
+        )
 
     # --- Summary Data for GET request ---
     active_statuses = ['Active', 'Vacation', 'On Leave', 'Resigned', 'Terminated']
@@ -604,7 +615,7 @@ def data_management():
     # Format data for Jinja/JavaScript consumption
     accommodations_list = [{'name': camp.name} for camp in accommodations_query]
     locations_list = [loc[0] for loc in locations_query if loc[0]]
-    statuses_list = [s[0] for s in statuses_query if s[0]]
+    statuses_list = sorted({s[0] for s in statuses_query if s[0]} | {'Vacant'})
     nationalities_list = [nat[0] for nat in nationalities_query if nat[0]]
 
     designation_summary = db.session.query(Employee.designation, func.count(Employee.id)).filter(Employee.status.in_(active_statuses)).group_by(Employee.designation).order_by(func.count(Employee.id).desc()).all()
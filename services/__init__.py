@@ -0,0 +1 @@
+# Shared business logic used by the route modules (query helpers, caches, importers).
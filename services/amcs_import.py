@@ -0,0 +1,61 @@
+from datetime import datetime
+from sqlalchemy import insert
+from models import db, AMCsService, AMCsSupplier
+from services.jobs import NULL_PROGRESS
+from services.spreadsheet import iter_chunks
+from services.validation import validate_amcs_chunks, check_report, parse_dates, amcs_date_columns
+
+
+def import_amcs_file(path, progress=NULL_PROGRESS, dry_run=False):
+    """Adds one AMCsService per spreadsheet row, auto-adding unknown suppliers.
+
+    The file is streamed twice: every date is parsed (vectorized) and validated before anything
+    is written, then rows are inserted chunk by chunk. Returns a summary dict (or only the
+    validation report when `dry_run` is set).
+    """
+    progress.stage('Validating')
+    report = validate_amcs_chunks(iter_chunks(path), dry_run=dry_run)
+    if dry_run:
+        return report
+    check_report(report)
+
+    progress.stage('Committing', rows_total=report['rows'])
+    today = datetime.now().strftime('%Y-%m-%d')
+    known_suppliers = set()
+    new_suppliers = set()
+
+    for df in iter_chunks(path):
+        # Use new date field names
+        start_column, end_column = amcs_date_columns(df)
+        inspection_dates = parse_dates(df[start_column])
+        expiry_dates = parse_dates(df[end_column])
+        durations = (expiry_dates - inspection_dates).dt.days
+        df = df.fillna('N/A')
+
+        rows = []
+        for index, row in zip(df.index, df.to_dict('records')):
+            rows.append(dict(
+                date=row.get('Date', today),
+                type=row.get('Type', 'N/A'),
+                supplier_name=row.get('Supplier Name', 'N/A'),
+                inspection_date=inspection_dates[index].strftime('%Y-%m-%d'),
+                expiry_date=expiry_dates[index].strftime('%Y-%m-%d'),
+                remarks=row.get('Remarks', 'N/A'),
+                duration=int(durations[index])
+            ))
+        if rows:
+            db.session.execute(insert(AMCsService), rows)
+
+        # Auto-add suppliers not found (one lookup per chunk)
+        names = {row['supplier_name'] for row in rows if row['supplier_name'] != 'N/A'} - known_suppliers
+        if names:
+            known_suppliers |= {name for (name,) in db.session.query(AMCsSupplier.name).filter(AMCsSupplier.name.in_(names))}
+            missing = sorted(names - known_suppliers)
+            if missing:
+                db.session.execute(insert(AMCsSupplier), [{'name': name, 'contact': 'N/A'} for name in missing])
+                known_suppliers.update(missing)
+                new_suppliers.update(missing)
+        progress.advance(len(rows))
+
+    db.session.commit()
+    return {'inserted': report['rows'], 'suppliers_added': len(new_suppliers)}
@@ -0,0 +1,212 @@
+from sqlalchemy import update, func
+from models import db, Employee, Room, Bed
+from services.beds import _batches
+
+# Values that mean "not recorded" in the staff data.
+_UNSET = (None, '', '-', 'N/A')
+
+# Weights of the preferences a room is scored on (location is a hard rule, not a weight).
+SCORE_SAME_LOCATION = 8
+SCORE_SAME_NATIONALITY = 4
+SCORE_FOOD_SERVED = 2
+SCORE_MEAL_SERVED = 1
+
+
+def _known(value):
+    return value not in _UNSET
+
+
+def awaiting_query(location=None):
+    """Employees in the check-in queue (status Check-in, no room), oldest first."""
+    query = Employee.query.filter(Employee.status == 'Check-in', Employee.room.is_(None))
+    if location:
+        query = query.filter(Employee.location == location)
+    return query.order_by(Employee.id)
+
+
+class _RoomState:
+    """A room with vacant beds while a plan is built: its free beds and who lives there."""
+
+    __slots__ = ('accommodation', 'number', 'location', 'beds', 'nationalities')
+
+    def __init__(self, accommodation, number, location):
+        self.accommodation = accommodation
+        self.number = number
+        self.location = location
+        self.beds = []  # (bed id, slot), lowest slot first
+        self.nationalities = {}
+
+
+def _load_rooms():
+    """Every room with a vacant bed, with the nationality mix of its current occupants."""
+    rooms = {}
+    for bed_id, slot, room_id, accommodation, number, location in db.session.query(
+            Bed.id, Bed.slot, Room.id, Room.accommodation_name, Room.number, Room.location
+    ).join(Bed.room).filter(Bed.status == 'Vacant').order_by(Room.accommodation_name, Room.number, Bed.slot):
+        room = rooms.get(room_id)
+        if room is None:
+            room = rooms[room_id] = _RoomState(accommodation, number, location)
+        room.beds.append((bed_id, slot))
+
+    for batch in _batches(rooms):
+        for room_id, nationality, count in db.session.query(
+                Bed.room_id, Employee.nationality, func.count(Bed.id)
+        ).join(Employee, Bed.occupant_id == Employee.id).filter(Bed.room_id.in_(batch)).group_by(
+                Bed.room_id, Employee.nationality):
+            if _known(nationality):
+                rooms[room_id].nationalities[nationality] = count
+    return rooms
+
+
+def _kitchens(accommodations):
+    """{accommodation: (food varieties, meal times)} served there, judged from its current occupants.
+
+    Accommodations record no kitchen of their own, so what their residents eat stands in for it.
+    """
+    kitchens = {name: (set(), set()) for name in accommodations}
+    for batch in _batches(kitchens):
+        for accommodation, food, meal in db.session.query(
+                Employee.accommodation_name, Employee.food_variety, Employee.meal_time
+        ).filter(Employee.accommodation_name.in_(batch), Employee.room.isnot(None)).distinct():
+            foods, meals = kitchens[accommodation]
+            if _known(food):
+                foods.add(food)
+            if _known(meal):
+                meals.add(meal)
+    return kitchens
+
+
+def _score(room, group_key, kitchens):
+    """How well `room` suits a group, or None when its location rules it out (a group with a
+    known location only goes to rooms recorded at that location)."""
+    location, nationality, food, meal = group_key
+    score = 0
+    if _known(location):
+        if room.location != location:
+            return None
+        score += SCORE_SAME_LOCATION
+    if _known(nationality) and room.nationalities.get(nationality):
+        score += SCORE_SAME_NATIONALITY
+    foods, meals = kitchens[room.accommodation]
+    if _known(food) and food in foods:
+        score += SCORE_FOOD_SERVED
+    if _known(meal) and meal in meals:
+        score += SCORE_MEAL_SERVED
+    return score
+
+
+def _room_permitted(room, can_edit):
+    return can_edit(room.location or room.accommodation)
+
+
+def plan_assignments(location=None, limit=None, can_edit=lambda location: True):
+    """Matches the check-in queue to vacant beds in one pass, without writing anything.
+
+    Only people and rooms in locations the user may edit (`can_edit(location)`) take part.
+    People are grouped by (location, nationality, food variety, meal time), largest group first.
+    Each group fills the best-scoring rooms in turn: a room must be in the group's location when
+    that is known (rooms without a recorded location only take people without one), and rooms
+    already housing the same nationality and accommodations whose residents eat the same food at
+    the same meal time score higher. Among equal scores the room with the most free beds wins,
+    so a group stays together. Rooms learn the nationality of the people placed in them, so
+    later groups follow their compatriots.
+
+    Returns (assignments, unassigned): assignment dicts carry the employee and bed IDs
+    commit_assignments() needs plus display fields; unassigned dicts carry a reason.
+    """
+    people = [person for person in awaiting_query(location).with_entities(
+        Employee.id, Employee.emp_id, Employee.name, Employee.location,
+        Employee.nationality, Employee.food_variety, Employee.meal_time) if can_edit(person.location or '-')]
+    if limit:
+        people = people[:limit]
+    rooms = {room_id: room for room_id, room in _load_rooms().items() if _room_permitted(room, can_edit)}
+    kitchens = _kitchens({room.accommodation for room in rooms.values()})
+
+    groups = {}
+    for person in people:
+        key = (person.location, person.nationality, person.food_variety, person.meal_time)
+        groups.setdefault(key, []).append(person)
+
+    assignments, unassigned = [], []
+    for key, members in sorted(groups.items(), key=lambda item: -len(item[1])):
+        waiting = list(members)
+        while waiting:
+            candidates = [(score, len(room.beds), room) for room in rooms.values() if room.beds
+                          for score in [_score(room, key, kitchens)] if score is not None]
+            if not candidates:
+                reason = f'No vacant bed in {key[0]}' if _known(key[0]) else 'No vacant bed left'
+                unassigned += [{'employee_id': person.id, 'emp_id': person.emp_id, 'name': person.name,
+                                'nationality': person.nationality, 'location': person.location, 'reason': reason}
+                               for person in waiting]
+                break
+            score, _, room = max(candidates, key=lambda candidate: candidate[:2])
+            placed, waiting = waiting[:len(room.beds)], waiting[len(room.beds):]
+            for person in placed:
+                bed_id, slot = room.beds.pop(0)
+                assignments.append({
+                    'employee_id': person.id, 'emp_id': person.emp_id, 'name': person.name,
+                    'nationality': person.nationality, 'food_variety': person.food_variety,
+                    'meal_time': person.meal_time, 'location': person.location, 'bed_id': bed_id,
+                    'accommodation_name': room.accommodation, 'room': room.number,
+                    'room_location': room.location, 'bed': f'{room.number}-Bed-{slot}', 'score': score,
+                })
+            if _known(key[1]):
+                room.nationalities[key[1]] = room.nationalities.get(key[1], 0) + len(placed)
+    return assignments, unassigned
+
+
+def commit_assignments(pairs, can_edit=lambda location: True):
+    """Applies (employee ID, bed ID) pairs from a plan in one transaction.
+
+    Pairs whose employee is no longer awaiting a room or whose bed is no longer vacant (someone
+    else acted since the preview), and pairs outside the locations the user may edit
+    (`can_edit(location)`), are skipped. Each bed is claimed with an UPDATE conditional on it
+    still being vacant, so a bed assigned concurrently after the read is not handed out twice.
+    Returns (assigned, skipped) counts.
+    """
+    pairs = list(dict(pairs).items())
+    employee_ids = [employee_id for employee_id, _ in pairs]
+    bed_ids = [bed_id for _, bed_id in pairs]
+    waiting, vacant = {}, {}
+    for batch in _batches(employee_ids):
+        waiting.update((row.id, row) for row in db.session.query(Employee.id, Employee.location).filter(
+            Employee.id.in_(batch), Employee.status == 'Check-in', Employee.room.is_(None)))
+    for batch in _batches(bed_ids):
+        vacant.update((row.id, row) for row in db.session.query(
+            Bed.id, Room.accommodation_name, Room.number, Room.location
+        ).join(Bed.room).filter(Bed.id.in_(batch), Bed.status == 'Vacant'))
+
+    assigned, used_beds = 0, set()
+    try:
+        for employee_id, bed_id in pairs:
+            employee, bed = waiting.get(employee_id), vacant.get(bed_id)
+            if employee is None or bed is None or bed_id in used_beds:
+                continue
+            if not can_edit(employee.location or '-') or not can_edit(bed.location or bed.accommodation_name):
+                continue
+            used_beds.add(bed_id)
+            claimed = db.session.execute(
+                update(Bed).where(Bed.id == bed_id, Bed.status == 'Vacant')
+                .values(occupant_id=employee_id, status='Occupied')
+                .execution_options(synchronize_session=False))
+            if claimed.rowcount != 1:
+                continue
+            moved = db.session.execute(
+                update(Employee)
+                .where(Employee.id == employee_id, Employee.status == 'Check-in', Employee.room.is_(None))
+                .values(accommodation_name=bed.accommodation_name, room=bed.number,
+                        location=bed.location or employee.location, status='Active')
+                .execution_options(synchronize_session=False))
+            if moved.rowcount != 1:
+                # Checked in elsewhere meanwhile: give the bed back.
+                db.session.execute(update(Bed).where(Bed.id == bed_id)
+                                   .values(occupant_id=None, status='Vacant')
+                                   .execution_options(synchronize_session=False))
+                continue
+            assigned += 1
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    db.session.expire_all()
+    return assigned, len(pairs) - assigned
@@ -0,0 +1,333 @@
+import re
+from sqlalchemy import insert, update, delete, func, select, cast, literal, null, String
+from sqlalchemy.orm import contains_eager
+from models import db, Employee, Room, Bed
+from services.pagination import keyset_paginate
+
+# Upper bounds for one provisioning request (a floor is rarely more than a few dozen rooms).
+MAX_ROOMS_PER_REQUEST = 500
+MAX_BEDS_PER_ROOM = 20
+# Row IDs per IN (...) list, kept under SQLite's bound-parameter limit.
+ID_BATCH_SIZE = 900
+
+_ROOM_RANGE = re.compile(r'^(?P<prefix>.*?)(?P<start>\d+)\s*-\s*(?P=prefix)?(?P<end>\d+)$')
+
+
+def _batches(values, size=ID_BATCH_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def parse_room_spec(spec):
+    """Expands 'AF01-AF12, AF20, 301-305' into room numbers, keeping zero padding.
+
+    Raises ValueError for a malformed entry or more than MAX_ROOMS_PER_REQUEST rooms.
+    """
+    rooms = []
+    for part in (part.strip() for part in spec.split(',')):
+        if not part:
+            continue
+        match = _ROOM_RANGE.match(part)
+        if not match:
+            rooms.append(part)
+            continue
+        prefix, start, end = match.group('prefix'), match.group('start'), match.group('end')
+        if int(end) < int(start):
+            raise ValueError(f"Room range '{part}' ends before it starts.")
+        if int(end) - int(start) + 1 > MAX_ROOMS_PER_REQUEST:
+            raise ValueError(f"Room range '{part}' is too large.")
+        rooms += [f"{prefix}{number:0{len(start)}d}" for number in range(int(start), int(end) + 1)]
+    rooms = list(dict.fromkeys(rooms))
+    if len(rooms) > MAX_ROOMS_PER_REQUEST:
+        raise ValueError(f"At most {MAX_ROOMS_PER_REQUEST} rooms can be added at once.")
+    return rooms
+
+
+# --- Queries ---
+def vacant_beds_query():
+    """Vacant beds with their room loaded, ordered by accommodation, room and slot.
+
+    Served by the (status, room_id) index on Bed and the (accommodation_name, number) key on Room.
+    """
+    return (Bed.query.join(Bed.room).options(contains_eager(Bed.room))
+            .filter(Bed.status == 'Vacant')
+            .order_by(Room.accommodation_name, Room.number, Bed.slot))
+
+
+def find_vacant_beds(page_size, location=None, accommodation=None, room=None, after=None, before=None,
+                     cursor_prefix=''):
+    """One keyset page of vacant beds, optionally narrowed to a location, an accommodation and
+    rooms whose number starts with `room` (e.g. a floor prefix such as 'AF')."""
+    query = vacant_beds_query()
+    if location:
+        query = query.filter(Room.location == location)
+    if accommodation:
+        query = query.filter(Room.accommodation_name == accommodation)
+    if room:
+        query = query.filter(Room.number.startswith(room, autoescape=True))
+    return keyset_paginate(query, [Room.accommodation_name, Room.number, Bed.slot, Bed.id],
+                           page_size=page_size, after=after, before=before, cursor_prefix=cursor_prefix)
+
+
+def bed_dict(bed):
+    """The fields the assignment forms and the dashboard show for a bed."""
+    return {'id': bed.id, 'accommodation_name': bed.room.accommodation_name, 'room': bed.room.number,
+            'location': bed.room.location, 'emp_id': bed.label, 'slot': bed.slot, 'status': bed.status}
+
+
+def vacant_beds_export(column_names, *criteria):
+    """A select of the vacant beds shaped like Employee rows (one expression per Employee column
+    name), so that exports and the staff import template still list every bed."""
+    values = {
+        'accommodation_name': Room.accommodation_name, 'room': Room.number, 'location': Room.location,
+        'emp_id': Room.number + '-Bed-' + cast(Bed.slot, String), 'status': literal('Vacant'),
+        'name': literal('-'), 'remarks': literal('Bedspace'),
+    }
+    columns = [values.get(name, null()).label(name) for name in column_names]
+    return (select(*columns).select_from(Bed).join(Bed.room)
+            .where(Bed.status == 'Vacant', *criteria).order_by(Room.accommodation_name, Room.number, Bed.slot))
+
+
+def get_vacant_bed(bed_id):
+    """The Bed with this ID if it exists and is vacant, else None."""
+    try:
+        bed = db.session.get(Bed, int(bed_id))
+    except (TypeError, ValueError):
+        return None
+    return bed if bed is not None and bed.status == 'Vacant' else None
+
+
+# --- Rooms and bed slots ---
+def get_rooms(keys, locations=None):
+    """Room rows for (accommodation, number) keys, creating the missing ones in one batch.
+
+    `locations` optionally maps a key to the room's location: stored on a newly created room
+    and written over a different location of an existing one (one batched UPDATE).
+    Returns {(accommodation, number): room id}.
+    """
+    keys = list(dict.fromkeys(keys))
+    locations = locations or {}
+    found, relocated = {}, []
+    for accommodation in {key[0] for key in keys}:
+        numbers = [number for acc, number in keys if acc == accommodation]
+        for batch in _batches(numbers):
+            for room_id, acc, number, location in db.session.query(
+                    Room.id, Room.accommodation_name, Room.number, Room.location
+            ).filter(Room.accommodation_name == accommodation, Room.number.in_(batch)):
+                found[(acc, number)] = room_id
+                new_location = locations.get((acc, number))
+                if new_location and new_location != location:
+                    relocated.append({'id': room_id, 'location': new_location})
+    if relocated:
+        db.session.execute(update(Room), relocated)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        db.session.execute(insert(Room), [
+            {'accommodation_name': acc, 'number': number, 'location': locations.get((acc, number))}
+            for acc, number in missing
+        ])
+        return get_rooms(keys)
+    return found
+
+
+def _highest_slots(room_ids):
+    """{room id: highest bed slot used} in one grouped query (0 for rooms without beds)."""
+    slots = dict.fromkeys(room_ids, 0)
+    for batch in _batches(room_ids):
+        slots.update(db.session.query(Bed.room_id, func.max(Bed.slot)).filter(Bed.room_id.in_(batch)).group_by(Bed.room_id))
+    return slots
+
+
+def add_vacant_beds(accommodation_name, beds_by_room, location=None):
+    """Adds vacant beds: {room number: number of beds}. Returns the number of beds added.
+
+    Rooms are created as needed, slot numbers for every room come from one grouped query and
+    all beds are inserted in one executemany batch. The caller commits.
+    """
+    keys = [(accommodation_name, room) for room in beds_by_room]
+    rooms = get_rooms(keys, dict.fromkeys(keys, location))
+    highest = _highest_slots(list(rooms.values()))
+    beds = []
+    for (_, room), room_id in rooms.items():
+        first = highest[room_id] + 1
+        beds += [{'room_id': room_id, 'slot': slot, 'status': 'Vacant'}
+                 for slot in range(first, first + beds_by_room[room])]
+    if beds:
+        db.session.execute(insert(Bed), beds)
+    return len(beds)
+
+
+def remove_vacant_beds(accommodation_name, room_number, count):
+    """Removes up to `count` vacant beds (highest slots first) from a room. Returns the number removed."""
+    ids = [bed_id for (bed_id,) in db.session.query(Bed.id).join(Bed.room).filter(
+        Room.accommodation_name == accommodation_name, Room.number == room_number, Bed.status == 'Vacant'
+    ).order_by(Bed.slot.desc()).limit(count)]
+    if ids:
+        db.session.execute(delete(Bed).where(Bed.id.in_(ids)))
+    return len(ids)
+
+
+# --- Occupancy changes ---
+def assign_bed(employee, bed):
+    """Puts `employee` in the vacant `bed` and mirrors the placement on the Employee row.
+
+    The bed is claimed with an UPDATE conditional on it still being vacant, so of two requests
+    racing for the same bed only one gets it. Returns False (nothing claimed; the caller rolls
+    back) when the bed was taken since it was read.
+    """
+    if employee.id is None:
+        db.session.flush()
+    claimed = db.session.execute(
+        update(Bed).where(Bed.id == bed.id, Bed.status == 'Vacant')
+        .values(status='Occupied', occupant_id=employee.id)
+        .execution_options(synchronize_session=False))
+    if claimed.rowcount != 1:
+        return False
+    db.session.refresh(bed, ['status', 'occupant_id'])
+    employee.accommodation_name = bed.room.accommodation_name
+    employee.room = bed.room.number
+    return True
+
+
+def release_bed(employee):
+    """Frees the bed `employee` occupies (the Employee row itself is left untouched).
+
+    An employee placed in a room without a Bed row (data from before the Room/Bed tables)
+    gets a vacant bed created in that room instead, so the bed space is not lost.
+    """
+    bed = Bed.query.filter_by(occupant_id=employee.id).first() if employee.id is not None else None
+    if bed is not None:
+        bed.status = 'Vacant'
+        bed.occupant_id = None
+        db.session.flush()
+    elif employee.accommodation_name and employee.room:
+        add_vacant_beds(employee.accommodation_name, {employee.room: 1}, location=employee.location)
+    return bed
+
+
+def release_beds_of(employee_ids):
+    """Set-based release of every bed held by these employees (e.g. before deleting them)."""
+    for batch in _batches(employee_ids):
+        db.session.execute(update(Bed).where(Bed.occupant_id.in_(batch)).values(occupant_id=None, status='Vacant'))
+
+
+def vacate_beds(employees):
+    """Set-based release_bed() for many employees: rows of (id, accommodation, room, location).
+
+    Held beds are freed with one UPDATE per batch; employees placed in a room without a Bed
+    row get a vacant bed created there, grouped into one insert per accommodation.
+    """
+    ids = [row[0] for row in employees]
+    holding = set()
+    for batch in _batches(ids):
+        holding.update(occupant_id for (occupant_id,) in db.session.query(Bed.occupant_id).filter(Bed.occupant_id.in_(batch)))
+    release_beds_of(holding)
+    missing = {}
+    for employee_id, accommodation, room, location in employees:
+        if employee_id not in holding and accommodation and room:
+            rooms = missing.setdefault((accommodation, location), {})
+            rooms[room] = rooms.get(room, 0) + 1
+    for (accommodation, location), rooms in missing.items():
+        add_vacant_beds(accommodation, rooms, location=location)
+
+
+def reconcile_beds(accommodations, room_counts, locations=None):
+    """Makes the rooms and beds of `accommodations` match a staff sheet.
+
+    `room_counts` maps (accommodation, room) to the number of bed rows the sheet lists for the
+    room (occupied and vacant). The occupants of a room are the employees whose accommodation
+    and room point at it. Occupants keep their current bed where possible, the others take the
+    lowest free slot (beds are added when the room is short), surplus vacant beds are removed
+    and rooms the sheet no longer lists lose their vacant beds (and are removed once empty).
+    Returns (beds added, beds removed).
+    """
+    accommodations = list(accommodations)
+    rooms = get_rooms(room_counts, locations)
+    room_keys = {}
+    for batch in _batches(accommodations):
+        room_keys.update((room_id, (acc, number)) for room_id, acc, number in db.session.query(
+            Room.id, Room.accommodation_name, Room.number).filter(Room.accommodation_name.in_(batch)))
+    room_keys.update((room_id, key) for key, room_id in rooms.items())
+
+    beds_by_room = {room_id: [] for room_id in room_keys}
+    for batch in _batches(room_keys):
+        for bed_id, room_id, slot, occupant_id in db.session.query(
+                Bed.id, Bed.room_id, Bed.slot, Bed.occupant_id).filter(Bed.room_id.in_(batch)).order_by(Bed.slot):
+            beds_by_room[room_id].append([bed_id, slot, occupant_id])
+
+    occupants = {}
+    for batch in _batches(accommodations):
+        for emp_id, acc, room in db.session.query(Employee.id, Employee.accommodation_name, Employee.room).filter(
+                Employee.accommodation_name.in_(batch), Employee.room.isnot(None), Employee.status != 'Vacant'
+        ).order_by(Employee.id):
+            occupants.setdefault((acc, room), []).append(emp_id)
+
+    placed = {emp_id for ids in occupants.values() for emp_id in ids}
+    released, assigned, inserts, deletes = [], [], [], []
+    for room_id, beds in beds_by_room.items():
+        key = room_keys[room_id]
+        people = occupants.get(key, [])
+        waiting = [emp_id for emp_id in people if emp_id not in {bed[2] for bed in beds}]
+        for bed in beds:
+            if bed[2] is not None and bed[2] not in people:
+                released.append(bed[0])
+                bed[2] = None
+        for bed in beds:
+            if bed[2] is None and waiting:
+                bed[2] = waiting.pop(0)
+                assigned.append({'id': bed[0], 'occupant_id': bed[2], 'status': 'Occupied'})
+        next_slot = beds[-1][1] + 1 if beds else 1
+        for emp_id in waiting:
+            inserts.append({'room_id': room_id, 'slot': next_slot, 'status': 'Occupied', 'occupant_id': emp_id})
+            next_slot += 1
+        target = max(room_counts.get(key, 0), len(people))
+        total = len(beds) + len(waiting)
+        if total < target:
+            inserts += [{'room_id': room_id, 'slot': slot, 'status': 'Vacant', 'occupant_id': None}
+                        for slot in range(next_slot, next_slot + target - total)]
+        elif total > target:
+            surplus = [bed[0] for bed in reversed(beds) if bed[2] is None][:total - target]
+            deletes += surplus
+
+    # Beds outside these rooms still held by someone now placed in them are released first,
+    # so no occupant is ever on two beds (occupant_id is unique).
+    for batch in _batches(placed):
+        db.session.execute(update(Bed).where(Bed.occupant_id.in_(batch), Bed.room_id.notin_(list(room_keys)))
+                           .values(occupant_id=None, status='Vacant'))
+    for batch in _batches(released + [row['id'] for row in assigned]):
+        db.session.execute(update(Bed).where(Bed.id.in_(batch)).values(occupant_id=None, status='Vacant'))
+    if assigned:
+        db.session.execute(update(Bed), assigned)
+    for batch in _batches(deletes):
+        db.session.execute(delete(Bed).where(Bed.id.in_(batch)))
+    if inserts:
+        db.session.execute(insert(Bed), inserts)
+    for batch in _batches(accommodations):
+        db.session.execute(delete(Room).where(Room.accommodation_name.in_(batch), ~Room.beds.any()))
+    return len(inserts), len(deletes)
+
+
+def migrate_placeholder_beds():
+    """Converts '<room>-Vacant-<n>' placeholder Employee rows into Room/Bed rows.
+
+    Every (accommodation, room) found on Employee rows gets a Room with one Bed per occupant
+    plus one per placeholder (plus any vacant beds it already had), occupants are linked to
+    their beds and the placeholders are deleted. Safe to run again. The caller commits.
+    Returns (rooms, beds, placeholders converted).
+    """
+    counts, locations = {}, {}
+    for acc, room, status, location, rows in db.session.query(
+            Employee.accommodation_name, Employee.room, Employee.status, func.max(Employee.location), func.count(Employee.id)
+    ).filter(Employee.accommodation_name.isnot(None), Employee.room.isnot(None)).group_by(
+            Employee.accommodation_name, Employee.room, Employee.status):
+        counts[(acc, room)] = counts.get((acc, room), 0) + rows
+        if location and location not in ('N/A', '-'):
+            locations.setdefault((acc, room), location)
+    for acc, number, vacant in db.session.query(Room.accommodation_name, Room.number, func.count(Bed.id)).join(
+            Bed.room).filter(Bed.status == 'Vacant').group_by(Room.accommodation_name, Room.number):
+        counts[(acc, number)] = counts.get((acc, number), 0) + vacant
+
+    reconcile_beds({acc for acc, _ in counts}, counts, locations)
+    placeholders = Employee.query.filter(Employee.status == 'Vacant').delete(synchronize_session=False)
+    return len(counts), db.session.query(func.count(Bed.id)).scalar(), placeholders
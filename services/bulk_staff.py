@@ -0,0 +1,213 @@
+import re
+from datetime import datetime
+from sqlalchemy import update
+from models import db, Employee, Room, Bed
+from services.beds import vacate_beds, _batches
+from services.spreadsheet import iter_rows
+
+BULK_ACTIONS = {
+    'checkout': 'Final checkout (Ex-Employee)',
+    'shift_out': 'Shift out (vacate bed, await a room)',
+    'reassign': 'Re-assign to another room',
+}
+# EMP IDs (or re-assignment lines) accepted in one request.
+MAX_BULK_EMPLOYEES = 2000
+
+_SEPARATORS = re.compile(r'[\s,;]+')
+
+
+class BulkRequestError(ValueError):
+    """The submitted list cannot be processed at all (nothing has been changed)."""
+
+
+def parse_bulk_text(text, action):
+    """Requests typed into the form: EMP IDs separated by commas, spaces or new lines, or for
+    'reassign' one 'EMP_ID, ACCOMMODATION, ROOM' line per employee."""
+    if action != 'reassign':
+        return [{'emp_id': emp_id} for emp_id in _SEPARATORS.split(text) if emp_id]
+    requests = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        parts = [part.strip() for part in line.split(',')]
+        if len(parts) != 3 or not all(parts):
+            raise BulkRequestError(f"Line {number}: expected 'EMP_ID, ACCOMMODATION, ROOM'.")
+        requests.append({'emp_id': parts[0], 'accommodation_name': parts[1], 'room': parts[2]})
+    return requests
+
+
+def read_bulk_file(path, action):
+    """Requests from an uploaded .xlsx/.csv list: an EMP_ID column, plus ACCOMMODATION_NAME and
+    ROOM columns for 'reassign' (headers are matched like the staff import's)."""
+    headers, rows = iter_rows(path)
+    names = {header: str(header).strip().upper().replace(' ', '_') for header in headers}
+    required = ['EMP_ID'] + (['ACCOMMODATION_NAME', 'ROOM'] if action == 'reassign' else [])
+    missing = [column for column in required if column not in names.values()]
+    if missing:
+        raise BulkRequestError(f"Missing column(s): {', '.join(missing)}.")
+    requests = []
+    for _, record in rows:
+        values = {names[header]: (value or '').strip() for header, value in record.items()}
+        if not values['EMP_ID']:
+            continue
+        request = {'emp_id': values['EMP_ID']}
+        if action == 'reassign':
+            request.update(accommodation_name=values['ACCOMMODATION_NAME'], room=values['ROOM'])
+        requests.append(request)
+    return requests
+
+
+def _load_employees(emp_ids):
+    columns = (Employee.id, Employee.emp_id, Employee.name, Employee.status,
+               Employee.accommodation_name, Employee.room, Employee.location)
+    found = {}
+    for batch in _batches(emp_ids):
+        found.update((row.emp_id, row) for row in db.session.query(*columns).filter(Employee.emp_id.in_(batch)))
+    return found
+
+
+def _result(request, employee, outcome, message):
+    return {'emp_id': request['emp_id'], 'name': employee.name if employee else None,
+            'outcome': outcome, 'message': message}
+
+
+def _vacating(employees):
+    return [(row.id, row.accommodation_name, row.room, row.location) for row in employees if row.room is not None]
+
+
+def _leave(employees, status, date_field):
+    """Check-out / shift-out of `employees`: beds released and Employee rows updated set-based."""
+    today = datetime.now().strftime('%Y-%m-%d')
+    vacate_beds(_vacating(employees))
+    in_room = [row.id for row in employees if row.room is not None]
+    without_room = [row.id for row in employees if row.room is None]
+    for batch in _batches(in_room):
+        db.session.execute(update(Employee).where(Employee.id.in_(batch)).values(
+            {'status': status, date_field: today, 'room': None, 'accommodation_name': None, 'location': None}))
+    for batch in _batches(without_room):
+        db.session.execute(update(Employee).where(Employee.id.in_(batch)).values({'status': status, date_field: today}))
+
+
+def _vacant_beds_by_room(targets):
+    """{(accommodation, room): [(bed id, room location), ...] lowest slot first} for the target rooms."""
+    beds = {}
+    for accommodation in {acc for acc, _ in targets}:
+        numbers = [room for acc, room in targets if acc == accommodation]
+        for batch in _batches(numbers):
+            for bed_id, number, location in db.session.query(Bed.id, Room.number, Room.location).join(Bed.room).filter(
+                    Room.accommodation_name == accommodation, Room.number.in_(batch), Bed.status == 'Vacant'
+            ).order_by(Room.number, Bed.slot):
+                beds.setdefault((accommodation, number), []).append((bed_id, location))
+    return beds
+
+
+def _reassign(requests):
+    """Moves each (request, employee) to the lowest free bed of the requested room.
+    Returns {id(request): result}.
+
+    Only beds that were vacant before the batch are handed out, so a bed freed by one employee of
+    the batch is not reused by another in the same run. Each bed is claimed with an UPDATE
+    conditional on it still being vacant (its occupant is set once the movers' old beds are
+    released), so a bed assigned concurrently since it was read is passed over, not double-booked.
+    Likewise an employee is only moved if their room and status are still the ones read, and
+    the claimed bed is handed back otherwise.
+    """
+    pool = _vacant_beds_by_room({(request['accommodation_name'], request['room']) for request, _ in requests})
+    results, movers, bed_updates = {}, [], []
+    for request, employee in requests:
+        target = (request['accommodation_name'], request['room'])
+        if (employee.accommodation_name, employee.room) == target:
+            results[id(request)] = _result(request, employee, 'Skipped', f'Already in room {request["room"]}')
+            continue
+        bed_id = location = None
+        while pool.get(target) and bed_id is None:
+            candidate, location = pool[target].pop(0)
+            if db.session.execute(update(Bed).where(Bed.id == candidate, Bed.status == 'Vacant')
+                                  .values(status='Occupied')
+                                  .execution_options(synchronize_session=False)).rowcount == 1:
+                bed_id = candidate
+        if bed_id is None:
+            results[id(request)] = _result(request, employee, 'Skipped',
+                                           f'No vacant bed in room {request["room"]} of {request["accommodation_name"]}')
+            continue
+        moved = db.session.execute(
+            update(Employee)
+            .where(Employee.id == employee.id, Employee.status == employee.status,
+                   Employee.status != 'Ex-Employee',
+                   Employee.accommodation_name.is_not_distinct_from(employee.accommodation_name),
+                   Employee.room.is_not_distinct_from(employee.room))
+            .values(accommodation_name=target[0], room=target[1], location=location or employee.location,
+                    status='Active' if employee.status == 'Check-in' else employee.status)
+            .execution_options(synchronize_session=False))
+        if moved.rowcount != 1:
+            db.session.execute(update(Bed).where(Bed.id == bed_id).values(status='Vacant', occupant_id=None)
+                               .execution_options(synchronize_session=False))
+            pool[target].insert(0, (bed_id, location))
+            results[id(request)] = _result(request, employee, 'Skipped', 'Changed by someone else meanwhile')
+            continue
+        movers.append(employee)
+        bed_updates.append({'id': bed_id, 'occupant_id': employee.id})
+        results[id(request)] = _result(request, employee, 'Done', f'Moved to {target[0]} room {target[1]}')
+
+    # `movers` still hold the rooms read before the batch, which are the beds to release
+    vacate_beds(_vacating(movers))
+    if bed_updates:
+        db.session.execute(update(Bed), bed_updates)
+    return results
+
+
+def run_bulk_action(action, requests, can_edit=lambda location: True):
+    """Applies `action` ('checkout', 'shift_out' or 'reassign') to every requested employee in one
+    transaction and returns one result per request: {'emp_id', 'name', 'outcome', 'message'}
+    with outcome 'Done' or 'Skipped'.
+
+    Unknown EMP IDs, repeats, employees the user may not edit (`can_edit(location)`) and
+    employees the action does not apply to are skipped; everything else is written with
+    set-based UPDATEs and committed together.
+    """
+    if action not in BULK_ACTIONS:
+        raise BulkRequestError('Unknown bulk action.')
+    if not requests:
+        raise BulkRequestError('No EMP IDs were given.')
+    if len(requests) > MAX_BULK_EMPLOYEES:
+        raise BulkRequestError(f'At most {MAX_BULK_EMPLOYEES} employees can be processed at once.')
+
+    found = _load_employees(list(dict.fromkeys(request['emp_id'] for request in requests)))
+    results, accepted, seen = {}, [], set()
+    for request in requests:
+        employee = found.get(request['emp_id'])
+        skip = None
+        if employee is None:
+            skip = 'EMP ID not found'
+        elif request['emp_id'] in seen:
+            skip = 'Listed more than once'
+        elif not can_edit(employee.location or employee.accommodation_name or '-'):
+            skip = 'Permission denied for this location'
+        elif employee.status == 'Ex-Employee':
+            skip = 'Already checked out'
+        elif action == 'shift_out' and employee.status == 'Check-in' and employee.room is None:
+            skip = 'Already awaiting a room'
+        if skip:
+            results[id(request)] = _result(request, employee, 'Skipped', skip)
+        else:
+            accepted.append((request, employee))
+        seen.add(request['emp_id'])
+
+    try:
+        if action == 'reassign':
+            results.update(_reassign(accepted))
+        else:
+            employees = [employee for _, employee in accepted]
+            if action == 'checkout':
+                _leave(employees, 'Ex-Employee', 'check_out_date')
+                message = 'Checked out'
+            else:
+                _leave(employees, 'Check-in', 'shift_out_date')
+                message = 'Shifted out; awaiting a room'
+            results.update((id(request), _result(request, employee, 'Done', message)) for request, employee in accepted)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    db.session.expire_all()
+    return [results[id(request)] for request in requests]
@@ -0,0 +1,89 @@
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Every SnapshotCache registers itself here against the models it depends on.
+_caches_by_model = {}
+
+
+class SnapshotCache:
+    """Process-local snapshot of an expensive query result.
+
+    The snapshot lives for the number of seconds configured under `ttl_config_key`
+    (0 disables caching) and is dropped as soon as a transaction that wrote one of
+    the watched models commits.
+    """
+
+    def __init__(self, ttl_config_key, *models):
+        self.ttl_config_key = ttl_config_key
+        self._lock = threading.Lock()
+        self._value = None
+        self._expires_at = 0.0
+        self._generation = 0
+        for model in models:
+            _caches_by_model.setdefault(model, []).append(self)
+
+    def get(self, compute):
+        ttl = current_app.config.get(self.ttl_config_key, 0)
+        if not ttl:
+            return compute()
+
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires_at:
+                return self._value
+            generation = self._generation
+
+        value = compute()
+
+        with self._lock:
+            # Only keep the result if nothing was written while it was being computed.
+            if generation == self._generation:
+                self._value = value
+                self._expires_at = time.monotonic() + ttl
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._value = None
+
+
+def invalidate_for(*models):
+    """Drops every snapshot that depends on the given models (for raw SQL / bulk writes)."""
+    for model in models:
+        for cache in _caches_by_model.get(model, []):
+            cache.invalidate()
+
+
+def _mark_dirty(session, models):
+    session.info.setdefault('dirty_snapshot_models', set()).update(models)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flushed_models(session, flush_context):
+    touched = {type(obj) for obj in (*session.new, *session.dirty, *session.deleted)}
+    watched = touched.intersection(_caches_by_model)
+    if watched:
+        _mark_dirty(session, watched)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk_statements(orm_execute_state):
+    # Query.update()/delete() and ORM-enabled insert/update/delete statements bypass the flush.
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    watched = {mapper.class_ for mapper in orm_execute_state.all_mappers}.intersection(_caches_by_model)
+    if watched:
+        _mark_dirty(orm_execute_state.session, watched)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    invalidate_for(*session.info.pop('dirty_snapshot_models', ()))
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_on_rollback(session, previous_transaction):
+    session.info.pop('dirty_snapshot_models', None)
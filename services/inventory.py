@@ -0,0 +1,495 @@
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import update, delete, insert, func, case, bindparam
+from sqlalchemy.exc import IntegrityError
+from models import db, InventoryItem, InventoryStock, InventoryConsumption, InventoryTransaction, Employee, Camp
+from services.beds import ID_BATCH_SIZE
+
+
+# Employees stock can be issued to
+RECIPIENT_STATUSES = ['Active', 'Vacation']
+# Recipients of one batch distribution
+MAX_BATCH_RECIPIENTS = 5000
+
+
+class StockError(ValueError):
+    """A stock movement was refused (nothing has been changed)."""
+
+
+def _today():
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+def default_location():
+    """The store that holds stock recorded without a location (and all stock from before locations)."""
+    return current_app.config.get('INVENTORY_DEFAULT_LOCATION', 'Main Store')
+
+
+def _add_to_row(model, keys, quantity):
+    """Adds `quantity` (possibly negative) to the `quantity` of the `model` row identified by
+    the unique `keys`, creating the row the first time."""
+    statement = (update(model)
+                 .where(*(getattr(model, name) == value for name, value in keys.items()))
+                 .values(quantity=model.quantity + quantity)
+                 .execution_options(synchronize_session=False))
+    if db.session.execute(statement).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(model), [{**keys, 'quantity': quantity}])
+    except IntegrityError:
+        # Another request created the row first; add to it instead.
+        db.session.execute(statement)
+
+
+def _add_location_stock(item_id, location, quantity):
+    """Adds `quantity` (possibly negative) to the item's balance at `location`, creating the
+    balance row the first time stock arrives there."""
+    _add_to_row(InventoryStock, {'item_id': item_id, 'location': location}, quantity)
+
+
+def _add_consumption(item_id, location, room_number, date, quantity):
+    """Adds `quantity` (negative to take an issue back) to the daily consumption rollup; issues
+    without a date are left out of it."""
+    if not date:
+        return
+    _add_to_row(InventoryConsumption, {'item_id': item_id, 'location': location or default_location(),
+                                       'room_number': room_number or '', 'day': date[:10]}, quantity)
+
+
+def _take_location_stock(item_id, location, quantity):
+    """Conditionally takes `quantity` from the item's balance at `location`; False if it is not there."""
+    result = db.session.execute(
+        update(InventoryStock)
+        .where(InventoryStock.item_id == item_id, InventoryStock.location == location,
+               InventoryStock.quantity >= quantity)
+        .values(quantity=InventoryStock.quantity - quantity)
+        .execution_options(synchronize_session=False))
+    return result.rowcount == 1
+
+
+def receive_stock(item_id, quantity, location=None):
+    """Atomically adds received stock to an item, to its balance at `location` (the default store
+    when not given) and to its running received total. Returns False if the item does not exist."""
+    result = db.session.execute(
+        update(InventoryItem).where(InventoryItem.id == item_id)
+        .values(quantity=InventoryItem.quantity + quantity,
+                received_total=InventoryItem.received_total + quantity)
+        .execution_options(synchronize_session=False))
+    if result.rowcount != 1:
+        return False
+    _add_location_stock(item_id, location or default_location(), quantity)
+    return True
+
+
+def receive_stock_bulk(increments):
+    """Adds {(item id, location): quantity} of received stock with one executemany UPDATE of the
+    items, keeping the running received totals and the location balances in step (the caller commits)."""
+    if not increments:
+        return
+    per_item = {}
+    for (item_id, _), quantity in increments.items():
+        per_item[item_id] = per_item.get(item_id, 0) + quantity
+    table = InventoryItem.__table__
+    db.session.execute(
+        update(table).where(table.c.id == bindparam('b_id'))
+        .values(quantity=table.c.quantity + bindparam('b_quantity'),
+                received_total=table.c.received_total + bindparam('b_quantity')),
+        [{'b_id': item_id, 'b_quantity': quantity} for item_id, quantity in per_item.items()])
+    for (item_id, location), quantity in increments.items():
+        _add_location_stock(item_id, location or default_location(), quantity)
+
+
+def issue_stock(item_id, quantity, location=None):
+    """Atomically takes `quantity` out of an item's stock at `location` (the default store when
+    not given) and adds it to its running distributed total; a negative quantity puts units
+    back (an issue reduced or deleted).
+
+    Taking stock only happens if that much is on hand at the location. The check and the write
+    are one conditional UPDATE, so two requests racing for the last units cannot both succeed:
+    the database serialises the row update and re-checks the condition for the second one.
+    Returns False when the stock (or the item) is not there.
+    """
+    location = location or default_location()
+    if quantity > 0 and not _take_location_stock(item_id, location, quantity):
+        return False
+    statement = update(InventoryItem).where(InventoryItem.id == item_id)
+    if quantity > 0:
+        statement = statement.where(InventoryItem.quantity >= quantity)
+    result = db.session.execute(
+        statement.values(quantity=InventoryItem.quantity - quantity,
+                         distributed_total=InventoryItem.distributed_total + quantity)
+        .execution_options(synchronize_session=False))
+    if result.rowcount == 1 and quantity < 0:
+        _add_location_stock(item_id, location, -quantity)
+    return result.rowcount == 1
+
+
+def stock_locations():
+    """Stores stock can be held at: the default store, every camp location and any other
+    location that already holds a balance."""
+    names = {location for (location,) in db.session.query(Camp.location).filter(Camp.location.isnot(None)).distinct()}
+    names |= {location for (location,) in db.session.query(InventoryStock.location).distinct()}
+    names.discard(default_location())
+    return [default_location()] + sorted(names)
+
+
+def seed_location_stock():
+    """Puts the stock of items that have no location balances yet (stock recorded before
+    locations existed) into the default store. Returns the number of items seeded."""
+    located = db.session.query(InventoryStock.item_id).distinct()
+    rows = [{'item_id': item_id, 'location': default_location(), 'quantity': quantity}
+            for item_id, quantity in db.session.query(InventoryItem.id, InventoryItem.quantity).filter(
+                InventoryItem.id.notin_(located), InventoryItem.quantity != 0)]
+    if rows:
+        db.session.execute(insert(InventoryStock), rows)
+    return len(rows)
+
+
+def find_items(names):
+    """{lower-case name: (id, name)} of the items matching `names` case-insensitively."""
+    found = {}
+    lowered = list({name.lower() for name in names})
+    for start in range(0, len(lowered), ID_BATCH_SIZE):
+        found.update((name.lower(), (item_id, name)) for item_id, name in db.session.query(
+            InventoryItem.id, InventoryItem.name).filter(func.lower(InventoryItem.name).in_(lowered[start:start + ID_BATCH_SIZE])))
+    return found
+
+
+def transaction_history_query(transaction_type, date_from=None, date_to=None, item_id=None, supplier=None,
+                              emp_id=None, location=None):
+    """Transactions of one type narrowed by the history page filters, all applied in SQL.
+
+    Dates are the stored 'YYYY-MM-DD' strings, so the range is a plain comparison that the
+    (type, date) index serves; `supplier` matches part of the name, `emp_id` is exact and
+    `location` matches either end of a transfer.
+    """
+    query = InventoryTransaction.query.filter(InventoryTransaction.type == transaction_type)
+    if date_from:
+        query = query.filter(InventoryTransaction.date >= date_from)
+    if date_to:
+        query = query.filter(InventoryTransaction.date <= date_to)
+    if item_id:
+        query = query.filter(InventoryTransaction.item_id == item_id)
+    if supplier:
+        query = query.filter(InventoryTransaction.supplier_name.ilike(f'%{supplier}%'))
+    if emp_id:
+        query = query.filter(InventoryTransaction.emp_id == emp_id)
+    if location:
+        query = query.filter((InventoryTransaction.location == location) | (InventoryTransaction.to_location == location))
+    return query
+
+
+def backfill_transaction_dates():
+    """Sets the date of undated transactions (from before dates were required) to '', so the
+    history's (date, id) keyset, which NULLs would drop out of, sees them. Returns the number
+    of transactions changed; the caller commits."""
+    return db.session.execute(
+        update(InventoryTransaction).where(InventoryTransaction.date.is_(None)).values(date='')
+        .execution_options(synchronize_session=False)).rowcount
+
+
+def rebuild_consumption():
+    """Recomputes the daily consumption rollup from the 'Outgoing' transactions with one grouped
+    INSERT ... SELECT (the caller commits). Returns the number of rollup rows written."""
+    db.session.execute(delete(InventoryConsumption))
+    location = func.coalesce(InventoryTransaction.location, default_location())
+    room_number = func.coalesce(InventoryTransaction.room_number, '')
+    day = func.substr(InventoryTransaction.date, 1, 10)
+    grouped = db.session.query(
+        InventoryTransaction.item_id, location, room_number, day, func.sum(InventoryTransaction.quantity)
+    ).filter(InventoryTransaction.type == 'Outgoing', func.coalesce(InventoryTransaction.date, '') != '').group_by(
+        InventoryTransaction.item_id, location, room_number, day)
+    db.session.execute(insert(InventoryConsumption).from_select(
+        ['item_id', 'location', 'room_number', 'day', 'quantity'], grouped))
+    return db.session.query(func.count(InventoryConsumption.id)).scalar()
+
+
+def _ledger_balances():
+    """Query of (item, received, distributed, location stock) per item, summed from the
+    transaction ledger in one grouped pass (covered by ix_inventory_transaction_item_type) and
+    outer-joined to the items so items without transactions come back with zeros."""
+    sums = db.session.query(
+        InventoryTransaction.item_id.label('item_id'),
+        func.sum(case((InventoryTransaction.type == 'Incoming', InventoryTransaction.quantity), else_=0)).label('received'),
+        func.sum(case((InventoryTransaction.type == 'Outgoing', InventoryTransaction.quantity), else_=0)).label('distributed'),
+    ).group_by(InventoryTransaction.item_id).subquery()
+    located = db.session.query(
+        InventoryStock.item_id.label('item_id'), func.sum(InventoryStock.quantity).label('quantity')
+    ).group_by(InventoryStock.item_id).subquery()
+    return db.session.query(
+        InventoryItem.id, InventoryItem.name, InventoryItem.quantity,
+        InventoryItem.received_total, InventoryItem.distributed_total,
+        func.coalesce(sums.c.received, 0).label('received'),
+        func.coalesce(sums.c.distributed, 0).label('distributed'),
+        func.coalesce(located.c.quantity, 0).label('location_stock'),
+    ).outerjoin(sums, sums.c.item_id == InventoryItem.id).outerjoin(
+        located, located.c.item_id == InventoryItem.id).order_by(InventoryItem.name)
+
+
+def _ledger_location_balances(item_ids):
+    """{(item id, location): stock} of the given items as the transaction ledger has it:
+    receipts minus issues per location, transfers moved from their source to their destination.
+    Transactions from before locations count against the default store."""
+    location = func.coalesce(InventoryTransaction.location, default_location())
+    signed = case((InventoryTransaction.type == 'Incoming', InventoryTransaction.quantity),
+                  else_=-InventoryTransaction.quantity)
+    balances = {}
+    for start in range(0, len(item_ids), ID_BATCH_SIZE):
+        batch = item_ids[start:start + ID_BATCH_SIZE]
+        for item_id, name, quantity in db.session.query(
+                InventoryTransaction.item_id, location, func.sum(signed)
+        ).filter(InventoryTransaction.item_id.in_(batch),
+                 InventoryTransaction.type.in_(['Incoming', 'Outgoing', 'Transfer'])).group_by(
+                InventoryTransaction.item_id, location):
+            balances[(item_id, name)] = balances.get((item_id, name), 0) + quantity
+        for item_id, name, quantity in db.session.query(
+                InventoryTransaction.item_id, InventoryTransaction.to_location, func.sum(InventoryTransaction.quantity)
+        ).filter(InventoryTransaction.item_id.in_(batch), InventoryTransaction.type == 'Transfer').group_by(
+                InventoryTransaction.item_id, InventoryTransaction.to_location):
+            balances[(item_id, name)] = balances.get((item_id, name), 0) + quantity
+    return balances
+
+
+def rebuild_ledger_totals():
+    """Recomputes every item's received/distributed totals from the transaction ledger with one
+    grouped query and one batched UPDATE. Returns the number of items whose totals changed."""
+    updates = [{'id': row.id, 'received_total': row.received, 'distributed_total': row.distributed}
+               for row in _ledger_balances()
+               if (row.received_total, row.distributed_total) != (row.received, row.distributed)]
+    if updates:
+        db.session.execute(update(InventoryItem), updates)
+    return len(updates)
+
+
+def ledger_drift():
+    """Items whose stock, running totals or location balances disagree with the transaction ledger.
+
+    The expected stock is everything received minus everything distributed; the item's balances
+    across its locations should add up to it too. Returns one dict per drifting item: {'id',
+    'name', 'quantity', 'expected', 'drift', 'location_stock', 'received_total', 'received',
+    'distributed_total', 'distributed'}, where drift = quantity - expected and location_stock is
+    the sum of the location balances.
+    """
+    report = []
+    for row in _ledger_balances():
+        expected = row.received - row.distributed
+        quantity = row.quantity or 0
+        if (quantity, row.location_stock, row.received_total, row.distributed_total) != (
+                expected, expected, row.received, row.distributed):
+            report.append({
+                'id': row.id, 'name': row.name, 'quantity': quantity, 'expected': expected,
+                'drift': quantity - expected, 'location_stock': row.location_stock,
+                'received_total': row.received_total, 'received': row.received,
+                'distributed_total': row.distributed_total, 'distributed': row.distributed,
+            })
+    return report
+
+
+def fix_ledger_drift(report):
+    """Sets the items of a ledger_drift() report to their ledger balance and totals, and rebuilds
+    their location balances from the ledger, so they still add up to the item's stock (the
+    caller commits). An item whose stock moved since the report was taken is left alone, as
+    the ledger moved with it. Returns the number of items corrected."""
+    fixed = []
+    for row in report:
+        result = db.session.execute(
+            update(InventoryItem).where(InventoryItem.id == row['id'],
+                                        func.coalesce(InventoryItem.quantity, 0) == row['quantity'])
+            .values(quantity=row['expected'], received_total=row['received'], distributed_total=row['distributed'])
+            .execution_options(synchronize_session=False))
+        if result.rowcount == 1:
+            fixed.append(row['id'])
+    if fixed:
+        for start in range(0, len(fixed), ID_BATCH_SIZE):
+            db.session.execute(delete(InventoryStock).where(InventoryStock.item_id.in_(fixed[start:start + ID_BATCH_SIZE]))
+                               .execution_options(synchronize_session=False))
+        rows = [{'item_id': item_id, 'location': location, 'quantity': quantity}
+                for (item_id, location), quantity in _ledger_location_balances(fixed).items() if quantity]
+        if rows:
+            db.session.execute(insert(InventoryStock), rows)
+    return len(fixed)
+
+
+def _refresh(item):
+    # The UPDATEs above bypass the ORM, so reload the figures the caller may display.
+    if item is not None:
+        db.session.refresh(item, ['quantity', 'received_total', 'distributed_total'])
+
+
+def record_incoming(item, quantity, date=None, supplier_name=None, lpo_number=None, file_path=None, location=None):
+    """Adds stock received at `location` and its 'Incoming' transaction to the session (the caller commits)."""
+    if quantity <= 0:
+        raise StockError('Quantity must be a positive number.')
+    location = location or default_location()
+    if not receive_stock(item.id, quantity, location):
+        raise StockError('Item not found.')
+    transaction = InventoryTransaction(
+        item_id=item.id, item_name=item.name, type='Incoming', quantity=quantity,
+        date=date or _today(), supplier_name=supplier_name, lpo_number=lpo_number, file_path=file_path,
+        location=location
+    )
+    db.session.add(transaction)
+    _refresh(item)
+    return transaction
+
+
+def record_outgoing(item, quantity, emp_id, room_number=None, date=None, file_path=None, location=None):
+    """Takes stock out of `location` for an employee and adds its 'Outgoing' transaction (the caller commits)."""
+    if quantity <= 0:
+        raise StockError('Quantity must be a positive number.')
+    location = location or default_location()
+    date = date or _today()
+    if not issue_stock(item.id, quantity, location):
+        raise StockError(f'Not enough stock for this item at {location}.')
+    _add_consumption(item.id, location, room_number, date, quantity)
+    transaction = InventoryTransaction(
+        item_id=item.id, item_name=item.name, type='Outgoing', quantity=quantity,
+        date=date, emp_id=emp_id, room_number=room_number, file_path=file_path, location=location
+    )
+    db.session.add(transaction)
+    _refresh(item)
+    return transaction
+
+
+def change_outgoing(transaction, new_quantity, date):
+    """Changes the quantity and date of an 'Outgoing' transaction, moving the difference in stock
+    and in the consumption rollup.
+
+    The transaction row is only rewritten if it still holds the quantity and date this request
+    read, so two people editing the same distribution cannot both adjust from the same base.
+    """
+    if new_quantity <= 0:
+        raise StockError('Quantity must be a positive number.')
+    if not date:
+        raise StockError('A date is required.')
+    original_quantity, original_date = transaction.quantity, transaction.date
+    changed = db.session.execute(
+        update(InventoryTransaction).where(InventoryTransaction.id == transaction.id,
+                                           InventoryTransaction.quantity == original_quantity,
+                                           InventoryTransaction.date.is_not_distinct_from(original_date))
+        .values(quantity=new_quantity, date=date)
+        .execution_options(synchronize_session=False))
+    if changed.rowcount != 1:
+        raise StockError('The transaction was changed by someone else; reload it and try again.')
+    if not issue_stock(transaction.item_id, new_quantity - original_quantity, transaction.location):
+        raise StockError('Not enough stock for this item.')
+    _add_consumption(transaction.item_id, transaction.location, transaction.room_number, original_date, -original_quantity)
+    _add_consumption(transaction.item_id, transaction.location, transaction.room_number, date, new_quantity)
+    db.session.refresh(transaction)
+    _refresh(transaction.item)
+
+
+def remove_outgoing(transaction):
+    """Deletes an 'Outgoing' transaction and returns its quantity to stock.
+
+    The stock is restored only by the request that actually deleted the row, and only if the
+    row still holds the quantity this request read, so a repeated delete cannot put the same
+    units back twice and a concurrent edit cannot be restored at its old quantity.
+    """
+    deleted = db.session.execute(
+        delete(InventoryTransaction).where(InventoryTransaction.id == transaction.id,
+                                           InventoryTransaction.type == 'Outgoing',
+                                           InventoryTransaction.quantity == transaction.quantity,
+                                           InventoryTransaction.date.is_not_distinct_from(transaction.date))
+        .execution_options(synchronize_session=False))
+    if deleted.rowcount != 1:
+        raise StockError('The transaction was deleted or changed by someone else; reload it and try again.')
+    issue_stock(transaction.item_id, -transaction.quantity, transaction.location)
+    _add_consumption(transaction.item_id, transaction.location, transaction.room_number, transaction.date,
+                     -transaction.quantity)
+    db.session.expunge(transaction)
+
+
+def record_transfer(item, quantity, from_location, to_location, date=None):
+    """Moves stock between two locations and adds its 'Transfer' transaction (the caller commits).
+
+    Only the location balances change: the item's total stock and its received/distributed
+    totals are the same before and after.
+    """
+    if quantity <= 0:
+        raise StockError('Quantity must be a positive number.')
+    if not from_location or not to_location or from_location == to_location:
+        raise StockError('Choose two different locations.')
+    if not _take_location_stock(item.id, from_location, quantity):
+        raise StockError(f'Not enough stock for this item at {from_location}.')
+    _add_location_stock(item.id, to_location, quantity)
+    transaction = InventoryTransaction(
+        item_id=item.id, item_name=item.name, type='Transfer', quantity=quantity,
+        date=date or _today(), location=from_location, to_location=to_location
+    )
+    db.session.add(transaction)
+    return transaction
+
+
+def _recipient_result(emp_id, employee, outcome, message):
+    return {'emp_id': emp_id, 'name': employee.name if employee else None,
+            'room': employee.room if employee else None, 'outcome': outcome, 'message': message}
+
+
+def batch_recipients(accommodation=None, room=None, emp_ids=None):
+    """Resolves the recipients of a batch distribution in one query: the Active/Vacation
+    employees of a room (`accommodation` + `room`), of a whole `accommodation`, or of a list
+    of `emp_ids`. Returns (employees, skipped results); only a list can produce skips
+    (unknown, repeated or ineligible EMP IDs).
+    """
+    columns = (Employee.id, Employee.emp_id, Employee.name, Employee.room, Employee.status)
+    if emp_ids is None:
+        if not accommodation:
+            raise StockError('Choose an accommodation.')
+        query = db.session.query(*columns).filter(Employee.accommodation_name == accommodation,
+                                                  Employee.status.in_(RECIPIENT_STATUSES))
+        if room:
+            query = query.filter(Employee.room == room)
+        return query.order_by(Employee.room, Employee.emp_id).all(), []
+
+    if not emp_ids:
+        raise StockError('No EMP IDs were given.')
+    if len(emp_ids) > MAX_BATCH_RECIPIENTS:
+        raise StockError(f'At most {MAX_BATCH_RECIPIENTS} employees can be issued to at once.')
+    found = {}
+    unique_ids = list(dict.fromkeys(emp_ids))
+    for start in range(0, len(unique_ids), ID_BATCH_SIZE):
+        found.update((row.emp_id, row) for row in db.session.query(*columns).filter(
+            Employee.emp_id.in_(unique_ids[start:start + ID_BATCH_SIZE])))
+    employees, skipped, seen = [], [], set()
+    for emp_id in emp_ids:
+        employee = found.get(emp_id)
+        if employee is None:
+            skipped.append(_recipient_result(emp_id, None, 'Skipped', 'EMP ID not found'))
+        elif emp_id in seen:
+            skipped.append(_recipient_result(emp_id, employee, 'Skipped', 'Listed more than once'))
+        elif employee.status not in RECIPIENT_STATUSES:
+            skipped.append(_recipient_result(emp_id, employee, 'Skipped', f'Status is {employee.status}'))
+        else:
+            employees.append(employee)
+        seen.add(emp_id)
+    return employees, skipped
+
+
+def record_outgoing_batch(item, quantity_each, employees, date=None, location=None):
+    """Issues `quantity_each` of `item` from `location` to every employee with one stock check
+    and decrement and one bulk insert of their 'Outgoing' transactions (the caller commits).
+    Returns one 'Done' result per employee."""
+    if quantity_each <= 0:
+        raise StockError('Quantity must be a positive number.')
+    if not employees:
+        raise StockError('No eligible recipients were found.')
+    total = quantity_each * len(employees)
+    location = location or default_location()
+    if not issue_stock(item.id, total, location):
+        on_hand = db.session.query(InventoryStock.quantity).filter_by(item_id=item.id, location=location).scalar()
+        raise StockError(f'Not enough stock: {total} {item.name}(s) needed, {on_hand or 0} in stock at {location}.')
+    date = date or _today()
+    per_room = {}
+    for employee in employees:
+        per_room[employee.room] = per_room.get(employee.room, 0) + quantity_each
+    for room_number, quantity in per_room.items():
+        _add_consumption(item.id, location, room_number, date, quantity)
+    db.session.execute(insert(InventoryTransaction), [
+        {'item_id': item.id, 'item_name': item.name, 'type': 'Outgoing', 'quantity': quantity_each,
+         'date': date, 'emp_id': employee.emp_id, 'room_number': employee.room, 'location': location}
+        for employee in employees
+    ])
+    _refresh(item)
+    return [_recipient_result(employee.emp_id, employee, 'Done', f'{quantity_each} issued') for employee in employees]
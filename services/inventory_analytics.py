@@ -0,0 +1,96 @@
+import math
+from datetime import datetime, timedelta
+import pandas as pd
+from flask import current_app
+from sqlalchemy import func
+from models import db, InventoryItem, InventoryConsumption
+
+# Periods the consumption rollup can be summed over: label -> pandas period frequency
+CONSUMPTION_PERIODS = {'day': 'D', 'week': 'W-SUN', 'month': 'M'}
+# Breakdowns of the consumption report besides the item: label -> rollup column
+CONSUMPTION_BREAKDOWNS = {'location': 'location', 'room': 'room_number'}
+
+
+def consumption_report(period='month', breakdown=(), item_id=None, location=None, room=None,
+                       date_from=None, date_to=None):
+    """Units issued per item and `period` ('day', 'week' or 'month'), optionally split by
+    location and/or room (`breakdown`), newest period first.
+
+    The daily rollup is filtered and summed per day in SQL; the days are then bucketed into
+    periods with one vectorised pandas group-by, so the work depends on the number of rollup
+    rows, not on the number of issues. Returns a list of dicts {'period', 'item', 'quantity'}
+    plus 'location' / 'room' when broken down by them.
+    """
+    freq = CONSUMPTION_PERIODS.get(period, CONSUMPTION_PERIODS['month'])
+    columns = [getattr(InventoryConsumption, CONSUMPTION_BREAKDOWNS[name]).label(name)
+               for name in CONSUMPTION_BREAKDOWNS if name in breakdown]
+    query = db.session.query(
+        InventoryItem.name.label('item'), *columns, InventoryConsumption.day,
+        func.sum(InventoryConsumption.quantity).label('quantity')
+    ).join(InventoryItem, InventoryItem.id == InventoryConsumption.item_id)
+    if item_id:
+        query = query.filter(InventoryConsumption.item_id == item_id)
+    if location:
+        query = query.filter(InventoryConsumption.location == location)
+    if room:
+        query = query.filter(InventoryConsumption.room_number == room)
+    if date_from:
+        query = query.filter(InventoryConsumption.day >= date_from)
+    if date_to:
+        query = query.filter(InventoryConsumption.day <= date_to)
+    query = query.group_by(InventoryItem.name, *columns, InventoryConsumption.day)
+
+    keys = ['item'] + [column.name for column in columns]
+    df = pd.DataFrame(query.all(), columns=keys + ['day', 'quantity'])
+    if df.empty:
+        return []
+    days = pd.to_datetime(df['day'], format='%Y-%m-%d', errors='coerce')
+    df = df[days.notna()]
+    df['period'] = days[days.notna()].dt.to_period(freq)
+    totals = df.groupby(['period'] + keys, sort=False)['quantity'].sum().reset_index()
+    totals = totals[totals['quantity'] != 0].sort_values(['period', 'item'] + keys[1:], ascending=[False] + [True] * len(keys))
+    if period == 'week':
+        totals['period'] = totals['period'].dt.start_time.dt.strftime('Week of %Y-%m-%d')
+    else:
+        totals['period'] = totals['period'].astype(str)
+    totals['quantity'] = totals['quantity'].astype(int)
+    return totals[['period'] + keys + ['quantity']].to_dict('records')
+
+
+def reorder_report(today=None):
+    """Consumption rate, reorder point and projected stock-out date of every item.
+
+    The daily rate is the units issued over the last INVENTORY_USAGE_WINDOW_DAYS (one grouped
+    query on the rollup) divided by the window; the reorder point covers the supplier lead
+    time plus the safety stock at that rate. Returns {item id: {'daily_usage', 'reorder_point',
+    'days_left', 'stockout_date', 'status'}}, status being 'Out of stock', 'Reorder' or 'OK';
+    items that were not issued in the window have no rate and no stock-out date.
+    """
+    config = current_app.config
+    window = max(config.get('INVENTORY_USAGE_WINDOW_DAYS', 30), 1)
+    cover = config.get('INVENTORY_REORDER_LEAD_DAYS', 7) + config.get('INVENTORY_SAFETY_STOCK_DAYS', 7)
+    today = today or datetime.now().date()
+    start = (today - timedelta(days=window - 1)).strftime('%Y-%m-%d')
+    used = dict(db.session.query(InventoryConsumption.item_id, func.sum(InventoryConsumption.quantity)).filter(
+        InventoryConsumption.day >= start, InventoryConsumption.day <= today.strftime('%Y-%m-%d')
+    ).group_by(InventoryConsumption.item_id).all())
+
+    report = {}
+    for item_id, quantity in db.session.query(InventoryItem.id, InventoryItem.quantity):
+        quantity = quantity or 0
+        daily = max(used.get(item_id) or 0, 0) / window
+        reorder_point = math.ceil(daily * cover)
+        days_left = stockout_date = None
+        if daily:
+            days_left = max(quantity, 0) / daily
+            stockout_date = (today + timedelta(days=math.floor(days_left))).strftime('%Y-%m-%d')
+        if quantity <= 0:
+            status = 'Out of stock'
+        elif daily and quantity <= reorder_point:
+            status = 'Reorder'
+        else:
+            status = 'OK'
+        report[item_id] = {'daily_usage': round(daily, 2), 'reorder_point': reorder_point,
+                           'days_left': None if days_left is None else math.floor(days_left),
+                           'stockout_date': stockout_date, 'status': status}
+    return report
@@ -0,0 +1,71 @@
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import insert
+from models import db, InventoryItem, InventoryTransaction
+from services.inventory import find_items, receive_stock_bulk, default_location
+from services.jobs import NULL_PROGRESS
+from services.spreadsheet import iter_chunks
+from services.validation import (validate_receipt_chunks, check_report, parse_dates, receipt_columns,
+                                 receipt_quantities)
+
+
+def import_receipts_file(path, progress=NULL_PROGRESS, dry_run=False, create_items=False, location=None):
+    """Records a delivery note received at `location`: one 'Incoming' transaction per spreadsheet row.
+
+    Item names are resolved in one lookup while the file is validated; with `create_items`,
+    unknown items are added in one bulk insert. Transactions are bulk-inserted chunk by chunk
+    and the stock of each item is raised once by its total, all in a single transaction.
+    Returns a summary dict (or only the validation report when `dry_run` is set).
+    """
+    progress.stage('Validating')
+    report, items = validate_receipt_chunks(iter_chunks(path), find_items, create_items=create_items,
+                                            dry_run=dry_run)
+    if dry_run:
+        return report
+    check_report(report)
+
+    progress.stage('Committing', rows_total=report['rows'])
+    today = datetime.now().strftime('%Y-%m-%d')
+    location = location or default_location()
+    increments = {}
+    items_created = 0
+
+    for df in iter_chunks(path):
+        item_column, quantity_column, supplier_column, lpo_column, date_column = receipt_columns(df)
+        names = df[item_column].astype(str).str.strip()
+        quantities = receipt_quantities(df[quantity_column]).astype(int)
+        dates = parse_dates(df[date_column]) if date_column else None
+
+        new_items = {}  # spelled as on their first row
+        for name in names:
+            if name.lower() not in items:
+                new_items.setdefault(name.lower(), name)
+        new_names = list(new_items.values())
+        if new_names:
+            db.session.execute(insert(InventoryItem), [{'name': name, 'quantity': 0} for name in new_names])
+            items.update(find_items(new_names))
+            items_created += len(new_names)
+
+        rows = []
+        for index in df.index:
+            item_id, item_name = items[names[index].lower()]
+            rows.append(dict(
+                item_id=item_id, item_name=item_name, type='Incoming', quantity=int(quantities[index]),
+                date=dates[index].strftime('%Y-%m-%d') if dates is not None and pd.notna(dates[index]) else today,
+                supplier_name=df.at[index, supplier_column] if supplier_column else None,
+                lpo_number=df.at[index, lpo_column] if lpo_column else None,
+                location=location,
+            ))
+            increments[item_id, location] = increments.get((item_id, location), 0) + rows[-1]['quantity']
+        if rows:
+            db.session.execute(insert(InventoryTransaction), rows)
+        progress.advance(len(rows))
+
+    receive_stock_bulk(increments)
+    db.session.commit()
+    total = sum(increments.values())
+    return {
+        'inserted': report['rows'], 'items': len(increments), 'items_created': items_created, 'quantity': total,
+        'message': f"{report['rows']} receipt line(s) recorded at {location}: {total} unit(s) of {len(increments)} item(s)"
+                   + (f", {items_created} new item(s) created." if items_created else "."),
+    }
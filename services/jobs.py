@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app, request, redirect, url_for, jsonify
+from flask_login import current_user
+from sqlalchemy import update
+from werkzeug.utils import secure_filename
+from models import db, ImportJob
+from services.validation import ImportValidationError
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ('Completed', 'Failed')
+
+_executor = None
+_executor_lock = threading.Lock()
+# Live counters of jobs running in this process; the database copy is refreshed at stage changes.
+_live_progress = {}
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=current_app.config.get('JOB_WORKERS', 2),
+                                           thread_name_prefix='import-job')
+        return _executor
+
+
+class JobProgress:
+    """Progress reporter handed to importers.
+
+    Counters are kept in memory while the import transaction is open (SQLite allows a single
+    writer, so progress rows cannot be committed alongside it) and persisted on every stage change.
+    """
+
+    def __init__(self, job_id=None):
+        self.job_id = job_id
+        self.rows_total = 0
+        self.rows_processed = 0
+
+    def stage(self, status, rows_total=None):
+        if rows_total is not None:
+            self.rows_total = rows_total
+        self._publish(status=status, persist=True)
+
+    def advance(self, rows):
+        self.rows_processed += rows
+        self._publish()
+
+    def _publish(self, status=None, persist=False):
+        if self.job_id is None:
+            return
+        live = _live_progress.setdefault(self.job_id, {})
+        live.update(rows_total=self.rows_total, rows_processed=self.rows_processed)
+        if status:
+            live['status'] = status
+        if persist:
+            _save_job(self.job_id, **live)
+
+
+# Used when an importer runs outside a job (e.g. from the CLI).
+NULL_PROGRESS = JobProgress()
+
+
+def _save_job(job_id, **values):
+    # Written on its own connection so progress is visible while the import session is open.
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(update(ImportJob).where(ImportJob.id == job_id).values(**values))
+    except Exception as e:
+        logger.warning("Could not record progress of job %s: %s", job_id, e)
+
+
+def submit_job(kind, file_storage, handler, **options):
+    """Saves the uploaded file, records a queued ImportJob and runs `handler` on the job pool.
+
+    `handler(path, progress=..., **options)` must return a JSON-serialisable summary.
+    """
+    job_id = uuid.uuid4().hex
+    jobs_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'jobs')
+    os.makedirs(jobs_folder, exist_ok=True)
+    filename = secure_filename(file_storage.filename) or 'upload'
+    path = os.path.join(jobs_folder, f'{job_id}_{filename}')
+    file_storage.save(path)
+
+    job = ImportJob(id=job_id, kind=kind, filename=file_storage.filename, status='Queued',
+                    created_by=current_user.id if current_user.is_authenticated else None, created_at=_now())
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    _get_executor().submit(_run_job, app, job_id, handler, path, options)
+    return job
+
+
+def _run_job(app, job_id, handler, path, options):
+    with app.app_context():
+        progress = JobProgress(job_id)
+        try:
+            progress.stage('Parsing')
+            result = handler(path, progress=progress, **options)
+            _save_job(job_id, status='Completed', rows_total=progress.rows_total,
+                      rows_processed=progress.rows_processed, result=json.dumps(result, default=str),
+                      finished_at=_now())
+        except ImportValidationError as e:
+            # Rejected before any write; the per-row report is kept as the job result.
+            db.session.rollback()
+            logger.info("Import job %s rejected: %s", job_id, e)
+            _save_job(job_id, status='Failed', rows_total=progress.rows_total,
+                      rows_processed=progress.rows_processed, error=str(e),
+                      result=json.dumps(e.report, default=str), finished_at=_now())
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("Import job %s failed", job_id)
+            # KeyError wraps its message in quotes; report the bare message instead.
+            error = e.args[0] if isinstance(e, KeyError) and e.args else str(e)
+            _save_job(job_id, status='Failed', rows_total=progress.rows_total,
+                      rows_processed=progress.rows_processed, error=str(error), finished_at=_now())
+        finally:
+            _live_progress.pop(job_id, None)
+            db.session.remove()
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def job_status(job):
+    """The job as a dict, overlaid with live counters if it is running in this process."""
+    data = job.to_dict()
+    if data['status'] not in FINISHED_STATUSES:
+        data.update(_live_progress.get(job.id, {}))
+    return data
+
+
+def job_accepted(job):
+    """Response for an upload route: 202 + JSON for API clients, otherwise the job status page."""
+    status_url = url_for('jobs.job_detail', job_id=job.id)
+    if request.accept_mimetypes.best == 'application/json':
+        response = jsonify({'job_id': job.id, 'status_url': status_url})
+        response.status_code = 202
+        response.headers['Location'] = status_url
+        return response
+    return redirect(url_for('jobs.job_page', job_id=job.id))
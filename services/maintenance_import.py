@@ -0,0 +1,42 @@
+from datetime import datetime
+from sqlalchemy import insert
+from models import db, MaintenanceReport
+from services.jobs import NULL_PROGRESS
+from services.spreadsheet import iter_chunks
+from services.validation import validate_maintenance_chunks, check_report
+
+
+def import_maintenance_file(path, progress=NULL_PROGRESS, dry_run=False):
+    """Adds one MaintenanceReport per spreadsheet row after validating the whole file.
+
+    The file is streamed twice (validate, then insert) so memory stays bounded by the chunk size.
+    Returns a summary dict (or only the validation report when `dry_run` is set).
+    """
+    progress.stage('Validating')
+    report = validate_maintenance_chunks(iter_chunks(path), dry_run=dry_run)
+    if dry_run:
+        return report
+    check_report(report)
+
+    progress.stage('Committing', rows_total=report['rows'])
+    today = datetime.now().strftime('%Y-%m-%d')
+    for df in iter_chunks(path):
+        df = df.fillna('N/A')
+        rows = [
+            dict(
+                block=row.get('Block', 'N/A'),
+                section=row.get('Section', 'N/A'),
+                report_date=row.get('Report Date', today),
+                details=row.get('Details', 'N/A'),
+                status=row.get('Status', 'Open'),
+                concern=row.get('Concern', 'N/A'),
+                risk=row.get('Risk', 'Low'),
+                remarks=row.get('Remarks', 'N/A')
+            )
+            for row in df.to_dict('records')
+        ]
+        if rows:
+            db.session.execute(insert(MaintenanceReport), rows)
+        progress.advance(len(rows))
+    db.session.commit()
+    return {'inserted': report['rows']}
@@ -0,0 +1,75 @@
+from sqlalchemy import func, case, and_
+from models import db, Employee, Room, Bed
+from services.cache import SnapshotCache
+
+# Statuses that count as physically occupying a bed.
+OCCUPYING_STATUSES = ['Active', 'Vacation', 'On Leave']
+# Rollup entry for an accommodation that has no beds or employees yet.
+EMPTY_ROLLUP = {'total_beds': 0, 'occupied': 0, 'vacant': 0, 'awaiting': 0}
+
+_summary_cache = SnapshotCache('OCCUPANCY_CACHE_TTL', Employee, Bed)
+_rollup_cache = SnapshotCache('OCCUPANCY_CACHE_TTL', Employee, Bed)
+
+
+def get_occupancy_summary():
+    """Returns the dashboard headline counters (cached snapshot when OCCUPANCY_CACHE_TTL is set)."""
+    return _summary_cache.get(_compute_occupancy_summary)
+
+
+def get_accommodation_rollup():
+    """Bed counts per accommodation name: {name: {'total_beds', 'occupied', 'vacant', 'awaiting'}}.
+
+    Accommodations without any beds or employees are absent; use EMPTY_ROLLUP for them. Cached like
+    get_occupancy_summary() and invalidated whenever Employee or Bed rows change.
+    """
+    return _rollup_cache.get(_compute_accommodation_rollup)
+
+
+def _count_where(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _compute_accommodation_rollup():
+    """One grouped query over the beds and one over the employees of every accommodation."""
+    rollup = {}
+    for name, total, vacant in db.session.query(
+        Room.accommodation_name, func.count(Bed.id), _count_where(Bed.status == 'Vacant'),
+    ).join(Bed.room).group_by(Room.accommodation_name):
+        rollup[name] = dict(EMPTY_ROLLUP, total_beds=total, vacant=vacant)
+    for name, occupied, awaiting in db.session.query(
+        Employee.accommodation_name,
+        _count_where(and_(Employee.status.in_(OCCUPYING_STATUSES), Employee.room.isnot(None))),
+        _count_where(and_(Employee.status == 'Check-in', Employee.room.is_(None))),
+    ).filter(Employee.accommodation_name.isnot(None)).group_by(Employee.accommodation_name):
+        rollup.setdefault(name, dict(EMPTY_ROLLUP)).update(occupied=occupied, awaiting=awaiting)
+    return rollup
+
+
+def _compute_occupancy_summary():
+    """Computes the dashboard counters from one conditional-aggregate query grouped by location
+    plus a count of the vacant beds (served by the Bed status index)."""
+    is_occupied = and_(Employee.status.in_(OCCUPYING_STATUSES), Employee.room.isnot(None))
+    rows = db.session.query(
+        Employee.location,
+        _count_where(is_occupied),
+        _count_where(Employee.status == 'Vacation'),
+        _count_where(Employee.status.in_(['Resigned', 'Terminated'])),
+        _count_where(and_(Employee.status == 'Check-in', Employee.room.is_(None))),
+    ).group_by(Employee.location).order_by(Employee.location).all()
+
+    summary = {
+        'total_employees': 0,
+        'total_vacant_beds': db.session.query(func.count(Bed.id)).filter(Bed.status == 'Vacant').scalar(),
+        'total_on_vacation': 0,
+        'total_resigned_terminated': 0,
+        'employees_without_room': 0,
+        'location_summary': [],
+    }
+    for location, occupied, vacation, resigned_terminated, awaiting in rows:
+        summary['total_employees'] += occupied
+        summary['total_on_vacation'] += vacation
+        summary['total_resigned_terminated'] += resigned_terminated
+        summary['employees_without_room'] += awaiting
+        if occupied:
+            summary['location_summary'].append((location, occupied))
+    return summary
@@ -0,0 +1,111 @@
+import base64
+import binascii
+import json
+from flask import request, url_for
+from sqlalchemy import tuple_, literal
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query plus the cursors needed to move around it."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, page_size=0, cursor_prefix=''):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.page_size = page_size
+        # Prepended to the ?after=/?before= names, so two paginated lists can share one page
+        self.cursor_prefix = cursor_prefix
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def url_for_next(self):
+        return _page_url(self.cursor_prefix, after=self.next_cursor) if self.has_next else None
+
+    def url_for_prev(self):
+        return _page_url(self.cursor_prefix, before=self.prev_cursor) if self.has_prev else None
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Returns the list of sort-key values stored in a cursor, or None if it is missing/garbled."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def get_page_size(default, maximum=500):
+    """Reads ?per_page= from the request, clamped to 1..maximum."""
+    try:
+        size = int(request.args.get('per_page', default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, maximum))
+
+
+def keyset_paginate(query, sort_keys, page_size, after=None, before=None, descending=False, cursor_prefix=''):
+    """Fetches one page of `query` ordered by `sort_keys` using keyset (seek) pagination.
+
+    `sort_keys` are column expressions compared as a row value, so they must all sort in the
+    same direction and the last one must be unique (usually the primary key). `after`/`before`
+    are cursors previously handed out by this function; pages built with a `cursor_prefix` link
+    to them as ?<prefix>after= / ?<prefix>before=.
+    """
+    cursor_values = decode_cursor(before) or decode_cursor(after)
+    if cursor_values is not None and len(cursor_values) != len(sort_keys):
+        cursor_values = None
+    backwards = cursor_values is not None and decode_cursor(before) is not None
+
+    if cursor_values is not None:
+        row_key = tuple_(*sort_keys)
+        cursor_key = tuple_(*[literal(value) for value in cursor_values])
+        if descending != backwards:
+            query = query.filter(row_key < cursor_key)
+        else:
+            query = query.filter(row_key > cursor_key)
+
+    order_desc = descending != backwards
+    ordering = [key.desc() if order_desc else key.asc() for key in sort_keys]
+    rows = query.add_columns(*sort_keys).order_by(None).order_by(*ordering).limit(page_size + 1).all()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    items = [row[0] for row in rows]
+    keys = [list(row[1:]) for row in rows]
+    if backwards:
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, cursor_values is not None
+
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor(keys[-1]) if has_next and keys else None,
+        prev_cursor=encode_cursor(keys[0]) if has_prev and keys else None,
+        page_size=page_size,
+        cursor_prefix=cursor_prefix,
+    )
+
+
+def _page_url(prefix='', **cursor):
+    args = request.args.to_dict()
+    args.pop(prefix + 'after', None)
+    args.pop(prefix + 'before', None)
+    args.update((prefix + name, value) for name, value in cursor.items())
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
@@ -0,0 +1,228 @@
+import logging
+from flask import current_app
+from sqlalchemy import case, column, or_, select, table
+from models import db, Employee
+from services.beds import ID_BATCH_SIZE
+from services.cache import SnapshotCache
+
+logger = logging.getLogger(__name__)
+
+def _contains(text):
+    """The baseline search: `text` anywhere in the EMP ID or the name, case-insensitively."""
+    return or_(Employee.emp_id.icontains(text, autoescape=True),
+               Employee.name.icontains(text, autoescape=True))
+
+
+def _prefix_first(text):
+    """Sort key putting EMP IDs, then names, that start with `text` ahead of other matches."""
+    return case(
+        (Employee.emp_id.istartswith(text, autoescape=True), 0),
+        (Employee.name.istartswith(text, autoescape=True), 1),
+        else_=2,
+    )
+
+
+class Fts5Search:
+    """SQLite FTS5 trigram index over emp_id/name, kept in sync by triggers on the employee table.
+
+    The trigram tokenizer matches any substring of three or more characters, so results are the
+    same as the other backends' "contains" search; shorter queries fall back to LIKE.
+    """
+
+    name = 'fts5'
+    _index = table('employee_search', column('rowid'), column('rank'), column('employee_search'))
+
+    def ensure_index(self):
+        with db.engine.begin() as conn:
+            existing = conn.exec_driver_sql(
+                "SELECT sql FROM sqlite_master WHERE type='table' AND name='employee_search'"
+            ).first()
+            if existing and 'trigram' not in existing[0]:
+                # Index from before substring search (word-prefix tokens): replace it.
+                conn.exec_driver_sql("DROP TABLE employee_search")
+                existing = None
+            conn.exec_driver_sql(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS employee_search USING fts5("
+                "emp_id, name, content='employee', content_rowid='id', tokenize='trigram')"
+            )
+            conn.exec_driver_sql(
+                "CREATE TRIGGER IF NOT EXISTS employee_search_ai AFTER INSERT ON employee BEGIN "
+                "INSERT INTO employee_search(rowid, emp_id, name) VALUES (new.id, new.emp_id, new.name); END"
+            )
+            conn.exec_driver_sql(
+                "CREATE TRIGGER IF NOT EXISTS employee_search_ad AFTER DELETE ON employee BEGIN "
+                "INSERT INTO employee_search(employee_search, rowid, emp_id, name) "
+                "VALUES ('delete', old.id, old.emp_id, old.name); END"
+            )
+            conn.exec_driver_sql(
+                "CREATE TRIGGER IF NOT EXISTS employee_search_au AFTER UPDATE OF emp_id, name ON employee BEGIN "
+                "INSERT INTO employee_search(employee_search, rowid, emp_id, name) "
+                "VALUES ('delete', old.id, old.emp_id, old.name); "
+                "INSERT INTO employee_search(rowid, emp_id, name) VALUES (new.id, new.emp_id, new.name); END"
+            )
+            if not existing:
+                self._rebuild(conn)
+
+    def rebuild(self):
+        self.ensure_index()
+        with db.engine.begin() as conn:
+            self._rebuild(conn)
+
+    def _rebuild(self, conn):
+        conn.exec_driver_sql("INSERT INTO employee_search(employee_search) VALUES ('rebuild')")
+
+    def _match(self, text):
+        # The whole text as one phrase: a substring of the emp_id or the name.
+        return self._index.c.employee_search.op('MATCH')('"{}"'.format(text.replace('"', '""')))
+
+    def filter_clause(self, text):
+        text = (text or '').strip()
+        if not text:
+            return None
+        if len(text) < 3:
+            return _contains(text)
+        return Employee.id.in_(select(self._index.c.rowid).where(self._match(text)))
+
+    def top_matches(self, text, limit, statuses=None):
+        text = (text or '').strip()
+        if not text:
+            return []
+        if len(text) < 3:
+            query, rank = Employee.query.filter(_contains(text)), Employee.name
+        else:
+            query = Employee.query.join(self._index, self._index.c.rowid == Employee.id).filter(self._match(text))
+            rank = self._index.c.rank
+        if statuses:
+            query = query.filter(Employee.status.in_(statuses))
+        return query.order_by(_prefix_first(text), rank).limit(limit).all()
+
+
+class TrigramSearch:
+    """PostgreSQL pg_trgm GIN indexes, which make ILIKE '%q%' an index lookup."""
+
+    name = 'trigram'
+
+    def ensure_index(self):
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_employee_emp_id_trgm ON employee USING gin (emp_id gin_trgm_ops)"
+            )
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_employee_name_trgm ON employee USING gin (name gin_trgm_ops)"
+            )
+
+    def rebuild(self):
+        self.ensure_index()
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("REINDEX INDEX ix_employee_emp_id_trgm")
+            conn.exec_driver_sql("REINDEX INDEX ix_employee_name_trgm")
+
+    def filter_clause(self, text):
+        text = (text or '').strip()
+        if not text:
+            return None
+        return _contains(text)
+
+    def top_matches(self, text, limit, statuses=None):
+        clause = self.filter_clause(text)
+        if clause is None:
+            return []
+        text = text.strip()
+        query = Employee.query.filter(clause)
+        if statuses:
+            query = query.filter(Employee.status.in_(statuses))
+        return query.order_by(_prefix_first(text), Employee.name).limit(limit).all()
+
+
+class PythonSearch:
+    """Fallback for other databases: an in-process list of lower-cased EMP IDs and names
+    scanned for the search text, so it finds the same substrings as the SQL backends.
+
+    The index is rebuilt lazily after any Employee write (see services.cache), or after
+    SEARCH_INDEX_TTL seconds to pick up writes made by other workers. Matches are ranked in
+    process, so the database is only handed bounded lists of IDs.
+    """
+
+    name = 'python'
+    _cache = SnapshotCache('SEARCH_INDEX_TTL', Employee)
+
+    def ensure_index(self):
+        pass
+
+    def rebuild(self):
+        self._cache.invalidate()
+
+    def _build(self):
+        # '\0' keeps a match from spanning the end of the EMP ID and the start of the name.
+        return [(emp_pk, f"{(emp_id or '').lower()}\0{(name or '').lower()}", name or '', status)
+                for emp_pk, emp_id, name, status
+                in db.session.query(Employee.id, Employee.emp_id, Employee.name, Employee.status)]
+
+    def _matches(self, text):
+        needle = (text or '').strip().lower()
+        return [row for row in self._cache.get(self._build) if needle in row[1]] if needle else None
+
+    def filter_clause(self, text):
+        matches = self._matches(text)
+        if matches is None:
+            return None
+        if len(matches) > ID_BATCH_SIZE:
+            # Too many to list as parameters; LIKE finds the same rows.
+            return _contains(text.strip())
+        return Employee.id.in_([row[0] for row in matches])
+
+    def top_matches(self, text, limit, statuses=None):
+        matches = self._matches(text)
+        if not matches:
+            return []
+        needle = text.strip().lower()
+
+        def rank(row):
+            # Same order as _prefix_first(): EMP ID prefix, then name prefix, then by name.
+            return (0 if row[1].startswith(needle) else 1 if row[2].lower().startswith(needle) else 2, row[2])
+
+        ids = [row[0] for row in sorted((row for row in matches if not statuses or row[3] in statuses),
+                                        key=rank)[:limit]]
+        found = {employee.id: employee for employee in Employee.query.filter(Employee.id.in_(ids))}
+        return [found[emp_pk] for emp_pk in ids if emp_pk in found]
+
+
+_BACKENDS = {'fts5': Fts5Search, 'trigram': TrigramSearch, 'python': PythonSearch}
+
+
+def get_search_backend():
+    """Returns the search backend for this app, creating its index on first use."""
+    backend = current_app.extensions.get('employee_search')
+    if backend is not None:
+        return backend
+
+    choice = current_app.config.get('SEARCH_BACKEND', 'auto')
+    if choice == 'auto':
+        dialect = db.engine.dialect.name
+        choice = {'sqlite': 'fts5', 'postgresql': 'trigram'}.get(dialect, 'python')
+
+    backend = _BACKENDS.get(choice, PythonSearch)()
+    try:
+        backend.ensure_index()
+    except Exception as e:
+        logger.warning("Employee search index unavailable (%s), using in-process search: %s", backend.name, e)
+        backend = PythonSearch()
+    current_app.extensions['employee_search'] = backend
+    return backend
+
+
+def employee_search_filter(text):
+    """SQL filter clause matching employees whose EMP ID or name contains `text`."""
+    return get_search_backend().filter_clause(text)
+
+
+def search_employees(text, limit=10, statuses=None):
+    """Top `limit` employees matching `text`, best matches first."""
+    return get_search_backend().top_matches(text, limit, statuses)
+
+
+def rebuild_search_index():
+    backend = get_search_backend()
+    backend.rebuild()
+    return backend.name
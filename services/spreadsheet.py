@@ -0,0 +1,132 @@
+import csv
+from datetime import datetime, date, time
+import pandas as pd
+from flask import current_app, has_app_context
+from openpyxl import load_workbook
+
+SPREADSHEET_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+# Rows held in memory at once while an uploaded file is streamed
+DEFAULT_CHUNK_SIZE = 5000
+# Cell text pandas reads as missing by default; kept so streamed files behave like read_excel/read_csv.
+NA_STRINGS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+}
+
+
+def is_spreadsheet(filename):
+    return bool(filename) and filename.lower().endswith(SPREADSHEET_EXTENSIONS)
+
+
+def _cell_text(value):
+    """Cell value as the string pandas' dtype=str would produce (None for blanks)."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime, date, time)):
+        return str(value)
+    text = str(value)
+    return None if text in NA_STRINGS else text
+
+
+def _headers(values):
+    return [str(value).strip() if value not in (None, '') else f'Unnamed: {i}' for i, value in enumerate(values)]
+
+
+def sheet_names(path):
+    """Worksheet names of an uploaded workbook, in order; [None] for a CSV file (a single sheet)."""
+    if path.lower().endswith('.xlsx'):
+        workbook = load_workbook(path, read_only=True)
+        try:
+            return workbook.sheetnames
+        finally:
+            workbook.close()
+    if path.lower().endswith('.xls'):
+        return pd.ExcelFile(path).sheet_names
+    return [None]
+
+
+def open_workbook(path):
+    """Opens an .xlsx workbook for streaming; read_only parses sheet XML lazily instead of building it in memory."""
+    return load_workbook(path, read_only=True, data_only=True)
+
+
+def _xlsx_rows(path, sheet=None, workbook=None):
+    owned = workbook is None
+    if owned:
+        workbook = open_workbook(path)
+    try:
+        worksheet = workbook[sheet] if sheet is not None else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        yield _headers(next(rows, ()))
+        for line, values in enumerate(rows, start=2):
+            yield line, values
+    finally:
+        if owned:
+            workbook.close()
+
+
+def _csv_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        reader = csv.reader(handle)
+        yield _headers(next(reader, []))
+        for values in reader:
+            yield reader.line_num, values
+
+
+def _xls_rows(path, sheet=None):
+    # openpyxl cannot read the legacy .xls format, so those sheets are still loaded whole.
+    df = pd.read_excel(path, sheet_name=sheet if sheet is not None else 0, dtype=str, header=None,
+                       keep_default_na=False)
+    rows = df.itertuples(index=False, name=None)
+    yield _headers(next(rows, ()))
+    for line, values in enumerate(rows, start=2):
+        yield line, values
+
+
+def iter_rows(path, sheet=None, workbook=None):
+    """Streams an uploaded .xlsx/.csv file as (headers, rows).
+
+    `rows` yields (line number, {header: text or None}) for every non-blank row of `sheet`
+    (the first sheet by default). An .xlsx `workbook` already opened with open_workbook() is reused.
+    """
+    if path.lower().endswith('.xlsx'):
+        source = _xlsx_rows(path, sheet, workbook)
+    elif path.lower().endswith('.xls'):
+        source = _xls_rows(path, sheet)
+    else:
+        source = _csv_rows(path)
+    headers = next(source)
+
+    def rows():
+        for line, values in source:
+            texts = [_cell_text(value) for value in values[:len(headers)]]
+            if any(text is not None for text in texts):
+                texts += [None] * (len(headers) - len(texts))
+                yield line, dict(zip(headers, texts))
+    return headers, rows()
+
+
+def iter_chunks(path, chunk_size=None, sheet=None, workbook=None):
+    """Yields the rows of an uploaded file as DataFrames of at most `chunk_size` rows.
+
+    Each frame is indexed by spreadsheet line number minus two (so index 0 is the first data row,
+    as with pd.read_excel), and at least one frame (possibly empty, with the headers) is yielded.
+    Peak memory is bounded by the chunk size, not by the size of the file.
+    """
+    if chunk_size is None:
+        chunk_size = current_app.config.get('IMPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE) if has_app_context() \
+            else DEFAULT_CHUNK_SIZE
+    headers, rows = iter_rows(path, sheet, workbook)
+    lines, records, yielded = [], [], False
+    for line, record in rows:
+        lines.append(line - 2)
+        records.append(record)
+        if len(records) >= chunk_size:
+            yield pd.DataFrame(records, index=lines, columns=headers, dtype=object)
+            lines, records, yielded = [], [], True
+    if records or not yielded:
+        yield pd.DataFrame(records, index=lines, columns=headers, dtype=object)
@@ -0,0 +1,546 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from flask import current_app
+from sqlalchemy import insert, update, select
+from models import db, Employee, Camp
+from services.beds import reconcile_beds, release_beds_of
+from services.jobs import NULL_PROGRESS
+from services.spreadsheet import iter_chunks, sheet_names, open_workbook
+from services.validation import validate_staff_chunks, check_report, ImportValidationError
+
+logger = logging.getLogger(__name__)
+
+# Define required column names
+REQUIRED_COLUMNS = ['ACCOMMODATION_NAME', 'ROOM', 'EMP_ID', 'STATUS', 'NAME', 'LOCATION']
+
+# Employee field <- spreadsheet column, with the value used when the column is absent.
+FIELD_COLUMNS = {
+    'status': ('STATUS', 'N/A'),
+    'name': ('NAME', '-'),
+    'designation': ('DESIGNATION', '-'),
+    'nationality': ('NATIONALITY', '-'),
+    'mobile_number': ('MOBILE_NUMBER', '-'),
+    'food_variety': ('FOOD_VARIETY', '-'),
+    'meal_time': ('MEAL_TIME', '-'),
+    'location': ('LOCATION', 'N/A'),
+    'remarks': ('REMARKS', ''),
+}
+KEY_FIELDS = ['accommodation_name', 'room', 'emp_id']
+VALUE_FIELDS = list(FIELD_COLUMNS)
+
+SYNC_MODES = {
+    'incremental': 'Incremental (apply only the changes)',
+    'replace': 'Full replace (delete and re-insert every bed)',
+}
+
+
+def normalize_staff_frame(df):
+    """Normalizes headers (upper case, '_' for spaces) and fills blanks with 'N/A'."""
+    df.columns = [str(col).strip().upper().replace(' ', '_').replace('#', 'NUMBER') for col in df.columns]
+    return df.fillna('N/A')
+
+
+def _empty_summary():
+    return {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0, 'skipped': 0, 'duplicates': [],
+            'beds_added': 0, 'beds_removed': 0}
+
+
+def resolve_camps(locations_by_accommodation):
+    """Makes sure a Camp exists for every accommodation name, using one IN query plus one bulk insert.
+
+    `locations_by_accommodation` maps accommodation name -> location from the sheet (used only
+    when the Camp has to be created). Returns the number of camps created.
+    """
+    names = list(locations_by_accommodation)
+    if not names:
+        return 0
+    existing = {name for (name,) in db.session.query(Camp.name).filter(Camp.name.in_(names))}
+    missing = [
+        {'name': name, 'location': location if location and location != 'N/A' else None}
+        for name, location in locations_by_accommodation.items() if name not in existing
+    ]
+    if missing:
+        db.session.execute(insert(Camp), missing)
+    return len(missing)
+
+
+def bulk_insert_employees(rows, batch_size=None, progress=NULL_PROGRESS):
+    """Inserts Employee rows (list of dicts) with executemany in batches of IMPORT_BATCH_SIZE."""
+    batch_size = batch_size or current_app.config.get('IMPORT_BATCH_SIZE', 1000)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        db.session.execute(insert(Employee), batch)
+        progress.advance(len(batch))
+
+
+def _count_beds(room_counts, room_locations, target):
+    """Adds the bed rows of a target frame to the per-(accommodation, room) bed totals."""
+    keys = list(zip(target['accommodation_name'], target['room']))
+    for key, location in zip(keys, target['location']):
+        room_counts[key] = room_counts.get(key, 0) + 1
+        if location not in ('N/A', '-', ''):
+            room_locations.setdefault(key, location)
+
+
+def replace_staff(chunks, accommodations, progress=NULL_PROGRESS):
+    """Legacy sync: deletes every employee of the listed accommodations and re-inserts the sheet's rows.
+
+    `chunks` are normalized sheet frames; `accommodations` are the names found in the whole file
+    (deleted up front so an EMP_ID moving between two of them never collides). Vacant rows only
+    count towards their room's beds; the Room/Bed rows are reconciled once every chunk is in.
+    """
+    summary = _empty_summary()
+    progress.stage('Committing')
+    accommodations_in_file = set(accommodations)
+    if accommodations_in_file:
+        release_beds_of([id for (id,) in db.session.query(Employee.id).filter(
+            Employee.accommodation_name.in_(accommodations_in_file))])
+        summary['deleted'] = Employee.query.filter(
+            Employee.accommodation_name.in_(accommodations_in_file)
+        ).delete(synchronize_session=False)
+
+    processed_emp_ids = set()
+    resolved_camps = set()
+    room_counts, room_locations = {}, {}
+
+    for df in chunks:
+        camp_locations = {}
+        beds = []
+        for row in df.to_dict('records'):
+            status = row.get('STATUS', 'N/A')
+            emp_id = str(row.get('EMP_ID', 'N/A'))
+            accommodation_name_raw = row.get('ACCOMMODATION_NAME', 'N/A')
+            room_number = str(row.get('ROOM', 'N/A'))
+
+            accommodation_name = accommodation_name_raw.strip() if accommodation_name_raw else 'N/A'
+
+            if accommodation_name == 'N/A' or room_number == 'N/A':
+                summary['skipped'] += 1
+                continue
+            if accommodation_name not in accommodations_in_file:
+                summary['skipped'] += 1
+                continue
+
+            if status.lower() != 'vacant' and emp_id != 'N/A' and emp_id:
+                if emp_id in processed_emp_ids:
+                    summary['duplicates'].append(emp_id)
+                    continue
+                processed_emp_ids.add(emp_id)
+
+            # The Camp record for each accommodation is resolved in one query per chunk;
+            # the first row of an accommodation supplies its location.
+            if accommodation_name not in resolved_camps:
+                camp_locations.setdefault(accommodation_name, row.get('LOCATION', 'N/A'))
+
+            key = (accommodation_name, room_number)
+            room_counts[key] = room_counts.get(key, 0) + 1
+            if row.get('LOCATION', 'N/A') not in ('N/A', '-', ''):
+                room_locations.setdefault(key, row.get('LOCATION'))
+            if status.lower() == 'vacant':
+                continue
+
+            beds.append(dict(
+                accommodation_name=accommodation_name, room=room_number,
+                status=status, emp_id=emp_id, name=row.get('NAME', '-'),
+                designation=row.get('DESIGNATION', '-'), nationality=row.get('NATIONALITY', '-'),
+                mobile_number=str(row.get('MOBILE_NUMBER', '-')), food_variety=row.get('FOOD_VARIETY', '-'),
+                meal_time=row.get('MEAL_TIME', '-'), location=row.get('LOCATION', 'N/A'),
+                remarks=row.get('REMARKS', '')
+            ))
+
+        resolve_camps(camp_locations)
+        resolved_camps.update(camp_locations)
+        progress.advance(len(df) - len(beds))
+        bulk_insert_employees(beds, progress=progress)
+        summary['inserted'] += len(beds)
+
+    summary['beds_added'], summary['beds_removed'] = reconcile_beds(accommodations_in_file, room_counts,
+                                                                    room_locations)
+    db.session.commit()
+    return summary
+
+
+def _target_frame(df, summary, seen_emp_ids):
+    """Maps a normalized sheet chunk onto Employee fields and drops rows that cannot be synced.
+
+    EMP_IDs already in `seen_emp_ids` (earlier chunks) count as duplicates; the set is updated.
+    """
+    target = pd.DataFrame({
+        'accommodation_name': df['ACCOMMODATION_NAME'].astype(str).str.strip(),
+        'room': df['ROOM'].astype(str),
+        'emp_id': df['EMP_ID'].astype(str).str.strip(),
+    })
+    for field, (column, default) in FIELD_COLUMNS.items():
+        target[field] = df[column].astype(str) if column in df.columns else default
+
+    placeable = (target['accommodation_name'] != 'N/A') & (target['room'] != 'N/A')
+    target['is_vacant'] = target['status'].str.lower() == 'vacant'
+    has_emp_id = ~target['emp_id'].isin(['N/A', ''])
+    keep = placeable & (target['is_vacant'] | has_emp_id)
+    summary['skipped'] += int((~keep).sum())
+    target = target[keep]
+
+    occupant = ~target['is_vacant']
+    duplicated = occupant & (target.duplicated('emp_id', keep='first') | target['emp_id'].isin(seen_emp_ids))
+    summary['duplicates'] += target.loc[duplicated, 'emp_id'].unique().tolist()
+    seen_emp_ids.update(target.loc[occupant & ~duplicated, 'emp_id'])
+    return target[~duplicated].reset_index(drop=True)
+
+
+def _employee_frame(*criteria):
+    """Current Employee rows matching `criteria`, with key/value fields as strings."""
+    columns = [Employee.id] + [getattr(Employee, field) for field in KEY_FIELDS + VALUE_FIELDS]
+    statement = select(*columns).where(*criteria).order_by(Employee.id)
+    current = pd.read_sql(statement, db.session.connection())
+    for field in KEY_FIELDS + VALUE_FIELDS:
+        current[field] = current[field].fillna('').astype(str)
+    return current
+
+
+def _changed_rows(merged, fields=VALUE_FIELDS):
+    """Rows of an (existing, target) merge whose `fields` differ, as bulk-update dicts."""
+    changed = pd.Series(False, index=merged.index)
+    for field in fields:
+        changed |= merged[f'{field}_db'] != merged[f'{field}_file']
+    rows = merged[changed]
+    updates = pd.DataFrame({'id': rows['id'].astype(int)})
+    for field in fields:
+        updates[field] = rows[f'{field}_file']
+    return updates.to_dict('records'), int((~changed).sum())
+
+
+class _IncrementalSync:
+    """State carried between sheet chunks by sync_staff()."""
+
+    def __init__(self, progress):
+        self.progress = progress
+        self.summary = _empty_summary()
+        self.seen_emp_ids = set()
+        self.stale_ids = set()  # employees of the accommodations seen so far that nothing in the file matched
+        self.matched_ids = set()  # employees the file matched (by EMP_ID), wherever they were before
+        self.snapshotted = set()  # accommodations whose employees are in stale_ids
+        self.room_counts = {}  # (accommodation, room) -> bed rows (occupied or vacant) in the file
+        self.room_locations = {}
+
+    def apply(self, df):
+        target = _target_frame(df, self.summary, self.seen_emp_ids)
+        self.progress.advance(len(df) - len(target))
+        if target.empty:
+            return
+
+        # Employees of an accommodation are snapshotted the first time it appears, before any write to it.
+        new_accommodations = [name for name in target['accommodation_name'].unique() if name not in self.snapshotted]
+        if new_accommodations:
+            first_rows = target[target['accommodation_name'].isin(new_accommodations)]
+            resolve_camps(first_rows.groupby('accommodation_name', sort=False)['location'].first().to_dict())
+            self.stale_ids.update(id for (id,) in db.session.query(Employee.id).filter(
+                Employee.accommodation_name.in_(new_accommodations)))
+            self.snapshotted.update(new_accommodations)
+
+        # Vacant rows are not stored; they only count towards the beds of their room.
+        _count_beds(self.room_counts, self.room_locations, target)
+        updates, inserts = self._occupants(target[~target['is_vacant']])
+
+        if updates:
+            db.session.execute(update(Employee), updates)
+        self.progress.advance(len(target) - len(inserts))
+        bulk_insert_employees(inserts, progress=self.progress)
+        self.summary['updated'] += len(updates)
+        self.summary['inserted'] += len(inserts)
+
+    def _occupants(self, occupants):
+        """Occupied beds are matched on EMP_ID; a row found under another bed is moved there."""
+        if occupants.empty:
+            return [], []
+        existing = _employee_frame(Employee.emp_id.in_(occupants['emp_id'].tolist()))
+        merged = existing.merge(occupants, on='emp_id', how='right', suffixes=('_db', '_file'), indicator=True)
+        found = merged[merged['_merge'] == 'both'].copy()
+        found['id'] = found['id'].astype(int)
+        self.stale_ids.difference_update(found['id'])
+        self.matched_ids.update(found['id'])
+
+        same_bed = ((found['accommodation_name_db'] == found['accommodation_name_file'])
+                    & (found['room_db'] == found['room_file']))
+        updates, unchanged = _changed_rows(found[same_bed])
+        self.summary['unchanged'] += unchanged
+        moves, _ = _changed_rows(found[~same_bed], fields=['accommodation_name', 'room'] + VALUE_FIELDS)
+        updates += moves
+
+        new = merged[merged['_merge'] == 'right_only']
+        inserts = [
+            {field: record[f'{field}_file'] if f'{field}_file' in record else record[field]
+             for field in KEY_FIELDS + VALUE_FIELDS}
+            for record in new.to_dict('records')
+        ]
+        return updates, inserts
+
+    def finish(self, cleanup=None):
+        """Removes the stale employees and reconciles the beds, then commits. With a
+        _StaleCleanup (several sheets of one workbook) both are left to it instead."""
+        if cleanup is None:
+            self.summary['deleted'], self.summary['beds_added'], self.summary['beds_removed'] = _remove_stale(
+                self.stale_ids, self.snapshotted, self.room_counts, self.room_locations)
+            db.session.commit()
+        else:
+            db.session.commit()
+            cleanup.add(self)
+        return self.summary
+
+
+def _remove_stale(stale_ids, accommodations, room_counts, room_locations, batch_size=1000):
+    """Deletes the employees left unmatched and makes the beds of `accommodations` match the file.
+    Returns (deleted, beds added, beds removed); the caller commits.
+
+    No insert reuses the EMP_IDs of the deleted employees: occupants already in the table are
+    moved rather than re-inserted.
+    """
+    stale = sorted(stale_ids)
+    release_beds_of(stale)
+    for start in range(0, len(stale), batch_size):
+        Employee.query.filter(Employee.id.in_(stale[start:start + batch_size])).delete(synchronize_session=False)
+    beds_added, beds_removed = reconcile_beds(accommodations, room_counts, room_locations)
+    return len(stale), beds_added, beds_removed
+
+
+class _StaleCleanup:
+    """Stale-employee removal and bed reconciliation deferred to the end of a multi-sheet import.
+
+    Done per sheet, an employee who moved from sheet A to sheet B would be deleted with sheet A
+    and re-inserted by sheet B, losing their row and history; collected over every imported
+    sheet, they are matched by sheet B and only moved.
+    """
+
+    def __init__(self):
+        self.stale_ids, self.matched_ids, self.accommodations = set(), set(), set()
+        self.room_counts, self.room_locations = {}, {}
+
+    def add(self, sync):
+        self.stale_ids |= sync.stale_ids
+        self.matched_ids |= sync.matched_ids
+        self.accommodations |= sync.snapshotted
+        for key, count in sync.room_counts.items():
+            self.room_counts[key] = self.room_counts.get(key, 0) + count
+        self.room_locations.update(sync.room_locations)
+
+    def finish(self):
+        """Returns (deleted, beds added, beds removed) after committing."""
+        try:
+            result = _remove_stale(self.stale_ids - self.matched_ids, self.accommodations,
+                                   self.room_counts, self.room_locations)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return result
+
+
+def sync_staff(chunks, progress=NULL_PROGRESS, cleanup=None):
+    """Incremental sync: diffs the sheet, chunk by chunk, against the employees of the accommodations it lists.
+
+    Occupants are matched on EMP_ID (moving them when the accommodation or room changed) and only
+    the rows that differ are written. Each room then gets as many beds as the sheet lists for it
+    (occupied and vacant), occupants keeping the bed they already had. Returns a summary of the
+    changes. With a `cleanup` (_StaleCleanup) the removal of employees the sheet no longer lists
+    and the bed reconciliation wait for the other sheets of the workbook.
+    """
+    progress.stage('Committing')
+    sync = _IncrementalSync(progress)
+    for df in chunks:
+        sync.apply(df)
+    return sync.finish(cleanup)
+
+
+def iter_staff_chunks(path):
+    """Streams an uploaded staff workbook as normalized DataFrame chunks."""
+    return (normalize_staff_frame(df) for df in iter_chunks(path))
+
+
+def _import_staff_chunks(chunks, progress, sync_mode, dry_run, cleanup=None):
+    """Validates then applies one sheet. `chunks()` returns a fresh iterator of normalized frames."""
+    progress.stage('Validating')
+    report, accommodations = validate_staff_chunks(chunks(), REQUIRED_COLUMNS, sync_mode=sync_mode, dry_run=dry_run)
+    if dry_run:
+        return report
+    check_report(report)
+
+    # Second pass over the rows: memory stays bounded by IMPORT_CHUNK_SIZE rows.
+    progress.rows_total = progress.rows_processed + report['rows']
+    if sync_mode == 'replace':
+        summary = replace_staff(chunks(), accommodations, progress=progress)
+    else:
+        summary = sync_staff(chunks(), progress=progress, cleanup=cleanup)
+    summary['duplicates'] = sorted(set(summary['duplicates']))
+    summary['warnings'] = [issue for issue in report['issues'] if issue['severity'] == 'warning']
+    summary['message'] = describe_summary(summary)
+    return summary
+
+
+def import_staff_file(path, progress=NULL_PROGRESS, sync_mode='incremental', dry_run=False):
+    """Job handler: reads, validates and synchronizes an uploaded staff workbook.
+
+    With `dry_run` only the validation report is returned. Otherwise the file is rejected
+    (ImportValidationError) before any write if validation finds errors. Workbooks with several
+    sheets are handled by import_staff_workbook().
+    """
+    sheets = sheet_names(path)
+    if len(sheets) > 1:
+        return import_staff_workbook(path, sheets, progress=progress, sync_mode=sync_mode, dry_run=dry_run)
+    return _import_staff_chunks(lambda: iter_staff_chunks(path), progress, sync_mode, dry_run)
+
+
+# Workbook opened once per parsing process (by _open_worker_workbook) and shared by its sheets.
+_worker_workbook = None
+
+
+def _open_worker_workbook(path):
+    global _worker_workbook
+    if path.lower().endswith('.xlsx'):
+        _worker_workbook = open_workbook(path)
+
+
+def _parse_staff_sheet(path, sheet, chunk_size, stage_prefix):
+    """Process-pool worker: stages one sheet's normalized chunks as pickle files named after
+    `stage_prefix` and returns (blank, paths), so only file names travel back to the parent.
+    Runs without an app context or database."""
+    paths, blank = [], True
+    for number, df in enumerate(iter_chunks(path, chunk_size, sheet=sheet, workbook=_worker_workbook)):
+        df = normalize_staff_frame(df)
+        if number == 0:
+            blank = all(str(col).startswith('UNNAMED:') for col in df.columns)
+        blank = blank and df.empty
+        paths.append(f'{stage_prefix}-{number}.pkl')
+        df.to_pickle(paths[-1])
+    return blank, paths
+
+
+def _staged_chunks(paths):
+    return (pd.read_pickle(chunk_path) for chunk_path in paths)
+
+
+def _parse_sheets(path, sheets, stage_dir):
+    """Parses the sheets on a process pool, staging their chunks in `stage_dir`; yields (sheet,
+    future) in workbook order. At most one sheet per worker is submitted ahead of the sheet
+    being imported, and chunks are read back one at a time, so the parent never holds more
+    than a chunk of the workbook in memory."""
+    workers = min(current_app.config.get('IMPORT_PARSE_WORKERS') or os.cpu_count() or 1, len(sheets))
+    chunk_size = current_app.config.get('IMPORT_CHUNK_SIZE', 5000)
+    # 'spawn' because the job runs on a thread of the web process; forking it could copy held locks.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_open_worker_workbook, initargs=(path,)) as pool:
+        waiting, in_flight = deque(enumerate(sheets)), deque()
+
+        def submit():
+            index, sheet = waiting.popleft()
+            prefix = os.path.join(stage_dir, f'sheet{index}')
+            in_flight.append((sheet, pool.submit(_parse_staff_sheet, path, sheet, chunk_size, prefix)))
+
+        while waiting and len(in_flight) < workers:
+            submit()
+        while in_flight:
+            yield in_flight.popleft()
+            if waiting:
+                submit()
+
+
+def _combined_report(outcomes, issues, dry_run=False):
+    """Sums the per-sheet validation reports of a workbook into one report."""
+    reports = [outcome['result'] for outcome in outcomes]
+    return {
+        'dry_run': dry_run,
+        'valid': all(outcome['status'] == 'Completed' and outcome['result'].get('valid', True) for outcome in outcomes),
+        'rows': sum(report.get('rows', 0) for report in reports),
+        'error_count': sum(report.get('error_count', 0) or outcome['status'] == 'Failed'
+                           for report, outcome in zip(reports, outcomes)),
+        'warning_count': sum(report.get('warning_count', 0) for report in reports),
+        'rows_with_errors': sum(report.get('rows_with_errors', 0) for report in reports),
+        'issues': issues,
+        'issues_truncated': any(report.get('issues_truncated') for report in reports),
+        'sheets': [{'sheet': outcome['sheet'], 'status': outcome['status'], 'error': outcome.get('error')}
+                   for outcome in outcomes],
+    }
+
+
+def import_staff_workbook(path, sheets, progress=NULL_PROGRESS, sync_mode='incremental', dry_run=False):
+    """Imports a workbook with one sheet per accommodation.
+
+    Sheets are parsed in parallel on a process pool (IMPORT_PARSE_WORKERS), staged to a temporary
+    directory, and then validated and applied in workbook order, each in its own transaction: a
+    sheet that fails is rolled back and reported without affecting the others. In incremental
+    mode the employees no sheet lists any more are removed, and the beds reconciled, once every
+    sheet has been applied (see _StaleCleanup). Returns the combined summary (or, with `dry_run`,
+    the combined validation report); issues are tagged with their sheet.
+    """
+    progress.stage('Parsing')
+    outcomes = []
+    cleanup = _StaleCleanup() if sync_mode != 'replace' and not dry_run else None
+    stage_dir = tempfile.mkdtemp(prefix='staff-import-')
+    try:
+        for sheet, future in _parse_sheets(path, sheets, stage_dir):
+            outcome = {'sheet': sheet}
+            paths = []
+            try:
+                blank, paths = future.result()
+                if blank:
+                    continue
+                result = _import_staff_chunks(lambda: _staged_chunks(paths), progress, sync_mode, dry_run, cleanup)
+                outcome.update(status='Completed', result=result)
+            except ImportValidationError as e:
+                db.session.rollback()
+                outcome.update(status='Failed', error=str(e), result=e.report)
+            except Exception as e:
+                db.session.rollback()
+                logger.exception("Sheet %r of %s could not be imported", sheet, path)
+                outcome.update(status='Failed', error=e.args[0] if isinstance(e, KeyError) and e.args else str(e),
+                               result={})
+            finally:
+                for chunk_path in paths:
+                    os.remove(chunk_path)
+            outcomes.append(outcome)
+    finally:
+        shutil.rmtree(stage_dir, ignore_errors=True)
+
+    issues = [
+        dict(issue, sheet=outcome['sheet'])
+        for outcome in outcomes
+        for issue in outcome['result'].get('issues', outcome['result'].get('warnings', []))
+    ]
+    if dry_run:
+        return _combined_report(outcomes, issues, dry_run=True)
+    completed = sum(outcome['status'] == 'Completed' for outcome in outcomes)
+    if outcomes and not completed:
+        raise ImportValidationError(_combined_report(outcomes, issues))
+
+    summary = _empty_summary()
+    for outcome in outcomes:
+        if outcome['status'] == 'Completed':
+            for key in ('inserted', 'updated', 'deleted', 'unchanged', 'skipped', 'duplicates',
+                        'beds_added', 'beds_removed'):
+                summary[key] += outcome['result'][key]
+    if cleanup is not None:
+        summary['deleted'], summary['beds_added'], summary['beds_removed'] = cleanup.finish()
+    summary['duplicates'] = sorted(set(summary['duplicates']))
+    summary['issues'] = issues
+    summary['sheets'] = [
+        {'sheet': outcome['sheet'], 'status': outcome['status'],
+         'message': outcome['result']['message'] if outcome['status'] == 'Completed' else outcome['error']}
+        for outcome in outcomes
+    ]
+    summary['message'] = f"{completed} of {len(outcomes)} sheet(s) imported: {describe_summary(summary)}"
+    return summary
+
+
+def describe_summary(summary):
+    """One-line human readable description of an import summary (used in flash messages)."""
+    text = (f"{summary['inserted']} added, {summary['updated']} updated, "
+            f"{summary['deleted']} removed, {summary['unchanged']} unchanged")
+    if summary.get('beds_added') or summary.get('beds_removed'):
+        text += f" ({summary.get('beds_added', 0)} bed(s) added, {summary.get('beds_removed', 0)} removed)"
+    if summary['skipped']:
+        text += f", {summary['skipped']} row(s) skipped"
+    return text
@@ -0,0 +1,269 @@
+import pandas as pd
+from config import Config
+from models import db, Employee
+
+# Issues listed individually in a report; the counts always cover every row.
+MAX_REPORTED_ISSUES = 500
+# Spreadsheet row number of DataFrame index 0 (row 1 holds the headers).
+FIRST_DATA_ROW = 2
+
+
+class ImportValidationError(Exception):
+    """Raised when an uploaded file fails validation; nothing has been written to the database."""
+
+    def __init__(self, report):
+        self.report = report
+        super().__init__(
+            f"File rejected: {report['error_count']} problem(s) found in {report['rows_with_errors']} row(s). "
+            "No changes were saved."
+        )
+
+
+class ValidationReport:
+    """Accumulates issues chunk by chunk; only the first MAX_REPORTED_ISSUES are kept in full."""
+
+    def __init__(self):
+        self.rows = 0
+        self.issues = []
+        self.issue_count = 0
+        self.error_count = 0
+        self.error_rows = set()
+
+    def add(self, issues):
+        for issue in issues:
+            self.issue_count += 1
+            if issue['severity'] == 'error':
+                self.error_count += 1
+                self.error_rows.add(issue['row'])
+            if len(self.issues) < MAX_REPORTED_ISSUES:
+                self.issues.append(issue)
+
+    def to_dict(self, dry_run=False):
+        return {
+            'dry_run': dry_run,
+            'valid': not self.error_count,
+            'rows': self.rows,
+            'error_count': self.error_count,
+            'warning_count': self.issue_count - self.error_count,
+            'rows_with_errors': len(self.error_rows),
+            'issues': sorted(self.issues, key=lambda issue: (issue['row'], issue['column'])),
+            'issues_truncated': self.issue_count > len(self.issues),
+        }
+
+
+def _issues(df, mask, column, message, severity='error'):
+    """One issue per row selected by the boolean `mask`."""
+    values = df.loc[mask, column] if column in df.columns else pd.Series('', index=df.index[mask])
+    return [
+        {'row': int(index) + FIRST_DATA_ROW, 'column': column, 'value': str(value),
+         'message': message, 'severity': severity}
+        for index, value in values.items()
+    ]
+
+
+def _file_issue(column, message):
+    return {'row': 1, 'column': column, 'value': '', 'message': message, 'severity': 'error'}
+
+
+def check_report(report):
+    """Raises ImportValidationError unless the report is free of errors (warnings are allowed)."""
+    if not report['valid']:
+        raise ImportValidationError(report)
+
+
+def _is_blank(series):
+    return series.astype(str).str.strip().isin(['', 'N/A', 'nan', 'None'])
+
+
+def _existing_emp_locations(emp_ids, chunk_size=1000):
+    """EMP_ID -> accommodation name (None when awaiting a room) for IDs already in the database."""
+    found = {}
+    for start in range(0, len(emp_ids), chunk_size):
+        chunk = emp_ids[start:start + chunk_size]
+        found.update(db.session.query(Employee.emp_id, Employee.accommodation_name).filter(Employee.emp_id.in_(chunk)))
+    return found
+
+
+def validate_staff_chunks(chunks, required_columns, sync_mode='incremental', dry_run=False):
+    """Checks normalized staff sheet chunks with vectorized operations before any write.
+
+    Missing columns, statuses outside Config.EMPLOYEE_STATUSES (plus 'Vacant') and, for a full
+    replace, EMP IDs that already belong to an accommodation not in the file are errors. Rows
+    the importer skips (no accommodation/room/EMP ID, repeated EMP ID) and employees that an
+    incremental sync will move are reported as warnings.
+
+    Returns (report, accommodation names found in the file).
+    """
+    report = ValidationReport()
+    allowed = {value.lower() for value in Config.EMPLOYEE_STATUSES + ['Vacant']}
+    first_rows = {}  # EMP_ID -> row of its first occurrence, across chunks
+    accommodations = {}
+    move_candidates = []  # (row, EMP_ID, current accommodation) for IDs stored under another accommodation
+
+    for df in chunks:
+        missing_cols = [col for col in required_columns if col not in df.columns]
+        if missing_cols:
+            report.add(_file_issue(col, 'Required column is missing') for col in missing_cols)
+            return report.to_dict(dry_run), []
+        report.rows += len(df)
+
+        accommodation = df['ACCOMMODATION_NAME'].astype(str).str.strip()
+        status = df['STATUS'].astype(str).str.strip()
+        emp_id = df['EMP_ID'].astype(str).str.strip()
+        is_vacant = status.str.lower() == 'vacant'
+        blank_accommodation = _is_blank(accommodation)
+        accommodations.update(dict.fromkeys(accommodation[~blank_accommodation].unique()))
+
+        report.add(_issues(df, blank_accommodation, 'ACCOMMODATION_NAME',
+                           'Accommodation name is missing; row will be skipped', severity='warning'))
+        report.add(_issues(df, _is_blank(df['ROOM']), 'ROOM', 'Room is missing; row will be skipped',
+                           severity='warning'))
+        report.add(_issues(df, ~status.str.lower().isin(allowed), 'STATUS',
+                           f"Unknown status (expected one of: {', '.join(Config.EMPLOYEE_STATUSES + ['Vacant'])})"))
+
+        needs_id = ~is_vacant & _is_blank(emp_id)
+        report.add(_issues(df, needs_id, 'EMP_ID', 'EMP ID is missing for an occupied bed; row will be skipped',
+                           severity='warning'))
+
+        occupant_ids = emp_id[~is_vacant & ~needs_id]
+        duplicated = occupant_ids.duplicated(keep='first') | occupant_ids.isin(first_rows)
+        first_rows.update(
+            (value, int(index) + FIRST_DATA_ROW) for index, value in occupant_ids[~duplicated].items()
+        )
+        report.add(
+            {'row': int(index) + FIRST_DATA_ROW, 'column': 'EMP_ID', 'value': value,
+             'message': f'Duplicate EMP ID (first used on row {first_rows[value]}); row will be skipped',
+             'severity': 'warning'}
+            for index, value in occupant_ids[duplicated].items()
+        )
+
+        unique_ids = occupant_ids[~duplicated]
+        existing = _existing_emp_locations(unique_ids.tolist())
+        if existing:
+            current = unique_ids.map(existing)
+            elsewhere = unique_ids.isin(list(existing)) & (current != accommodation[unique_ids.index])
+            move_candidates += [
+                (int(index) + FIRST_DATA_ROW, unique_ids[index], current[index]) for index in unique_ids.index[elsewhere]
+            ]
+
+    # Whether an employee is moving is only known once every accommodation in the file has been seen.
+    severity = 'error' if sync_mode == 'replace' else 'warning'
+    for row, value, current in move_candidates:
+        if current in accommodations:
+            continue
+        current = current or 'the awaiting-room list'
+        message = (f'EMP ID already exists in {current}' if severity == 'error'
+                   else f'Employee will be moved from {current}')
+        report.add([{'row': row, 'column': 'EMP_ID', 'value': value, 'message': message, 'severity': severity}])
+    return report.to_dict(dry_run), list(accommodations)
+
+
+def _first_present(df, *columns):
+    return next((column for column in columns if column in df.columns), None)
+
+
+def parse_dates(series):
+    """Vectorized date parsing; unparsable values become NaT."""
+    return pd.to_datetime(series.where(~_is_blank(series)), errors='coerce', format='mixed')
+
+
+def amcs_date_columns(df):
+    """(inspection/start column, expiry/end column) of an AMC sheet; None where absent."""
+    return _first_present(df, 'Inspection Date', 'Start Date'), _first_present(df, 'Expiry Date', 'End Date')
+
+
+def validate_amcs_chunks(chunks, dry_run=False):
+    """Checks that every AMC row has parsable inspection/start and expiry/end dates."""
+    report = ValidationReport()
+    for df in chunks:
+        start_column, end_column = amcs_date_columns(df)
+        if start_column is None:
+            report.add([_file_issue('Inspection Date', "Required column is missing ('Inspection Date' or 'Start Date')")])
+        if end_column is None:
+            report.add([_file_issue('Expiry Date', "Required column is missing ('Expiry Date' or 'End Date')")])
+        if report.error_count:
+            break
+        report.rows += len(df)
+
+        start = parse_dates(df[start_column])
+        end = parse_dates(df[end_column])
+        report.add(_issues(df, start.isna(), start_column, 'Date is missing or could not be read'))
+        report.add(_issues(df, end.isna(), end_column, 'Date is missing or could not be read'))
+        report.add(_issues(df, start.notna() & end.notna() & (end < start), end_column,
+                           'Expiry date is before the inspection date', severity='warning'))
+    return report.to_dict(dry_run)
+
+
+def validate_maintenance_chunks(chunks, dry_run=False):
+    """Checks maintenance statuses (Open/Closed) and that report dates can be read."""
+    report = ValidationReport()
+    for df in chunks:
+        report.rows += len(df)
+        if 'Status' in df.columns:
+            status = df['Status'].astype(str).str.strip()
+            report.add(_issues(df, ~_is_blank(status) & ~status.isin(['Open', 'Closed']), 'Status',
+                               "Unknown status (expected 'Open' or 'Closed')"))
+        if 'Report Date' in df.columns:
+            report_date = df['Report Date']
+            report.add(_issues(df, ~_is_blank(report_date) & parse_dates(report_date).isna(), 'Report Date',
+                               'Date could not be read'))
+    return report.to_dict(dry_run)
+
+
+def receipt_columns(df):
+    """(item, quantity, supplier, LPO number, date) columns of a stock receipt sheet; None where absent."""
+    return (_first_present(df, 'Item Name', 'Item'), _first_present(df, 'Quantity'),
+            _first_present(df, 'Supplier Name', 'Supplier'), _first_present(df, 'LPO Number', 'LPO'),
+            _first_present(df, 'Date'))
+
+
+def receipt_quantities(series):
+    """Vectorized quantity parsing; anything that is not a whole number becomes NaN."""
+    quantity = pd.to_numeric(series, errors='coerce')
+    return quantity.where(quantity == quantity.round())
+
+
+def validate_receipt_chunks(chunks, find_items, create_items=False, dry_run=False):
+    """Checks a stock receipt sheet: every row needs an item and a positive whole quantity, and
+    dates (when given) must be readable.
+
+    Item names are collected across the whole file and resolved with one `find_items(names)`
+    call ({lower-case name: item} for the names that exist). Unknown items are errors unless
+    `create_items` is set, in which case they are reported as warnings.
+
+    Returns (report, {lower-case name: item} for the items found).
+    """
+    report = ValidationReport()
+    first_rows = {}  # lower-case item name -> (row, name as first written)
+    for df in chunks:
+        item_column, quantity_column, _, _, date_column = receipt_columns(df)
+        if item_column is None:
+            report.add([_file_issue('Item Name', "Required column is missing ('Item Name' or 'Item')")])
+        if quantity_column is None:
+            report.add([_file_issue('Quantity', 'Required column is missing')])
+        if report.error_count:
+            return report.to_dict(dry_run), {}
+        report.rows += len(df)
+        df = df.fillna('')
+
+        names = df[item_column].astype(str).str.strip()
+        blank_name = _is_blank(names)
+        report.add(_issues(df, blank_name, item_column, 'Item name is missing'))
+        quantity = receipt_quantities(df[quantity_column])
+        report.add(_issues(df, quantity.isna() | (quantity <= 0), quantity_column,
+                           'Quantity must be a positive whole number'))
+        if date_column is not None:
+            dates = df[date_column]
+            report.add(_issues(df, ~_is_blank(dates) & parse_dates(dates).isna(), date_column,
+                               'Date could not be read'))
+        for index, name in names[~blank_name].items():
+            first_rows.setdefault(name.lower(), (int(index) + FIRST_DATA_ROW, name))
+
+    items = find_items([name for _, name in first_rows.values()]) if first_rows else {}
+    severity = 'warning' if create_items else 'error'
+    message = 'Unknown item; it will be created' if create_items else 'Unknown item'
+    report.add(
+        {'row': row, 'column': 'Item Name', 'value': name, 'message': message, 'severity': severity}
+        for key, (row, name) in first_rows.items() if key not in items
+    )
+    return report.to_dict(dry_run), items